@@ -0,0 +1,152 @@
+"""Microbenchmarks for :mod:`piffle.image` url client hot paths, reporting
+operations per second and memory allocated per call, to provide a
+baseline for measuring changes to the url layer. This is the single
+suite for these hot paths; :mod:`bench_image` compares some of them with
+previous implementations, and times bulk url generation.
+
+Allocations are measured with :mod:`tracemalloc` over a separate run:
+``peak B/op`` is the peak memory allocated during a single call, and
+``blocks/op`` is the number of memory blocks still allocated after a
+call (e.g. cached or returned objects).
+
+Runs offline; no image server is needed. Run from the repository root
+with::
+
+    python benchmarks/bench_hotpaths.py [name filter]
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from piffle.image import IIIFImageClient, ImageRegion, ImageRotation, ImageSize
+
+API_ENDPOINT = "http://imgserver.co/iiif"
+URL = f"{API_ENDPOINT}/img000001/pct:10,10,50,50/^!300,200/!90/default.jpg"
+IMAGE_INFO = {"width": 4000, "height": 3000}
+
+CLIENT = IIIFImageClient.init_from_url(URL)
+
+
+def init_from_url_uncached():
+    IIIFImageClient.url_cache.clear()
+    return IIIFImageClient.init_from_url(URL)
+
+
+def init_from_url_cached():
+    return IIIFImageClient.init_from_url(URL)
+
+
+def render_cached():
+    return str(CLIENT)
+
+
+def render_uncached():
+    CLIENT._cached_url = None
+    return str(CLIENT)
+
+
+def fluent_chain():
+    return CLIENT.size(width=300).rotation(degrees=90).format("png")
+
+
+def get_copy():
+    return CLIENT.get_copy()
+
+
+REGION = ImageRegion()
+SIZE = ImageSize()
+ROTATION = ImageRotation()
+
+
+def parse_region():
+    REGION.parse("pct:10.5,20,50,50")
+
+
+def parse_size():
+    SIZE.parse("^!300,200")
+
+
+def parse_rotation():
+    ROTATION.parse("!90")
+
+
+def canonicalize():
+    img = IIIFImageClient(API_ENDPOINT, "img000001", region="square", size="!300,300")
+    img.image_info = IMAGE_INFO
+    return img.canonicalize()
+
+
+IIIFImageClient.info_cache.set(f"{API_ENDPOINT}/img000001/info.json", IMAGE_INFO)
+
+
+def cache_key_uncached():
+    IIIFImageClient.cache_key_cache.clear()
+    return IIIFImageClient.cache_key(URL)
+
+
+def cache_key_cached():
+    return IIIFImageClient.cache_key(URL)
+
+
+BENCHMARKS = {
+    "init_from_url (no cache)": init_from_url_uncached,
+    "init_from_url (cached)": init_from_url_cached,
+    "str (cached)": render_cached,
+    "str (no cache)": render_uncached,
+    "get_copy": get_copy,
+    "fluent chain": fluent_chain,
+    "ImageRegion.parse": parse_region,
+    "ImageSize.parse": parse_size,
+    "ImageRotation.parse": parse_rotation,
+    "canonicalize": canonicalize,
+    "cache_key (no cache)": cache_key_uncached,
+    "cache_key (cached)": cache_key_cached,
+}
+
+
+def measure(func, number=10000, repeat=5):
+    """Return operations per second (best of repeat runs), peak bytes
+    allocated during a single call, and blocks retained per call."""
+    best = min(timeit.repeat(func, repeat=repeat, number=number))
+    ops_per_sec = number / best
+
+    calls = 100
+    tracemalloc.start()
+    try:
+        func()  # warm up any caches
+        peak = 0
+        start_blocks = sum(
+            stat.count for stat in tracemalloc.take_snapshot().statistics("filename")
+        )
+        for _i in range(calls):
+            tracemalloc.reset_peak()
+            current, _peak = tracemalloc.get_traced_memory()
+            func()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        end_blocks = sum(
+            stat.count for stat in tracemalloc.take_snapshot().statistics("filename")
+        )
+    finally:
+        tracemalloc.stop()
+    return ops_per_sec, peak, (end_blocks - start_blocks) / calls
+
+
+def run(benchmarks, number=10000, repeat=5):
+    print(f"{'':<28} {'ops/sec':>12} {'us/op':>8} {'peak B/op':>10} {'blocks/op':>10}")
+    for label, func in benchmarks.items():
+        ops_per_sec, peak, blocks = measure(func, number=number, repeat=repeat)
+        print(
+            f"{label:<28} {ops_per_sec:12,.0f} {1e6 / ops_per_sec:8.2f} "
+            f"{peak:10,d} {blocks:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    assert str(init_from_url_uncached()) == URL
+    assert render_uncached() == URL
+    assert str(canonicalize()) == (
+        f"{API_ENDPOINT}/img000001/500,0,3000,3000/300,225/0/default.jpg"
+    )
+    name_filter = sys.argv[1] if len(sys.argv) > 1 else ""
+    run({label: func for label, func in BENCHMARKS.items() if name_filter in label})
@@ -0,0 +1,126 @@
+"""Benchmarks for :mod:`piffle.image` bulk url generation, and comparisons
+of url client hot paths with previous implementations. Single-call hot
+paths are measured by :mod:`bench_hotpaths`; the comparisons here use
+the same functions and measurements.
+
+Runs offline; no image server is needed. Run from the repository root with::
+
+    python benchmarks/bench_image.py
+"""
+
+import timeit
+from urllib.parse import urlparse
+
+import bench_hotpaths
+
+from piffle.image import IIIFImageClient
+
+API_ENDPOINT = "http://imgserver.co/iiif"
+IMAGE_IDS = [f"img{i:06d}" for i in range(10000)]
+OPTIONS = {"region": "full", "size": "!200,200", "rotation": "0", "fmt": "png"}
+
+
+def per_object_urls():
+    return [
+        str(
+            IIIFImageClient(API_ENDPOINT, image_id)
+            .size(width=200, height=200, exact=True)
+            .format("png")
+        )
+        for image_id in IMAGE_IDS
+    ]
+
+
+def bulk_urls():
+    return list(IIIFImageClient.render_urls(API_ENDPOINT, IMAGE_IDS, **OPTIONS))
+
+
+# large image with deep tile pyramid: ~90,000 tiles
+TILED = IIIFImageClient(API_ENDPOINT, IMAGE_IDS[0])
+TILED.image_info = {
+    "width": 80000,
+    "height": 60000,
+    "tiles": [{"width": 256, "scaleFactors": [1, 2, 4, 8, 16, 32, 64, 128, 256]}],
+}
+
+
+def tile_urls():
+    count = 0
+    for _url in TILED.tile_urls():
+        count += 1
+    return count
+
+
+BENCHMARKS = {
+    "per-object urls": per_object_urls,
+    "render_urls": bulk_urls,
+    "tile_urls": tile_urls,
+}
+
+
+def init_copy(img):
+    # previous get_copy implementation, for comparison: initialize a new
+    # client and validate every option again
+    clone = img.__class__(img.api_endpoint, img.image_id, **img.image_options)
+    clone.region.set_options(**img.region.as_dict())
+    clone.size.set_options(**img.size.as_dict())
+    clone.rotation.set_options(**img.rotation.as_dict())
+    return clone
+
+
+def fluent_chain_init_copy():
+    # bench_hotpaths.fluent_chain with the previous get_copy
+    img = init_copy(bench_hotpaths.CLIENT)
+    img.size.set_options(width=300)
+    img = init_copy(img)
+    img.rotation.set_options(degrees=90)
+    img = init_copy(img)
+    img.image_options["fmt"] = "png"
+    return img
+
+
+def urlparse_init_from_url(url):
+    # previous init_from_url implementation, for comparison: urlparse,
+    # then initialize a client that parses region, size and rotation
+    parsed_url = urlparse(url)
+    path_components = [path for path in parsed_url.path.split("/") if path]
+    quality, fmt = path_components.pop().split(".")
+    rotation = path_components.pop()
+    size = path_components.pop()
+    region = path_components.pop()
+    image_id = path_components.pop()
+    api_endpoint = "{}://{}/{}".format(
+        parsed_url.scheme, parsed_url.netloc, "/".join(path_components)
+    )
+    return IIIFImageClient(
+        api_endpoint, image_id, region, size, rotation, quality=quality, fmt=fmt
+    )
+
+
+def init_from_url_urlparse():
+    return urlparse_init_from_url(bench_hotpaths.URL)
+
+
+# previous implementations, each followed by the current hot path
+COMPARISONS = {
+    "fluent chain (init copy)": fluent_chain_init_copy,
+    "fluent chain": bench_hotpaths.fluent_chain,
+    "init_from_url (urlparse)": init_from_url_urlparse,
+    "init_from_url (no cache)": bench_hotpaths.init_from_url_uncached,
+}
+
+
+def run(benchmarks, repeat=5, number=10):
+    for label, func in benchmarks.items():
+        best = min(timeit.repeat(func, repeat=repeat, number=number)) / number
+        print(f"{label:<30} {best * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    assert per_object_urls() == bulk_urls()
+    assert str(fluent_chain_init_copy()) == str(bench_hotpaths.fluent_chain())
+    assert str(init_from_url_urlparse()) == bench_hotpaths.URL
+    print(f"{len(IMAGE_IDS)} image ids")
+    run(BENCHMARKS)
+    print()
+    bench_hotpaths.run(COMPARISONS)
@@ -0,0 +1,53 @@
+"""Benchmark import time for piffle modules. Each module is imported in a
+fresh interpreter (best of several runs), and the report lists whether
+heavy optional dependencies (requests, urllib3, addict) were loaded.
+
+Run from the repository root with::
+
+    python benchmarks/bench_import.py [modules...]
+"""
+
+import subprocess
+import sys
+
+MODULES = [
+    "piffle.image",
+    "piffle.iiif_dataclasses",
+    "piffle.load_iiif",
+    "piffle.presentation",
+]
+#: modules that should only be loaded when needed
+HEAVY = ["requests", "urllib3", "addict"]
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, *[name for name in {heavy!r} if name in sys.modules])
+"""
+
+
+def measure(module, repeat=5):
+    """Return best import time in seconds and heavy modules loaded"""
+    results = []
+    for _i in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(module=module, heavy=HEAVY)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        results.append((float(output[0]), output[1:]))
+    return min(results)
+
+
+def run(modules=MODULES):
+    print(f"{'':<28} {'time (ms)':>10}  loaded")
+    for module in modules:
+        best, loaded = measure(module)
+        print(f"{module:<28} {best * 1000:10.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or MODULES)
@@ -0,0 +1,82 @@
+"""Benchmarks for decoding manifest JSON with keys formatted by
+:func:`piffle.utils.format_manifest`, using synthetic manifests (see
+:mod:`synthetic`) with ``@context``, ``@id`` and ``@type`` keys as in
+published manifests. Compares each JSON backend (see
+:func:`piffle.utils.set_json_backend`) with formatting every object key
+by key while the standard library decodes it, as earlier versions did.
+The ``orjson`` backend is skipped when orjson is not installed.
+
+Manifests are decoded from bytes in memory, so results exclude file
+reads. Run from the repository root with::
+
+    python benchmarks/bench_json.py [canvas counts...]
+
+e.g. ``python benchmarks/bench_json.py 5000 50000``.
+"""
+
+import json
+import sys
+import time
+
+import synthetic
+
+from piffle import utils
+
+#: default canvas counts
+SIZES = [1000, 5000]
+#: annotations per canvas
+ANNOTATIONS = 5
+
+
+def best_time(func, repeat=5):
+    """Return best wall time in seconds"""
+    times = []
+    for _i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def decode_with(backend, content):
+    previous = utils.set_json_backend(backend)
+    try:
+        return utils.decode_manifest(content, "benchmark")
+    finally:
+        utils.set_json_backend(previous)
+
+
+def benchmarks(canvases):
+    """Return a dictionary of benchmark label and function for content
+    with the specified number of canvases"""
+    contents = {
+        "v2 manifest": json.dumps(synthetic.manifest2(canvases, ANNOTATIONS)),
+        "v3 manifest": json.dumps(synthetic.manifest3(canvases, ANNOTATIONS)),
+    }
+    backends = [
+        backend
+        for backend in utils.JSON_BACKENDS
+        if backend != "orjson" or utils._import_orjson() is not None
+    ]
+    results = {}
+    for label, text in contents.items():
+        content = text.encode()
+        results[f"key by key {label}"] = lambda content=content: json.loads(
+            content, object_hook=utils._format_keys
+        )
+        for backend in backends:
+            results[f"{backend} {label}"] = lambda backend=backend, content=content: (
+                decode_with(backend, content)
+            )
+    return results
+
+
+def run(sizes=SIZES):
+    print(f"{'':<32} {'canvases':>8} {'time (ms)':>10}")
+    for canvases in sizes:
+        for label, func in benchmarks(canvases).items():
+            print(f"{label:<32} {canvases:8d} {best_time(func) * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    run([int(size) for size in sys.argv[1:]] or SIZES)
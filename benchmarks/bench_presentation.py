@@ -0,0 +1,124 @@
+"""Benchmarks for loading IIIF presentation content at realistic scale,
+using synthetic manifests (see :mod:`synthetic`). Reports wall time
+(best of several runs) and peak memory allocated (measured with
+:mod:`tracemalloc` in a separate run) for
+:func:`piffle.load_iiif.load_iiif_presentation` (eager and lazy),
+:meth:`piffle.presentation.IIIFPresentation.from_file`, repeated loads
+through a :class:`piffle.cache.ManifestCache`,
+:func:`piffle.load_iiif.stream_iiif_presentation` (iterating over
+canvases without keeping them), and ``collect_annotations()`` on loaded
+manifests.
+
+Runs offline; manifests are written to a temporary directory. Run from
+the repository root with::
+
+    python benchmarks/bench_presentation.py [canvas counts...]
+
+e.g. ``python benchmarks/bench_presentation.py 5000 50000``.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import synthetic
+
+from piffle.cache import ManifestCache, set_manifest_cache
+from piffle.load_iiif import load_iiif_presentation, stream_iiif_presentation
+from piffle.presentation import IIIFPresentation
+
+#: default canvas counts
+SIZES = [100, 1000, 5000]
+#: annotations per canvas
+ANNOTATIONS = 2
+
+
+def measure(func, repeat=3):
+    """Return best wall time in seconds and peak bytes allocated"""
+    best = min(_timed(func) for _i in range(repeat))
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def cached_load(cache, path):
+    """Load a manifest with the specified cache enabled"""
+    previous = set_manifest_cache(cache)
+    try:
+        return load_iiif_presentation(path)
+    finally:
+        set_manifest_cache(previous)
+
+
+def benchmarks(tmpdir, canvases):
+    """Generate content with the specified number of canvases and return
+    a dictionary of benchmark label and function"""
+    paths = {}
+    for label, data in [
+        ("v2 manifest", synthetic.manifest2(canvases, ANNOTATIONS)),
+        ("v3 manifest", synthetic.manifest3(canvases, ANNOTATIONS)),
+        # collection of 10 manifests with the same total number of canvases
+        ("v2 collection", synthetic.collection2(10, canvases // 10, ANNOTATIONS)),
+        ("v3 collection", synthetic.collection3(10, canvases // 10, ANNOTATIONS)),
+    ]:
+        paths[label] = os.path.join(tmpdir, f"{label.replace(' ', '-')}.json")
+        synthetic.write_json(data, paths[label])
+
+    results = {}
+    for label, path in paths.items():
+        results[f"load_iiif_presentation {label}"] = lambda path=path: (
+            load_iiif_presentation(path)
+        )
+        results[f"IIIFPresentation.from_file {label}"] = lambda path=path: (
+            IIIFPresentation.from_file(path)
+        )
+        results[f"load_iiif_presentation lazy {label}"] = lambda path=path: (
+            load_iiif_presentation(path, lazy=True)
+        )
+    cache = ManifestCache(max_bytes=None)
+    for label in ["v2 manifest", "v3 manifest"]:
+        cached_load(cache, paths[label])
+        results[f"load_iiif_presentation cached {label}"] = lambda path=paths[label]: (
+            cached_load(cache, path)
+        )
+    for label in ["v2 manifest", "v3 manifest"]:
+        results[f"stream_iiif_presentation {label}"] = lambda path=paths[label]: sum(
+            1 for _canvas in stream_iiif_presentation(path)
+        )
+    # v3 collection items are not initialized as manifests, so annotations
+    # cannot be collected from them
+    for label in ["v2 manifest", "v3 manifest", "v2 collection"]:
+        loaded = load_iiif_presentation(paths[label])
+        results[f"collect_annotations {label}"] = loaded.collect_annotations
+    return results
+
+
+def run(sizes=SIZES):
+    print(f"{'':<44} {'canvases':>8} {'time (ms)':>10} {'peak (MiB)':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for canvases in sizes:
+            for label, func in benchmarks(tmpdir, canvases).items():
+                best, peak = measure(func)
+                print(
+                    f"{label:<44} {canvases:8d} {best * 1000:10.1f} "
+                    f"{peak / 2**20:10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    # dataclasses log warnings for missing fields; not relevant here
+    logging.disable(logging.WARNING)
+    run([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,61 @@
+"""Benchmarks for :mod:`piffle.vectorized` batch canonicalization,
+compared to canonicalizing one image client at a time. Requires numpy.
+
+Runs offline; no image server is needed. Run from the repository root with::
+
+    python benchmarks/bench_vectorized.py
+"""
+
+import numpy as np
+from bench_image import API_ENDPOINT, run
+
+from piffle import vectorized
+from piffle.image import IIIFImageClient
+
+COUNT = 10000
+rng = np.random.default_rng(0)
+IMAGE_IDS = [f"img{i:06d}" for i in range(COUNT)]
+WIDTHS = rng.integers(1000, 20000, COUNT)
+HEIGHTS = rng.integers(1000, 20000, COUNT)
+X, Y = rng.uniform(0, 50, (2, COUNT)).round(2)
+W, H = rng.uniform(1, 50, (2, COUNT)).round(2)
+
+REGIONS = vectorized.regions(X, Y, W, H, percent=True)
+SIZES = vectorized.sizes(width=300, height=300, exact=True)
+REGION_STRINGS = vectorized.render_regions(REGIONS)
+INFO = [
+    {"width": width, "height": height}
+    for width, height in zip(WIDTHS.tolist(), HEIGHTS.tolist())
+]
+
+
+def scalar_canonical_urls():
+    urls = []
+    for image_id, region, info in zip(IMAGE_IDS, REGION_STRINGS, INFO):
+        img = IIIFImageClient(API_ENDPOINT, image_id, region=region, size="!300,300")
+        img.image_info = info
+        urls.append(str(img.canonicalize()))
+    return urls
+
+
+def vectorized_canonical_urls():
+    return list(
+        vectorized.render_urls(
+            API_ENDPOINT,
+            IMAGE_IDS,
+            vectorized.canonicalize_regions(REGIONS, WIDTHS, HEIGHTS),
+            vectorized.canonicalize_sizes(SIZES, WIDTHS, HEIGHTS),
+        )
+    )
+
+
+BENCHMARKS = {
+    "canonicalize (scalar)": scalar_canonical_urls,
+    "canonicalize (vectorized)": vectorized_canonical_urls,
+}
+
+
+if __name__ == "__main__":
+    assert scalar_canonical_urls() == vectorized_canonical_urls()
+    print(f"{COUNT} crops")
+    run(BENCHMARKS, repeat=3, number=3)
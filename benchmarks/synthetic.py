@@ -0,0 +1,244 @@
+"""Deterministic generator of synthetic IIIF Presentation 2 and 3
+manifests, collections and annotation lists/pages, for benchmarking
+with realistic structure at any scale. Generated content is plain JSON
+data (dictionaries and lists); the same parameters always produce the
+same content.
+
+Example use::
+
+    from synthetic import manifest3, write_json
+
+    write_json(manifest3(canvases=5000, annotations=2), "manifest.json")
+"""
+
+import json
+
+BASE_URL = "https://example.org/iiif"
+IMAGE_URL = "https://images.example.org/iiif"
+
+
+def _dimensions(index):
+    # varied but deterministic image dimensions
+    return 1000 + (index * 37) % 1000, 1400 + (index * 53) % 1000
+
+
+def _metadata(index):
+    return [
+        {"label": "Page", "value": str(index + 1)},
+        {"label": "Source", "value": f"Synthetic item {index}"},
+    ]
+
+
+def annotation_list2(canvas_id, annotations, list_id):
+    """IIIF Presentation 2 annotation list with commenting annotations
+    targeting regions of a canvas"""
+    return {
+        "@context": "http://iiif.io/api/presentation/2/context.json",
+        "@id": list_id,
+        "@type": "sc:AnnotationList",
+        "resources": [
+            {
+                "@id": f"{list_id}/anno{i}",
+                "@type": "oa:Annotation",
+                "motivation": "oa:commenting",
+                "resource": {
+                    "@type": "dctypes:Text",
+                    "format": "text/plain",
+                    "chars": f"Annotation {i}",
+                },
+                "on": f"{canvas_id}#xywh={i * 10},{i * 20},100,50",
+            }
+            for i in range(annotations)
+        ],
+    }
+
+
+def canvas2(index, manifest_id, annotations=0):
+    """IIIF Presentation 2 canvas with an image and optional annotations"""
+    width, height = _dimensions(index)
+    canvas_id = f"{manifest_id}/canvas/c{index}"
+    image_id = f"{IMAGE_URL}/{manifest_id.rpartition('/')[2]}-{index:06d}"
+    canvas = {
+        "@id": canvas_id,
+        "@type": "sc:Canvas",
+        "label": f"Page {index + 1}",
+        "width": width,
+        "height": height,
+        "metadata": _metadata(index),
+        "images": [
+            {
+                "@id": f"{manifest_id}/annotation/p{index}",
+                "@type": "oa:Annotation",
+                "motivation": "sc:painting",
+                "on": canvas_id,
+                "resource": {
+                    "@id": f"{image_id}/full/full/0/default.jpg",
+                    "@type": "dctypes:Image",
+                    "format": "image/jpeg",
+                    "width": width,
+                    "height": height,
+                    "service": {
+                        "@context": "http://iiif.io/api/image/2/context.json",
+                        "@id": image_id,
+                        "profile": "http://iiif.io/api/image/2/level2.json",
+                    },
+                },
+            }
+        ],
+        "thumbnail": {"@id": f"{image_id}/full/200,/0/default.jpg"},
+    }
+    if annotations:
+        canvas["otherContent"] = [
+            annotation_list2(canvas_id, annotations, f"{manifest_id}/list/l{index}")
+        ]
+    return canvas
+
+
+def manifest2(canvases=100, annotations=0, name="m0"):
+    """IIIF Presentation 2 manifest with one sequence of canvases, each
+    with an image and the specified number of annotations"""
+    manifest_id = f"{BASE_URL}/{name}"
+    return {
+        "@context": "http://iiif.io/api/presentation/2/context.json",
+        "@id": f"{manifest_id}/manifest.json",
+        "@type": "sc:Manifest",
+        "label": f"Synthetic manifest {name}",
+        "attribution": "Synthetic content for benchmarks",
+        "metadata": _metadata(0),
+        "sequences": [
+            {
+                "@id": f"{manifest_id}/sequence/s0",
+                "@type": "sc:Sequence",
+                "label": "Default order",
+                "canvases": [
+                    canvas2(i, manifest_id, annotations) for i in range(canvases)
+                ],
+            }
+        ],
+    }
+
+
+def collection2(manifests=10, canvases=10, annotations=0):
+    """IIIF Presentation 2 collection with embedded manifests"""
+    return {
+        "@context": "http://iiif.io/api/presentation/2/context.json",
+        "@id": f"{BASE_URL}/collection.json",
+        "@type": "sc:Collection",
+        "label": "Synthetic collection",
+        "manifests": [
+            manifest2(canvases, annotations, name=f"m{i}") for i in range(manifests)
+        ],
+    }
+
+
+def annotation_page3(canvas_id, annotations, page_id):
+    """IIIF Presentation 3 annotation page with commenting annotations
+    targeting regions of a canvas"""
+    return {
+        "@context": "http://iiif.io/api/presentation/3/context.json",
+        "id": page_id,
+        "type": "AnnotationPage",
+        "items": [
+            {
+                "@context": "http://iiif.io/api/presentation/3/context.json",
+                "id": f"{page_id}/anno{i}",
+                "type": "Annotation",
+                "motivation": "commenting",
+                "body": {
+                    "type": "TextualBody",
+                    "language": "en",
+                    "format": "text/plain",
+                    "value": f"Annotation {i}",
+                },
+                "target": f"{canvas_id}#xywh={i * 10},{i * 20},100,50",
+            }
+            for i in range(annotations)
+        ],
+    }
+
+
+def canvas3(index, manifest_id, annotations=0):
+    """IIIF Presentation 3 canvas with an image and optional annotations"""
+    width, height = _dimensions(index)
+    canvas_id = f"{manifest_id}/canvas/c{index}"
+    image_id = f"{IMAGE_URL}/{manifest_id.rpartition('/')[2]}-{index:06d}"
+    canvas = {
+        "@context": "http://iiif.io/api/presentation/3/context.json",
+        "id": canvas_id,
+        "type": "Canvas",
+        "label": {"en": [f"Page {index + 1}"]},
+        "width": width,
+        "height": height,
+        "items": [
+            {
+                "@context": "http://iiif.io/api/presentation/3/context.json",
+                "id": f"{manifest_id}/page/p{index}",
+                "type": "AnnotationPage",
+                "items": [
+                    {
+                        "@context": "http://iiif.io/api/presentation/3/context.json",
+                        "id": f"{manifest_id}/annotation/p{index}",
+                        "type": "Annotation",
+                        "motivation": "painting",
+                        "target": canvas_id,
+                        "body": {
+                            "id": f"{image_id}/full/max/0/default.jpg",
+                            "type": "Image",
+                            "format": "image/jpeg",
+                            "width": width,
+                            "height": height,
+                            "service": [
+                                {
+                                    "id": image_id,
+                                    "type": "ImageService3",
+                                    "profile": "level2",
+                                }
+                            ],
+                        },
+                    }
+                ],
+            }
+        ],
+    }
+    if annotations:
+        canvas["annotations"] = [
+            annotation_page3(canvas_id, annotations, f"{manifest_id}/page/a{index}")
+        ]
+    return canvas
+
+
+def manifest3(canvases=100, annotations=0, name="m0"):
+    """IIIF Presentation 3 manifest of canvases, each with an image and
+    the specified number of annotations"""
+    manifest_id = f"{BASE_URL}/{name}"
+    return {
+        "@context": "http://iiif.io/api/presentation/3/context.json",
+        "id": f"{manifest_id}/manifest.json",
+        "type": "Manifest",
+        "label": {"en": [f"Synthetic manifest {name}"]},
+        "summary": {"en": ["Synthetic content for benchmarks"]},
+        "metadata": [
+            {"label": {"en": [entry["label"]]}, "value": {"en": [entry["value"]]}}
+            for entry in _metadata(0)
+        ],
+        "items": [canvas3(i, manifest_id, annotations) for i in range(canvases)],
+    }
+
+
+def collection3(manifests=10, canvases=10, annotations=0):
+    """IIIF Presentation 3 collection with embedded manifests"""
+    return {
+        "@context": "http://iiif.io/api/presentation/3/context.json",
+        "id": f"{BASE_URL}/collection.json",
+        "type": "Collection",
+        "label": {"en": ["Synthetic collection"]},
+        "items": [
+            manifest3(canvases, annotations, name=f"m{i}") for i in range(manifests)
+        ],
+    }
+
+
+def write_json(data, path):
+    """Write generated content to a JSON file"""
+    with open(path, "w") as outfile:
+        json.dump(data, outfile)
@@ -0,0 +1,230 @@
+"""asyncio interface for retrieving IIIF image information and loading
+IIIF presentation and image content.
+
+Requests are made on the event loop with the shared, pooled
+:class:`~piffle.transport.AsyncHTTPTransport` (install with
+``pip install piffle[httpx]``), so many can be in progress without a
+thread each. Content is decoded and parsed into the same
+:mod:`piffle.iiif_dataclasses` objects as the synchronous loaders, in a
+worker thread so that large manifests do not block the event loop. Use
+:func:`gather_bounded` to run many requests concurrently with a limit on
+the number in flight::
+
+    manifests = await gather_bounded(load_iiif_presentation, manifest_urls, limit=8)
+
+Image information and loaded content are cached as for the synchronous
+loaders (:attr:`~piffle.image.IIIFImageClient.info_cache`,
+:class:`~piffle.cache.ManifestCache`), and concurrent requests for the
+same content, synchronous or asynchronous, are combined.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Future
+from http import HTTPStatus
+from typing import Any
+
+from piffle import image, instrumentation, load_iiif
+from piffle.cache import get_manifest_cache
+from piffle.transport import get_async_transport
+from piffle.utils import decode_manifest, decode_response
+
+
+async def fetch_image_info(img):
+    """Retrieve image information for an
+    :class:`~piffle.image.IIIFImageClient`. Uses previously retrieved,
+    registered, or cached information when available, as
+    :attr:`~piffle.image.IIIFImageClient.image_info` does; otherwise
+    requests it from the image server and adds it to the shared
+    :attr:`~piffle.image.IIIFImageClient.info_cache`. The retrieved
+    information is set as the client's `image_info`.
+
+    Parameters
+    ----------
+    img : IIIFImageClient
+        The image client.
+
+    Returns
+    -------
+    dict
+        The image information.
+
+    Raises
+    ------
+    httpx.HTTPStatusError
+        If the request is not successful.
+    """
+    info = img.known_image_info()
+    if info is None:
+        info = await _request_image_info(img)
+    img.image_info = info
+    return info
+
+
+async def _request_image_info(img):
+    # as IIIFImageClient.request_image_info, sharing its pending requests
+    # so that concurrent requests for the same image are combined
+    info_url = img.info()
+    with image._pending_info_lock:
+        pending = image._pending_info.get(info_url)
+        if pending is None:
+            pending = image._pending_info[info_url] = Future()
+            requester = True
+        else:
+            requester = False
+    if not requester:
+        return await asyncio.wrap_future(pending)
+
+    try:
+        resp = await get_async_transport().get(info_url)
+        if resp.status_code == HTTPStatus.OK:
+            if instrumentation.collectors:
+                with instrumentation.timed("json.decode", source=info_url):
+                    info = resp.json()
+            else:
+                info = resp.json()
+            img._cache_image_info(info)
+        else:
+            info = None
+            resp.raise_for_status()
+    except BaseException as err:
+        pending.set_exception(err)
+        raise
+    else:
+        pending.set_result(info)
+        return info
+    finally:
+        with image._pending_info_lock:
+            del image._pending_info[info_url]
+
+
+async def load_iiif_presentation(
+    id: str,
+    presentation_version: int | float | str = "infer",
+    lazy: bool = False,
+    validation: str | None = None,
+):
+    """Load a IIIF presentation manifest; asyncio version of
+    :func:`piffle.load_iiif.load_iiif_presentation`.
+
+    Parameters
+    ----------
+    id : str
+        The uri or filepath of the IIIF presentation.
+    presentation_version : int | float | str
+        The version of the IIIF presentation (2 or 3). Default is "infer" so will automatically try to detect the version.
+    lazy : bool
+        Initialize nested lists of objects on first access. Default is
+        False.
+    validation : str | None
+        How missing fields are reported: "log", "report", or "off".
+        Default is None, to use the current
+        :func:`~piffle.iiif_dataclasses.dataclass_utils.validation` mode.
+
+    Returns
+    -------
+    IIIFBase
+        The loaded IIIF presentation object.
+    """
+
+    def parse(content, source):
+        return load_iiif.parse_iiif_presentation(
+            decode_manifest(content, source), presentation_version, lazy, validation
+        )
+
+    return await _load(
+        id, parse, ("presentation", presentation_version, lazy, validation)
+    )
+
+
+async def load_iiif_image(
+    id: str, image_version: int | float | str, validation: str | None = None
+):
+    """Load a IIIF image; asyncio version of
+    :func:`piffle.load_iiif.load_iiif_image`.
+
+    Parameters
+    ----------
+    id : str
+        The uri or filepath of the IIIF image.
+    image_version : int | float | str
+        The version of the IIIF image (2 or 3).
+    validation : str | None
+        How missing fields are reported: "log", "report", or "off".
+        Default is None, to use the current
+        :func:`~piffle.iiif_dataclasses.dataclass_utils.validation` mode.
+
+    Returns
+    -------
+    IIIFBase
+        The loaded IIIF image object.
+    """
+
+    def parse(content, source):
+        return load_iiif.parse_iiif_image(
+            decode_manifest(content, source), image_version, validation
+        )
+
+    return await _load(id, parse, ("image", image_version, validation))
+
+
+async def _load(id, parse, key):
+    # load content from a filepath, or from a uri if no file exists,
+    # using the shared manifest cache if enabled
+    cache = get_manifest_cache()
+    if cache is not None:
+        return await cache.aload(id, parse, key=key)
+    try:
+        return await asyncio.to_thread(_load_file, id, parse)
+    except FileNotFoundError:
+        pass
+    response = await get_async_transport().get(id)
+    return await asyncio.to_thread(decode_response, id, response, parse)
+
+
+def _load_file(path, parse):
+    with open(path, "rb") as manifest:
+        return parse(manifest.read(), path)
+
+
+async def gather_bounded(
+    func: Callable[..., Awaitable[Any]],
+    items: Iterable[Any],
+    *args,
+    limit: int = 10,
+    return_exceptions: bool = False,
+    **kwargs,
+):
+    """Call an async function for every item concurrently, with at most
+    `limit` calls in progress at once.
+
+    Parameters
+    ----------
+    func : Callable
+        The async function to call, e.g. :func:`load_iiif_presentation`.
+        Called with each item followed by any additional arguments.
+    items : Iterable
+        The items to process, e.g. manifest uris.
+    limit : int
+        The maximum number of concurrent calls. Default is 10; for
+        requests, this should not be more than the transport's
+        `max_connections`.
+    return_exceptions : bool
+        Return exceptions in the results instead of raising the first one.
+
+    Returns
+    -------
+    list
+        The results, in the same order as the items.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def call(item):
+        async with semaphore:
+            return await func(item, *args, **kwargs)
+
+    return await asyncio.gather(
+        *(call(item) for item in items), return_exceptions=return_exceptions
+    )
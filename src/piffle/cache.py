@@ -0,0 +1,361 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from http import HTTPStatus
+
+from piffle import instrumentation
+
+
+class LRUCache:
+    """Simple thread-safe least-recently-used cache, with hit and miss
+    counters to help with sizing.
+
+    :param maxsize: maximum number of entries to keep; when the cache is
+        full, the least recently used entry is discarded. Use None for
+        an unbounded cache.
+    :param ttl: optional time to live in seconds; entries older than this
+        are treated as missing. Use None for entries that do not expire.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for a key, or default if not cached."""
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Add or replace the cached value for a key."""
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key from the cache, if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset hit and miss counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        try:
+            _value, expires = self._data[key]
+        except KeyError:
+            return False
+        return expires is None or expires > time.monotonic()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__} {len(self)}/{self.maxsize} entries, "
+            f"{self.hits} hits, {self.misses} misses>"
+        )
+
+
+# cached value, approximate size in bytes, and how to check that it is
+# current: file modification time and size for local files, or ETag and
+# expiration time (monotonic) for remote content
+_ManifestEntry = namedtuple(
+    "_ManifestEntry", ["value", "size", "file_version", "etag", "expires"]
+)
+
+
+class ManifestCache:
+    """Thread-safe least-recently-used cache of loaded IIIF content
+    (presentation manifests, collections, image information), for
+    applications that load the same content many times. Not used unless
+    enabled with :func:`set_manifest_cache`; when enabled,
+    :func:`~piffle.load_iiif.load_iiif_presentation`,
+    :func:`~piffle.load_iiif.load_iiif_image`, and
+    :meth:`~piffle.presentation.IIIFPresentation.from_file_or_url` return
+    cached objects while they are current::
+
+        set_manifest_cache(ManifestCache(maxsize=500, max_bytes=512 * 2**20))
+
+    Cached objects are shared between callers, and should not be modified.
+
+    Local files are reloaded when their modification time or size
+    changes. Remote content is reused without a request for ``ttl``
+    seconds; after that, if the server provided an ETag, a conditional
+    request is made and the cached object is reused if the content has
+    not changed. Concurrent loads of the same content are combined.
+
+    :param maxsize: maximum number of entries to keep; when the cache is
+        full, the least recently used entry is discarded. Use None for
+        no limit.
+    :param max_bytes: approximate maximum size of cached content in
+        bytes, measured as the size of the JSON content; loaded objects
+        typically use several times more memory. Use None for no limit.
+    :param ttl: time in seconds to reuse remote content before checking
+        whether it has changed
+    """
+
+    def __init__(self, maxsize=128, max_bytes=256 * 2**20, ttl=300):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        #: total size of cached content in bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def load(self, id, parse, key=None, fetch=None):
+        """Return content loaded from a filepath, or from a url if no file
+        exists, using a cached value if it is current.
+
+        :param id: filepath or url
+        :param parse: function to initialize the cached value, called with
+            the content (bytes) and id
+        :param key: optional key to distinguish values parsed differently
+            from the same content
+        :param fetch: optional function to retrieve a url, called with the
+            url and a dictionary of headers for a conditional request
+            (which it may ignore), and returning a response; by default,
+            the shared :class:`~piffle.transport.HTTPTransport` is used
+        :raises: :class:`~piffle.utils.IIIFException` if the url cannot
+            be retrieved, or any error raised by parse; errors are not
+            cached
+        """
+        cache_key, file_version, entry, pending, loader = self._lookup(id, key)
+        if pending is None:
+            return entry.value
+        if not loader:
+            return pending.result()
+
+        try:
+            if file_version:
+                entry = self._load_file(id, parse, file_version)
+            else:
+                response = (fetch or _fetch)(id, self._conditional_headers(entry))
+                entry = self._url_entry(id, parse, entry, response)
+        except BaseException as err:
+            self._finish(cache_key, pending, error=err)
+            raise
+        self._finish(cache_key, pending, entry)
+        return entry.value
+
+    async def aload(self, id, parse, key=None, fetch=None):
+        """Asynchronous version of :meth:`load`, used by :mod:`piffle.aio`.
+        Loads are combined with concurrent loads of the same content,
+        synchronous or asynchronous. Files are read and content is parsed
+        in a worker thread, so that neither blocks the event loop.
+
+        :param id: filepath or url
+        :param parse: function to initialize the cached value, called with
+            the content (bytes) and id
+        :param key: optional key to distinguish values parsed differently
+            from the same content
+        :param fetch: optional async function to retrieve a url, called
+            as for :meth:`load`; by default, the shared
+            :class:`~piffle.transport.AsyncHTTPTransport` is used
+        """
+        import asyncio
+
+        cache_key, file_version, entry, pending, loader = self._lookup(id, key)
+        if pending is None:
+            return entry.value
+        if not loader:
+            return await asyncio.wrap_future(pending)
+
+        try:
+            if file_version:
+                entry = await asyncio.to_thread(
+                    self._load_file, id, parse, file_version
+                )
+            else:
+                response = await (fetch or _afetch)(
+                    id, self._conditional_headers(entry)
+                )
+                entry = await asyncio.to_thread(
+                    self._url_entry, id, parse, entry, response
+                )
+        except BaseException as err:
+            self._finish(cache_key, pending, error=err)
+            raise
+        self._finish(cache_key, pending, entry)
+        return entry.value
+
+    def _lookup(self, id, key):
+        # returns the cache key, the file version (None for urls), and
+        # the cached entry if any; then, unless the entry is current, a
+        # future for the value and whether the caller should load it
+        from concurrent.futures import Future
+
+        cache_key = (id, key)
+        try:
+            stat = os.stat(id)
+        except (OSError, ValueError):
+            stat = None
+        file_version = (stat.st_mtime_ns, stat.st_size) if stat else None
+
+        with self._lock:
+            entry = self._data.get(cache_key)
+            if entry is not None and (
+                entry.file_version == file_version
+                if stat
+                else entry.file_version is None and entry.expires > time.monotonic()
+            ):
+                self._data.move_to_end(cache_key)
+                self.hits += 1
+                self._record("manifest_cache.hit")
+                return cache_key, file_version, entry, None, False
+            pending = self._pending.get(cache_key)
+            if pending is None:
+                pending = self._pending[cache_key] = Future()
+                return cache_key, file_version, entry, pending, True
+            return cache_key, file_version, entry, pending, False
+
+    def _finish(self, cache_key, pending, entry=None, error=None):
+        # store a loaded entry, and pass the result to concurrent loads
+        if error is not None:
+            pending.set_exception(error)
+        else:
+            pending.set_result(entry.value)
+        with self._lock:
+            del self._pending[cache_key]
+            if error is None:
+                self._store(cache_key, entry)
+
+    def _load_file(self, path, parse, file_version):
+        with self._lock:
+            self.misses += 1
+        self._record("manifest_cache.miss", source="file")
+        with open(path, "rb") as manifest:
+            content = manifest.read()
+        return _ManifestEntry(parse(content, path), len(content), file_version, None, 0)
+
+    @staticmethod
+    def _conditional_headers(entry):
+        if entry is not None and entry.etag is not None:
+            return {"If-None-Match": entry.etag}
+        return {}
+
+    def _url_entry(self, url, parse, entry, response):
+        from piffle.utils import decode_response
+
+        expires = time.monotonic() + self.ttl
+        if entry is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+            with self._lock:
+                self.hits += 1
+            self._record("manifest_cache.hit", source="revalidated")
+            return entry._replace(expires=expires)
+        with self._lock:
+            self.misses += 1
+        self._record("manifest_cache.miss", source="url")
+        value = decode_response(url, response, parse)
+        return _ManifestEntry(
+            value, len(response.content), None, response.headers.get("ETag"), expires
+        )
+
+    def _store(self, cache_key, entry):
+        # add an entry and discard least recently used entries to stay
+        # within limits; called with the lock held
+        previous = self._data.pop(cache_key, None)
+        if previous is not None:
+            self.size -= previous.size
+        if self.max_bytes is not None and entry.size > self.max_bytes:
+            return
+        self._data[cache_key] = entry
+        self.size += entry.size
+        while self._data and (
+            (self.maxsize is not None and len(self._data) > self.maxsize)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            _key, discarded = self._data.popitem(last=False)
+            self.size -= discarded.size
+
+    @staticmethod
+    def _record(event, **tags):
+        if instrumentation.collectors:
+            instrumentation.record(event, **tags)
+
+    def invalidate(self, id):
+        """Remove all cached values loaded from a filepath or url."""
+        with self._lock:
+            for cache_key in [key for key in self._data if key[0] == id]:
+                self.size -= self._data.pop(cache_key).size
+
+    def clear(self):
+        """Remove all entries and reset hit and miss counters."""
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__} {len(self)}/{self.maxsize} entries, "
+            f"{self.size}/{self.max_bytes} bytes, "
+            f"{self.hits} hits, {self.misses} misses>"
+        )
+
+
+def _fetch(url, headers):
+    from piffle.transport import get_transport
+
+    if headers:
+        return get_transport().get(url, headers=headers)
+    return get_transport().get(url)
+
+
+async def _afetch(url, headers):
+    from piffle.transport import get_async_transport
+
+    if headers:
+        return await get_async_transport().get(url, headers=headers)
+    return await get_async_transport().get(url)
+
+
+_manifest_cache = None
+
+
+def get_manifest_cache():
+    """Return the shared :class:`ManifestCache`, or None if caching of
+    loaded content is not enabled."""
+    return _manifest_cache
+
+
+def set_manifest_cache(cache):
+    """Set the shared :class:`ManifestCache` used when loading IIIF
+    content, or None to disable caching (the default). Returns the
+    previous cache, if any."""
+    global _manifest_cache
+    previous = _manifest_cache
+    _manifest_cache = cache
+    return previous
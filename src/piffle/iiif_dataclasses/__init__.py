@@ -1,46 +1,72 @@
 from __future__ import annotations
 
-from .presentation2 import (
-    Annotation2,
-    AnnotationList2,
-    Canvas2,
-    Collection2,
-    Manifest2,
-    Range2,
-    Sequence2,
-)
-from .presentation3 import (
-    AccompanyingCanvas3,
-    Annotation3,
-    AnnotationCollection3,
-    AnnotationPage3,
-    Canvas3,
-    Collection3,
-    GeoreferenceAnnotation3,
-    Manifest3,
-    PlaceholderCanvas3,
-    Range3,
-)
-
-MANIFEST3_CLASSES = {
-    "Collection": Collection3,
-    "Manifest": Manifest3,
-    "Canvas": Canvas3,
-    "PlaceholderCanvas": PlaceholderCanvas3,
-    "AccompanyingCanvas": AccompanyingCanvas3,
-    "AnnotationCollection": AnnotationCollection3,
-    "AnnotationPage": AnnotationPage3,
-    "Annotation": Annotation3,
-    "GeoreferenceAnnotation": GeoreferenceAnnotation3,
-    "Range": Range3,
+import importlib
+
+# dataclasses are imported from their submodules on first access, so
+# importing this package (or one version's classes) does not load the
+# other version's module
+_class_modules = {
+    "Annotation2": "presentation2",
+    "AnnotationList2": "presentation2",
+    "Canvas2": "presentation2",
+    "Collection2": "presentation2",
+    "Manifest2": "presentation2",
+    "Range2": "presentation2",
+    "Sequence2": "presentation2",
+    "AccompanyingCanvas3": "presentation3",
+    "Annotation3": "presentation3",
+    "AnnotationCollection3": "presentation3",
+    "AnnotationPage3": "presentation3",
+    "Canvas3": "presentation3",
+    "Collection3": "presentation3",
+    "GeoreferenceAnnotation3": "presentation3",
+    "Manifest3": "presentation3",
+    "PlaceholderCanvas3": "presentation3",
+    "Range3": "presentation3",
+}
+
+#: IIIF Presentation 3 ``type`` to dataclass name
+_manifest3_types = {
+    "Collection": "Collection3",
+    "Manifest": "Manifest3",
+    "Canvas": "Canvas3",
+    "PlaceholderCanvas": "PlaceholderCanvas3",
+    "AccompanyingCanvas": "AccompanyingCanvas3",
+    "AnnotationCollection": "AnnotationCollection3",
+    "AnnotationPage": "AnnotationPage3",
+    "Annotation": "Annotation3",
+    "GeoreferenceAnnotation": "GeoreferenceAnnotation3",
+    "Range": "Range3",
 }
 
-MANIFEST2_CLASSES = {
-    "sc:Collection": Collection2,
-    "sc:Manifest": Manifest2,
-    "sc:Sequence": Sequence2,
-    "sc:Range": Range2,
-    "sc:Canvas": Canvas2,
-    "sc:AnnotationList": AnnotationList2,
-    "sc:Annotation": Annotation2,
+#: IIIF Presentation 2 ``@type`` to dataclass name
+_manifest2_types = {
+    "sc:Collection": "Collection2",
+    "sc:Manifest": "Manifest2",
+    "sc:Sequence": "Sequence2",
+    "sc:Range": "Range2",
+    "sc:Canvas": "Canvas2",
+    "sc:AnnotationList": "AnnotationList2",
+    "sc:Annotation": "Annotation2",
 }
+
+__all__ = [*_class_modules, "MANIFEST2_CLASSES", "MANIFEST3_CLASSES"]
+
+
+def __getattr__(name):
+    if name in _class_modules:
+        module = importlib.import_module(f".{_class_modules[name]}", __name__)
+        value = getattr(module, name)
+    elif name == "MANIFEST3_CLASSES":
+        value = {key: __getattr__(cls) for key, cls in _manifest3_types.items()}
+    elif name == "MANIFEST2_CLASSES":
+        value = {key: __getattr__(cls) for key, cls in _manifest2_types.items()}
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # cache on the module so later lookups are plain attribute access
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
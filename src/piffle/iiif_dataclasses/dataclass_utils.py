@@ -1,18 +1,51 @@
 from __future__ import annotations
 
+import operator
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
 from typing import Any
 
+from piffle import instrumentation
+
+# whether nested lists of dataclasses are initialized lazily; see
+# lazy_parsing
+_lazy_parsing = ContextVar("lazy_parsing", default=False)
+
+#: validation modes; see :func:`validation`
+VALIDATION_MODES = ("log", "report", "off")
+
+# how missing fields are reported: None to log a warning for each, a
+# ValidationReport to collect them, or False to ignore them; see
+# validation
+_validation = ContextVar("validation", default=None)
+
 
 class GeoreferencingError(ValueError):
     pass
 
 
+def construct(dataclass: Any, item: dict):
+    """Initialize a dataclass from a dictionary; records construction
+    time when instrumentation is enabled."""
+    if not instrumentation.collectors:
+        return dataclass(**item)
+    start = time.perf_counter()
+    obj = dataclass(**item)
+    instrumentation.record(
+        "construct", time.perf_counter() - start, cls=dataclass.__name__
+    )
+    return obj
+
+
 def parse_item(item: Any, dataclass: Any, raise_error: bool = True):
     if item is None:
         return item
     elif not isinstance(item, dataclass):
         try:
-            return dataclass(**item)
+            return construct(dataclass, item)
         except GeoreferencingError:
             raise
         except TypeError:
@@ -21,3 +54,291 @@ def parse_item(item: Any, dataclass: Any, raise_error: bool = True):
             if raise_error:
                 raise ValueError(f"Item {item} is not an {dataclass}")
     return item
+
+
+@contextmanager
+def lazy_parsing(enabled: bool = True):
+    """
+    Context manager to initialize nested lists of dataclasses (e.g.
+    `items`, `structures`, `annotations`, `sequences`, `canvases`) lazily
+    for objects created within the block: lists hold the raw dictionaries
+    as a :class:`LazyList`, and each dataclass is initialized on first
+    access. Lists within lazily initialized items are also lazy.
+
+    Parameters
+    ----------
+    enabled : bool
+        Whether to enable lazy initialization. Default is True.
+    """
+    token = _lazy_parsing.set(enabled)
+    try:
+        yield
+    finally:
+        _lazy_parsing.reset(token)
+
+
+class ValidationReport:
+    """
+    Missing-field findings collected while initializing IIIF dataclasses,
+    with counts by class and field and sample ids of objects with each
+    missing field.
+
+    Parameters
+    ----------
+    samples : int
+        Maximum number of sample ids to keep for each class and field.
+        Default is 5.
+    """
+
+    def __init__(self, samples: int = 5):
+        self.max_samples = samples
+        #: number of objects missing each field, by (class, field)
+        self.counts = Counter()
+        #: sample ids of objects missing each field, by (class, field)
+        self.samples = {}
+
+    def add(self, cls: str, field: str, id: Any = None):
+        """Record that an object of the named class is missing a field"""
+        key = (cls, field)
+        self.counts[key] += 1
+        if id is not None:
+            samples = self.samples.setdefault(key, [])
+            if len(samples) < self.max_samples:
+                samples.append(id)
+
+    @property
+    def total(self) -> int:
+        """Total number of missing fields"""
+        return self.counts.total()
+
+    def as_dict(self) -> dict:
+        """Findings as a dictionary of class name to field name to count
+        and sample ids"""
+        findings = {}
+        for (cls, field), count in self.counts.items():
+            findings.setdefault(cls, {})[field] = {
+                "count": count,
+                "samples": list(self.samples.get((cls, field), [])),
+            }
+        return findings
+
+    def summary(self) -> str:
+        """One line summary of missing fields and their counts"""
+        return ", ".join(
+            f"{cls}.{field} ({count})"
+            for (cls, field), count in self.counts.most_common()
+        )
+
+    def log(self, logger: Any, source: str = "IIIF content"):
+        """Log a single warning summarizing the findings, if any, with
+        the report as the ``validation_report`` attribute of the log
+        record."""
+        if self.counts:
+            logger.warning(
+                "Missing fields in %s: %s",
+                source,
+                self.summary(),
+                extra={"validation_report": self},
+            )
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.total} missing fields>"
+
+
+@contextmanager
+def validation(mode: str = "report", report: ValidationReport | None = None):
+    """
+    Context manager to set how missing fields of dataclasses initialized
+    within the block are reported. Lists initialized lazily (see
+    :func:`lazy_parsing`) keep the mode in effect when they were created.
+
+    Parameters
+    ----------
+    mode : str
+        ``log`` to log a warning for each missing field (the default
+        outside this context manager), ``report`` to collect missing
+        fields in a :class:`ValidationReport` without logging, or ``off``
+        to skip checks.
+    report : ValidationReport | None
+        Report to collect missing fields in, for ``report`` mode; by
+        default a new report is created.
+
+    Yields
+    ------
+    ValidationReport | None
+        The report in ``report`` mode, otherwise None.
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(
+            f"Unknown validation mode {mode!r}; expected one of {VALIDATION_MODES}"
+        )
+    if mode == "report" and report is None:
+        report = ValidationReport()
+    token = _validation.set(
+        report if mode == "report" else None if mode == "log" else False
+    )
+    try:
+        yield report if mode == "report" else None
+    finally:
+        _validation.reset(token)
+
+
+def missing_field(logger: Any, cls: str, field: str, id: Any = None):
+    """
+    Report a missing field of a dataclass according to the current
+    :func:`validation` mode: log a warning with the specified logger,
+    add it to the active :class:`ValidationReport`, or ignore it.
+    """
+    state = _validation.get()
+    if state is None:
+        logger.warning(f"{cls} is missing '{field}' field.")
+    elif state is not False:
+        state.add(cls, field, id)
+
+
+def parse_items(items: list, parse: Any, **kwargs):
+    """
+    Parse a list of items with a parse function (e.g. :func:`parse_item`
+    and its keyword arguments). Returns a list, or a :class:`LazyList`
+    when :func:`lazy_parsing` is enabled.
+    """
+    if _lazy_parsing.get():
+        return LazyList(items, partial(parse, **kwargs) if kwargs else parse)
+    return [parse(item, **kwargs) for item in items]
+
+
+class LazyList(list):
+    """
+    List of items that are parsed on first access, e.g. dataclasses
+    initialized from dictionaries. Indexing and iteration parse only the
+    items accessed, and replace them in the list; any other operation
+    (comparison, search, copying, modification) parses all remaining
+    items first, after which the list behaves as a regular list. Without
+    a parse function (e.g. when rebuilt by :func:`dataclasses.asdict` or
+    :func:`copy.deepcopy`), items are used as they are.
+    """
+
+    __slots__ = ("_parse", "_parsed", "_validation")
+
+    def __init__(self, items: Any = (), parse: Any = None):
+        super().__init__(items)
+        self._parse = parse if len(self) else None
+        self._parsed = bytearray(len(self))
+        self._validation = _validation.get()
+
+    def _item(self, index: int):
+        if self._parse is not None and not self._parsed[index]:
+            # items parsed later are also parsed lazily, and validated
+            # as when the list was created
+            lazy_token = _lazy_parsing.set(True)
+            validation_token = _validation.set(self._validation)
+            try:
+                item = self._parse(list.__getitem__(self, index))
+            finally:
+                _validation.reset(validation_token)
+                _lazy_parsing.reset(lazy_token)
+            list.__setitem__(self, index, item)
+            self._parsed[index] = 1
+            return item
+        return list.__getitem__(self, index)
+
+    @property
+    def materialized(self) -> bool:
+        """Whether all items have been parsed"""
+        return self._parse is None or all(self._parsed)
+
+    def materialize(self):
+        """Parse all remaining items"""
+        if self._parse is not None:
+            for index in range(len(self)):
+                self._item(index)
+            self._parse = None
+
+    def __getitem__(self, index):
+        if self._parse is None:
+            return list.__getitem__(self, index)
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self)))]
+        index = operator.index(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        return self._item(index)
+
+    def __iter__(self):
+        if self._parse is None:
+            return list.__iter__(self)
+        return (self._item(index) for index in range(len(self)))
+
+    def __reversed__(self):
+        if self._parse is None:
+            return list.__reversed__(self)
+        return (self._item(index) for index in reversed(range(len(self))))
+
+    def __repr__(self):
+        self.materialize()
+        return list.__repr__(self)
+
+    def __radd__(self, other):
+        # called before the list.__add__ of the other operand, which
+        # would read unparsed items
+        if not isinstance(other, list):
+            return NotImplemented
+        self.materialize()
+        return list.__add__(other, self)
+
+    def __reduce_ex__(self, protocol):
+        # copy and pickle as a regular list of parsed items
+        self.materialize()
+        return (list, (list(self),))
+
+
+def _materializing(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        # list methods read the storage of other lists directly
+        for item in (self, *args):
+            if isinstance(item, LazyList):
+                item.materialize()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+# every other list method operates on parsed items
+for _name in [
+    "__contains__",
+    "__eq__",
+    "__ne__",
+    "__lt__",
+    "__le__",
+    "__gt__",
+    "__ge__",
+    "__add__",
+    "__mul__",
+    "__rmul__",
+    "__iadd__",
+    "__imul__",
+    "__setitem__",
+    "__delitem__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "copy",
+    "count",
+    "index",
+    "reverse",
+    "sort",
+]:
+    setattr(LazyList, _name, _materializing(_name))
+del _name
@@ -5,6 +5,8 @@ from dataclasses import dataclass, field
 from typing import Any
 
 from piffle.iiif_dataclasses.base import IIIF3, OtherMetadataDict
+from piffle.iiif_dataclasses.dataclass_utils import missing_field
+from piffle.image import IIIFImageClient
 from piffle.load_iiif import load_iiif_image
 
 log = logging.getLogger(__name__)
@@ -109,19 +111,19 @@ class Image3(IIIFImage3):
         **kwargs,
     ):
         if context is None:
-            log.warning("Image is missing 'context' field.")
+            missing_field(log, "Image", "context", id)
         if id is None:
-            log.warning("Image is missing 'id' field.")
+            missing_field(log, "Image", "id", id)
         if type is None:
-            log.warning("Image is missing 'type' field.")
+            missing_field(log, "Image", "type", id)
         if protocol is None:
-            log.warning("Image is missing 'protocol' field.")
+            missing_field(log, "Image", "protocol", id)
         if profile is None:
-            log.warning("Image is missing 'profile' field.")
+            missing_field(log, "Image", "profile", id)
         if width is None:
-            log.warning("Image is missing 'width' field.")
+            missing_field(log, "Image", "width", id)
         if height is None:
-            log.warning("Image is missing 'height' field.")
+            missing_field(log, "Image", "height", id)
 
         self.context = context
         self.id = id
@@ -146,3 +148,41 @@ class Image3(IIIFImage3):
         self.partOf = partOf
         self.service = service
         self.other_metadata = OtherMetadataDict(kwargs)
+
+    def tile_urls(
+        self,
+        scale_factors: list[int] | None = None,
+        quality: str = "default",
+        fmt: str = "jpg",
+    ):
+        """
+        Lazily generate urls for every tile of the image, from the image
+        dimensions and tiles information.
+
+        Parameters
+        ----------
+        scale_factors : list[int] | None
+            Scale factors (levels) to generate tiles for; by default, all
+            scale factors listed in `tiles`.
+        quality : str
+            The image quality. Default is "default".
+        fmt : str
+            The image format. Default is "jpg".
+
+        Returns
+        -------
+        Iterator[str]
+            The tile urls.
+        """
+        api_endpoint, _, image_id = self.id.rstrip("/").rpartition("/")
+        return IIIFImageClient.render_tile_urls(
+            api_endpoint,
+            image_id,
+            self.width,
+            self.height,
+            self.tiles or [],
+            scale_factors=scale_factors,
+            include_height=True,
+            quality=quality,
+            fmt=fmt,
+        )
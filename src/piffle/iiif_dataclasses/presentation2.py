@@ -5,7 +5,12 @@ from dataclasses import dataclass, field
 from typing import Any
 
 from piffle.iiif_dataclasses.base import IIIF2, OtherMetadataDict
-from piffle.iiif_dataclasses.dataclass_utils import parse_item
+from piffle.iiif_dataclasses.dataclass_utils import (
+    missing_field,
+    parse_item,
+    parse_items,
+)
+from piffle.image import IIIFImageClient, IIIFImageClientException
 from piffle.load_iiif import load_iiif_presentation
 
 log = logging.getLogger(__name__)
@@ -90,9 +95,9 @@ class Annotation2(IIIFPresentation2):
         **kwargs,
     ):
         if id is None:
-            log.warning("Annotation is missing 'id' field.")
+            missing_field(log, "Annotation", "id", id)
         if type is None:
-            log.warning("Annotation is missing 'type' field.")
+            missing_field(log, "Annotation", "type", id)
 
         self.context = context
         self.id = id
@@ -107,6 +112,25 @@ class Annotation2(IIIFPresentation2):
     def get_image_url(self):
         return self.resource["service"]["id"]
 
+    def get_image_client(self, width=None, height=None) -> IIIFImageClient:
+        """
+        Image client for the image service of the annotation resource,
+        with image information set from the dimensions and profile in the
+        resource, so that canonicalization does not request `info.json`.
+
+        Parameters
+        ----------
+        width : int | None
+            Image width to use if not in the resource (e.g. canvas width).
+        height : int | None
+            Image height to use if not in the resource.
+
+        Returns
+        -------
+        IIIFImageClient
+        """
+        return IIIFImageClient.init_from_resource(self.resource, width, height)
+
 
 @dataclass
 class AnnotationList2(IIIFPresentation2):
@@ -125,14 +149,14 @@ class AnnotationList2(IIIFPresentation2):
         **kwargs,
     ):
         if id is None:
-            log.warning("AnnotationList is missing 'id' field.")
+            missing_field(log, "AnnotationList", "id", id)
         if type is None:
-            log.warning("AnnotationList is missing 'type' field.")
+            missing_field(log, "AnnotationList", "type", id)
 
         self.context = context
         self.id = id
         self.type = type
-        self.resources = [parse_item(resource, Annotation2) for resource in resources]
+        self.resources = parse_items(resources, parse_item, dataclass=Annotation2)
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -161,17 +185,17 @@ class Canvas2(IIIFPresentation2):
         **kwargs,
     ):
         if id is None:
-            log.warning("Canvas is missing 'id' field.")
+            missing_field(log, "Canvas", "id", id)
         if type is None:
-            log.warning("Canvas is missing 'type' field.")
+            missing_field(log, "Canvas", "type", id)
 
         self.context = context
         self.id = id
         self.type = type
-        self.images = [parse_item(image, Annotation2) for image in images]
-        self.otherContent = [
-            parse_item(content, AnnotationList2) for content in otherContent
-        ]
+        self.images = parse_items(images, parse_item, dataclass=Annotation2)
+        self.otherContent = parse_items(
+            otherContent, parse_item, dataclass=AnnotationList2
+        )
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -186,6 +210,31 @@ class Canvas2(IIIFPresentation2):
                 log.warning(f"Failed to collect annotations from content: {e}")
         return annotations
 
+    def get_image_client(self) -> IIIFImageClient:
+        """
+        Image client for the first image on the canvas with an image
+        service; see :meth:`Annotation2.get_image_client`. Canvas
+        dimensions are used if the image resource has none.
+
+        Returns
+        -------
+        IIIFImageClient
+
+        Raises
+        ------
+        IIIFImageClientException
+            If no image on the canvas has an image service.
+        """
+        width, height = getattr(self, "width", None), getattr(self, "height", None)
+        for image in self.images:
+            if not isinstance(image, Annotation2):
+                continue
+            try:
+                return image.get_image_client(width, height)
+            except IIIFImageClientException:
+                continue
+        raise IIIFImageClientException("Canvas has no image with an image service")
+
 
 @dataclass
 class Range2(IIIFPresentation2):
@@ -206,17 +255,17 @@ class Range2(IIIFPresentation2):
         **kwargs,
     ):
         if context is None:
-            log.warning("Range is missing 'context' field.")
+            missing_field(log, "Range", "context", id)
         if id is None:
-            log.warning("Range is missing 'id' field.")
+            missing_field(log, "Range", "id", id)
         if type is None:
-            log.warning("Range is missing 'type' field.")
+            missing_field(log, "Range", "type", id)
 
         self.context = context
         self.id = id
         self.type = type
         self.ranges = ranges
-        self.canvases = [parse_item(canvas, Canvas2) for canvas in canvases]
+        self.canvases = parse_items(canvases, parse_item, dataclass=Canvas2)
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -243,14 +292,14 @@ class Sequence2(IIIFPresentation2):
         **kwargs,
     ):
         if id is None:
-            log.warning("Sequence is missing 'id' field.")
+            missing_field(log, "Sequence", "id", id)
         if type is None:
-            log.warning("Sequence is missing 'type' field.")
+            missing_field(log, "Sequence", "type", id)
 
         self.context = context
         self.id = id
         self.type = type
-        self.canvases = [parse_item(canvas, Canvas2) for canvas in canvases]
+        self.canvases = parse_items(canvases, parse_item, dataclass=Canvas2)
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -283,16 +332,16 @@ class Manifest2(IIIFPresentation2):
         **kwargs,
     ):
         if id is None:
-            log.warning("Manifest is missing 'id' field.")
+            missing_field(log, "Manifest", "id", id)
         if type is None:
-            log.warning("Manifest is missing 'type' field.")
+            missing_field(log, "Manifest", "type", id)
 
         self.context = context
         self.id = id
         self.type = type
         self.startCanvas = startCanvas
-        self.sequences = [parse_item(sequence, Sequence2) for sequence in sequences]
-        self.structures = [parse_item(structure, Range2) for structure in structures]
+        self.sequences = parse_items(sequences, parse_item, dataclass=Sequence2)
+        self.structures = parse_items(structures, parse_item, dataclass=Range2)
         self.metadata = metadata
         self.other_metadata = OtherMetadataDict(kwargs)
 
@@ -331,15 +380,15 @@ class Collection2(IIIFPresentation2):
         **kwargs,
     ):
         if id is None:
-            log.warning("Collection is missing 'id' field.")
+            missing_field(log, "Collection", "id", id)
         if type is None:
-            log.warning("Collection is missing 'type' field.")
+            missing_field(log, "Collection", "type", id)
 
         self.context = context
         self.id = id
         self.type = type
         self.collections = collections
-        self.manifests = [parse_item(manifest, Manifest2) for manifest in manifests]
+        self.manifests = parse_items(manifests, parse_item, dataclass=Manifest2)
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -5,7 +5,13 @@ from dataclasses import dataclass, field
 from typing import Any
 
 from piffle.iiif_dataclasses.base import IIIF3, OtherMetadataDict
-from piffle.iiif_dataclasses.dataclass_utils import GeoreferencingError, parse_item
+from piffle.iiif_dataclasses.dataclass_utils import (
+    GeoreferencingError,
+    missing_field,
+    parse_item,
+    parse_items,
+)
+from piffle.image import IIIFImageClient, IIIFImageClientException
 from piffle.load_iiif import load_iiif_presentation
 
 log = logging.getLogger(__name__)
@@ -107,13 +113,13 @@ class Annotation3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("Annotation is missing 'context' field.")
+            missing_field(log, "Annotation", "context", id)
         if id is None:
-            log.warning("Annotation is missing 'id' field.")
+            missing_field(log, "Annotation", "id", id)
         if type is None:
-            log.warning("Annotation is missing 'type' field.")
+            missing_field(log, "Annotation", "type", id)
         if target is None:
-            log.warning("Annotation is missing 'target' field.")
+            missing_field(log, "Annotation", "target", id)
 
         self.context = context
         self.id = id
@@ -131,8 +137,34 @@ class Annotation3(IIIFPresentation3):
         return [self]
 
     def get_image_url(self):
+        # painting annotations reference the image service on the body;
+        # georeference annotations on the target source
+        if isinstance(self.body, dict) and self.body.get("service"):
+            service = self.body["service"]
+            if isinstance(service, list):
+                service = service[0]
+            return service["id"]
         return self.target["source"]["id"]
 
+    def get_image_client(self, width=None, height=None) -> IIIFImageClient:
+        """
+        Image client for the image service of the annotation body, with
+        image information set from the dimensions and profile in the
+        body, so that canonicalization does not request `info.json`.
+
+        Parameters
+        ----------
+        width : int | None
+            Image width to use if not in the body (e.g. canvas width).
+        height : int | None
+            Image height to use if not in the body.
+
+        Returns
+        -------
+        IIIFImageClient
+        """
+        return IIIFImageClient.init_from_resource(self.body, width, height)
+
 
 @dataclass
 class GeoreferenceAnnotation3(Annotation3):
@@ -203,11 +235,11 @@ class AnnotationCollection3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("AnnotationCollection is missing 'context' field.")
+            missing_field(log, "AnnotationCollection", "context", id)
         if id is None:
-            log.warning("AnnotationCollection is missing 'id' field.")
+            missing_field(log, "AnnotationCollection", "id", id)
         if type is None:
-            log.warning("AnnotationCollection is missing 'type' field.")
+            missing_field(log, "AnnotationCollection", "type", id)
 
         self.context = context
         self.id = id
@@ -221,7 +253,7 @@ class AnnotationCollection3(IIIFPresentation3):
         self.service = service
         self.total = total
         self.thumbnail = thumbnail
-        self.items = [self.parse_annotation(item) for item in items]
+        self.items = parse_items(items, self.parse_annotation)
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -263,27 +295,25 @@ class AnnotationPage3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("AnnotationPage is missing 'context' field.")
+            missing_field(log, "AnnotationPage", "context", id)
         if id is None:
-            log.warning("AnnotationPage is missing 'id' field.")
+            missing_field(log, "AnnotationPage", "id", id)
         if type is None:
-            log.warning("AnnotationPage is missing 'type' field.")
+            missing_field(log, "AnnotationPage", "type", id)
         if items is None:
-            log.warning("AnnotationPage is missing 'items' field.")
+            missing_field(log, "AnnotationPage", "items", id)
 
         self.context = context
         self.id = id
         self.type = type
-        self.items = [
-            self.parse_annotation(item) for item in items
-        ]  # list of annotations, see Annotation class
+        # list of annotations, see Annotation class
+        self.items = parse_items(items, self.parse_annotation)
         self.label = label
         self.rendering = rendering
         self.service = service
         self.thumbnail = thumbnail
-        self.partOf = [
-            parse_item(part, AnnotationCollection3) for part in partOf
-        ]  # list of annotation collections, see AnnotationCollection class
+        # list of annotation collections, see AnnotationCollection class
+        self.partOf = parse_items(partOf, parse_item, dataclass=AnnotationCollection3)
         self.next = next
         self.prev = prev
         self.first = first
@@ -353,20 +383,19 @@ class PlaceholderCanvas3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("PlaceholderCanvas is missing 'context' field.")
+            missing_field(log, "PlaceholderCanvas", "context", id)
         if id is None:
-            log.warning("PlaceholderCanvas is missing 'id' field.")
+            missing_field(log, "PlaceholderCanvas", "id", id)
         if type is None:
-            log.warning("PlaceholderCanvas is missing 'type' field.")
+            missing_field(log, "PlaceholderCanvas", "type", id)
         if items is None:
-            log.warning("PlaceholderCanvas is missing 'items' field.")
+            missing_field(log, "PlaceholderCanvas", "items", id)
 
         self.context = context
         self.id = id
         self.type = type
-        self.items = [
-            parse_item(item, AnnotationPage3) for item in items
-        ]  # list of annotation pages, see AnnotationPage class
+        # list of annotation pages, see AnnotationPage class
+        self.items = parse_items(items, parse_item, dataclass=AnnotationPage3)
         self.label = label
         self.height = height
         self.width = width
@@ -385,10 +414,10 @@ class PlaceholderCanvas3(IIIFPresentation3):
         self.homepage = homepage
         self.behavior = behavior
         self.partOf = partOf
-        self.annotations = [
-            parse_item(annotation, AnnotationPage3, raise_error=False)
-            for annotation in annotations
-        ]  # more like supplementary info, don't use this one
+        # more like supplementary info, don't use this one
+        self.annotations = parse_items(
+            annotations, parse_item, dataclass=AnnotationPage3, raise_error=False
+        )
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -470,6 +499,33 @@ class Canvas3(PlaceholderCanvas3):
         self.placeholderCanvas = parse_item(placeholderCanvas, PlaceholderCanvas3)
         self.accompanyingCanvas = parse_item(accompanyingCanvas, AccompanyingCanvas3)
 
+    def get_image_client(self) -> IIIFImageClient:
+        """
+        Image client for the first painting annotation on the canvas with
+        an image service; see :meth:`Annotation3.get_image_client`. Canvas
+        dimensions are used if the annotation body has none.
+
+        Returns
+        -------
+        IIIFImageClient
+
+        Raises
+        ------
+        IIIFImageClientException
+            If no painting annotation has an image service.
+        """
+        for page in self.items:
+            for annotation in getattr(page, "items", []):
+                if not isinstance(annotation, Annotation3) or (
+                    annotation.motivation not in (None, "painting")
+                ):
+                    continue
+                try:
+                    return annotation.get_image_client(self.width, self.height)
+                except IIIFImageClientException:
+                    continue
+        raise IIIFImageClientException("Canvas has no image with an image service")
+
 
 @dataclass
 class Collection3(IIIFPresentation3):
@@ -526,13 +582,13 @@ class Collection3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("Collection is missing 'context' field.")
+            missing_field(log, "Collection", "context", id)
         if id is None:
-            log.warning("Collection is missing 'id' field.")
+            missing_field(log, "Collection", "id", id)
         if type is None:
-            log.warning("Collection is missing 'type' field.")
+            missing_field(log, "Collection", "type", id)
         if label is None:
-            log.warning("Collection is missing 'label' field.")
+            missing_field(log, "Collection", "label", id)
 
         self.context = context
         self.id = id
@@ -556,10 +612,9 @@ class Collection3(IIIFPresentation3):
         self.behavior = behavior
         self.partOf = partOf
         self.items = items
-        self.annotations = [
-            parse_item(annotation, AnnotationPage3, raise_error=False)
-            for annotation in annotations
-        ]
+        self.annotations = parse_items(
+            annotations, parse_item, dataclass=AnnotationPage3, raise_error=False
+        )
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -602,13 +657,13 @@ class Range3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("Range is missing 'context' field.")
+            missing_field(log, "Range", "context", id)
         if id is None:
-            log.warning("Range is missing 'id' field.")
+            missing_field(log, "Range", "id", id)
         if type is None:
-            log.warning("Range is missing 'type' field.")
+            missing_field(log, "Range", "type", id)
         if items is None:
-            log.warning("Range is missing 'items' field.")
+            missing_field(log, "Range", "items", id)
 
         self.context = context
         self.id = id
@@ -620,10 +675,9 @@ class Range3(IIIFPresentation3):
         self.service = service
         self.placeholderCanvas = parse_item(placeholderCanvas, PlaceholderCanvas3)
         self.accompanyingCanvas = parse_item(accompanyingCanvas, AccompanyingCanvas3)
-        self.annotations = [
-            parse_item(annotation, AnnotationPage3, raise_error=False)
-            for annotation in annotations
-        ]
+        self.annotations = parse_items(
+            annotations, parse_item, dataclass=AnnotationPage3, raise_error=False
+        )
         self.thumbnail = thumbnail
         self.other_metadata = OtherMetadataDict(kwargs)
 
@@ -689,13 +743,13 @@ class Manifest3(IIIFPresentation3):
         **kwargs,
     ):
         if context is None:
-            log.warning("Manifest is missing 'context' field.")
+            missing_field(log, "Manifest", "context", id)
         if id is None:
-            log.warning("Manifest is missing 'id' field.")
+            missing_field(log, "Manifest", "id", id)
         if type is None:
-            log.warning("Manifest is missing 'type' field.")
+            missing_field(log, "Manifest", "type", id)
         if label is None:
-            log.warning("Manifest is missing 'label' field.")
+            missing_field(log, "Manifest", "label", id)
 
         self.context = context
         self.id = id
@@ -720,14 +774,12 @@ class Manifest3(IIIFPresentation3):
         self.homepage = homepage
         self.behavior = behavior
         self.partOf = partOf
-        self.items = [
-            parse_item(item, Canvas3) for item in items
-        ]  # list of canvases, see Canvas class
-        self.structures = [parse_item(structure, Range3) for structure in structures]
-        self.annotations = [
-            parse_item(annotation, AnnotationPage3, raise_error=False)
-            for annotation in annotations
-        ]
+        # list of canvases, see Canvas class
+        self.items = parse_items(items, parse_item, dataclass=Canvas3)
+        self.structures = parse_items(structures, parse_item, dataclass=Range3)
+        self.annotations = parse_items(
+            annotations, parse_item, dataclass=AnnotationPage3, raise_error=False
+        )
         self.other_metadata = OtherMetadataDict(kwargs)
 
     def collect_annotations(self):
@@ -2,11 +2,18 @@
 
 
 # -*- coding: utf-8 -*-
-from collections import OrderedDict
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from functools import cached_property
+from http import HTTPStatus
 from urllib.parse import urlparse
 
-import requests
-from cached_property import cached_property
+from piffle import instrumentation
+from piffle.cache import LRUCache
+from piffle.transport import get_transport
+
+log = logging.getLogger(__name__)
 
 
 class IIIFImageClientException(Exception):
@@ -23,7 +30,28 @@ class ParseError(IIIFImageClientException):
 # validating options (and could add option type checking)
 
 
-class ImageRegion:
+class ImageComponent:
+    """Common functionality for image request components (region, size,
+    rotation)."""
+
+    def copy(self, img=None):
+        """Copy of the current component, optionally associated with a
+        different image. Options have already been validated, so they are
+        copied directly rather than set and checked again."""
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.img = img
+        clone.options = self.options.copy()
+        return clone
+
+    def _options_changed(self):
+        # clear the cached url on the associated image, if any;
+        # called by every method that modifies options
+        if self.img is not None:
+            self.img._cached_url = None
+
+
+class ImageRegion(ImageComponent):
     """IIIF Image region. Intended to be used with :class:`IIIFImageClient`.
     Can be initialized with related image object and region options.
 
@@ -79,6 +107,7 @@ class ImageRegion:
 
     def set_options(self, **options):
         """Update region options.  Same parameters as initialization."""
+        self._options_changed()
         allowed_options = list(self.options.keys())
         # error if an unrecoganized option is specified
         for key in options:
@@ -103,8 +132,9 @@ class ImageRegion:
             self.options["full"] = False
 
     def as_dict(self):
-        """Return region options as a dictionary"""
-        return self.options
+        """Return a copy of region options as a dictionary; use
+        :meth:`set_options` to change them"""
+        return self.options.copy()
 
     def __str__(self):
         """Render region information in IIIF region format"""
@@ -121,45 +151,51 @@ class ImageRegion:
 
     def parse(self, region):
         """Parse an IIIF Image region string and update the current region"""
+        self._options_changed()
+        self.options = self.parse_options(region)
 
-        # reset to defaults before parsing
-        self.options = self.region_defaults.copy()
-
+    @classmethod
+    def parse_options(cls, region):
+        """Parse an IIIF Image region string and return a dictionary of
+        region options, without modifying the current region."""
         # full?
         if region == "full":
-            self.options["full"] = True
-            # return immediately
-            return
+            return cls.region_defaults.copy()
 
-        self.options["full"] = False
+        options = cls.region_defaults.copy()
+        options["full"] = False
 
         if region == "square":
-            self.options["square"] = True
-            # return immediately
-            return self
+            options["square"] = True
+            return options
 
         # percent?
-        if "pct" in region:
-            self.options["percent"] = True
-            region = region.split("pct:")[1]
+        if region.startswith("pct:"):
+            options["percent"] = True
+            region = region[4:]
+            coord_type = float
+        # else, force int
+        else:
+            coord_type = int
 
         # split to dictionary
         # if percentage type, cast to float
         try:
-            if self.options["percent"]:
-                coords = [float(region_c) for region_c in region.split(",")]
-            # else, force int
-            else:
-                coords = [int(region_c) for region_c in region.split(",")]
+            x, y, width, height = map(coord_type, region.split(","))
         except ValueError:
-            # failure converting to integer or float
+            # failure converting to integer or float,
+            # or wrong number of coordinates
             raise ParseError(f"Invalid region coordinates: {region}")
 
-        if len(coords) != 4:
-            raise ParseError(f"Invalid region coordinates: {region}")
+        options.update({"x": x, "y": y, "width": width, "height": height})
+        return options
 
-        x, y, width, height = coords
-        self.options.update({"x": x, "y": y, "width": width, "height": height})
+    def needs_image_info(self):
+        """Whether image dimensions are required to canonicalize the
+        current region options"""
+        return not self.options["full"] and (
+            self.options["square"] or self.options["percent"]
+        )
 
     def canonicalize(self):
         """Canonicalize the current region options so that
@@ -167,6 +203,7 @@ class ImageRegion:
         # From the spec:
         #   “full” if the whole image is requested, (including a “square”
         #    region of a square image), otherwise the x,y,w,h syntax.
+        self._options_changed()
 
         if self.options["full"]:
             # nothing to do
@@ -241,7 +278,7 @@ class ImageRegion:
             return
 
 
-class ImageSize:
+class ImageSize(ImageComponent):
     """IIIF Image Size.  Intended to be used with :class:`IIIFImageClient`.
     Can be initialized with related image object and size options.
 
@@ -253,6 +290,8 @@ class ImageSize:
     :param height: optional height
     :param percent: optional percent
     :param exact: size should be exact (boolean, optional)
+    :param upscaled: size may be larger than the extracted region, with
+        the ``^`` prefix (IIIF Image API 3.0; boolean, optional)
     """
 
     # size options
@@ -264,6 +303,7 @@ class ImageSize:
             ("height", None),
             ("percent", None),
             ("exact", False),
+            ("upscaled", False),
         ]
     )
 
@@ -283,6 +323,7 @@ class ImageSize:
         "height": None,
         "percent": None,
         "exact": False,
+        "upscaled": False,
     }
 
     def __init__(self, img=None, **options):
@@ -291,14 +332,20 @@ class ImageSize:
         if options:
             self.set_options(**options)
 
-    def __call__(self, **options):
+    #: modes for selecting an advertised size with :meth:`snap`
+    snap_modes = ("nearest", "not_smaller", "not_larger")
+
+    def __call__(self, snap=None, info=None, **options):
         if self.img is not None:
             img = self.img.get_copy()
             img.size.set_options(**options)
+            if snap is not None:
+                img.size.snap(snap, info=info)
             return img
 
     def set_options(self, **options):
         """Update size options.  Same parameters as initialization."""
+        self._options_changed()
         allowed_options = list(self.options.keys())
         # error if an unrecoganized option is specified
         for key in options:
@@ -315,61 +362,169 @@ class ImageSize:
             self.options["full"] = False
 
     def as_dict(self):
-        """Return size options as a dictionary"""
-        return self.options
+        """Return a copy of size options as a dictionary; use
+        :meth:`set_options` to change them"""
+        return self.options.copy()
 
     def __str__(self):
         if self.options["full"]:
             return "full"
+        upscaled = "^" if self.options["upscaled"] else ""
         if self.options["max"]:
-            return "max"
+            return f"{upscaled}max"
         if self.options["percent"]:
-            return "pct:{:g}".format(self.options["percent"])
+            return "{}pct:{:g}".format(upscaled, self.options["percent"])
 
         size = "{},{}".format(self.options["width"] or "", self.options["height"] or "")
         if self.options["exact"]:
-            return f"!{size}"
-        return size
+            return f"{upscaled}!{size}"
+        return f"{upscaled}{size}"
 
     def parse(self, size):
-        # reset to defaults before parsing
-        self.options = self.size_defaults.copy()
+        """Parse an IIIF Image size string and update the current size"""
+        self._options_changed()
+        self.options = self.parse_options(size)
 
+    @classmethod
+    def parse_options(cls, size):
+        """Parse an IIIF Image size string and return a dictionary of
+        size options, without modifying the current size."""
         # full?
         if size == "full":
-            self.options["full"] = True
-            return
+            return cls.size_defaults.copy()
 
         # for any other case, full should be false
-        self.options["full"] = False
+        options = cls.size_defaults.copy()
+        options["full"] = False
+
+        # upscaling allowed? (IIIF Image API 3.0)
+        if size.startswith("^"):
+            options["upscaled"] = True
+            size = size[1:]
 
         # max?
         if size == "max":
-            self.options["max"] = True
-            return
+            options["max"] = True
+            return options
 
         # percent?
-        if "pct" in size:
+        if size.startswith("pct:"):
             try:
-                self.options["percent"] = float(size.split(":")[1])
-                return
+                options["percent"] = float(size[4:])
+                return options
             except ValueError:
                 raise ParseError(f"Error parsing size: {size}")
 
         # exact?
         if size.startswith("!"):
-            self.options["exact"] = True
-            size = size.lstrip("!")
+            options["exact"] = True
+            size = size[1:]
 
         # split width and height
-        width, height = size.split(",")
+        width, comma, height = size.partition(",")
         try:
+            if not comma or "," in height:
+                raise ValueError
             if width != "":
-                self.options["width"] = int(width)
+                options["width"] = int(width)
             if height != "":
-                self.options["height"] = int(height)
+                options["height"] = int(height)
         except ValueError:
             raise ParseError(f"Error parsing size: {size}")
+        return options
+
+    @classmethod
+    def nearest_size(cls, sizes, width=None, height=None, mode="nearest"):
+        """Select the advertised size (as listed in image information
+        ``sizes``) closest to a target width, height, or bounding box
+        (width and height). Returns the selected size as a dictionary
+        with width and height, or None if there are no sizes.
+
+        :param sizes: list of dictionaries with width and height
+        :param width: target width
+        :param height: target height
+        :param mode: `nearest` for the closest size, `not_smaller` for the
+            smallest size at least as large as the target, or `not_larger`
+            for the largest size no larger than the target; if no size
+            qualifies, the closest size is used
+        """
+        if mode not in cls.snap_modes:
+            raise IIIFImageClientException(f"Unknown snap mode: {mode}")
+        if not width and not height:
+            raise IIIFImageClientException("Cannot snap without width or height")
+
+        def ratio(size):
+            # relative size compared to the target; for a bounding box,
+            # the largest ratio determines whether a size fits
+            return max(
+                size["width"] / width if width else 0,
+                size["height"] / height if height else 0,
+            )
+
+        candidates = sizes or []
+        if mode == "not_smaller":
+            candidates = [size for size in candidates if ratio(size) >= 1] or candidates
+        elif mode == "not_larger":
+            candidates = [size for size in candidates if ratio(size) <= 1] or candidates
+        # closest to the target; prefer the larger of two equally close sizes
+        return min(
+            candidates,
+            key=lambda size: (abs(ratio(size) - 1), -ratio(size)),
+            default=None,
+        )
+
+    def snap(self, mode="nearest", info=None):
+        """Update the current width, height, or bounding box (``!w,h``)
+        to the nearest size advertised by the image server, so that
+        requests can use pre-rendered derivatives. Sizes are taken from
+        the image information of the associated image, unless image
+        information is specified as a dictionary or a
+        :class:`~piffle.iiif_dataclasses.image2.Image2` or
+        :class:`~piffle.iiif_dataclasses.image3.Image3`. Sizes are
+        unchanged if no sizes are advertised, or if the associated image
+        has a region other than full, since advertised sizes are sizes
+        of the full image. See :meth:`nearest_size` for modes."""
+        if self.options["full"] or self.options["max"]:
+            # nothing to do
+            return
+        if self.img is not None and not self.img.region.options["full"]:
+            # advertised sizes do not apply to regions
+            return
+        if info is None:
+            if self.img is None:
+                raise IIIFImageClientException("Cannot snap without image")
+            info = self.img.image_info
+        if isinstance(info, dict):
+            sizes = info.get("sizes")
+            image_width, image_height = info.get("width"), info.get("height")
+        else:
+            sizes, image_width, image_height = info.sizes, info.width, info.height
+
+        width, height = self.options["width"], self.options["height"]
+        if self.options["percent"]:
+            scale = self.options["percent"] / 100
+            width, height = image_width * scale, image_height * scale
+        size = self.nearest_size(sizes, width, height, mode)
+        if size is not None:
+            self._options_changed()
+            self.options.update(
+                {
+                    "width": size["width"],
+                    "height": size["height"],
+                    "percent": None,
+                    "exact": False,
+                }
+            )
+
+    def needs_image_info(self):
+        """Whether image dimensions are required to canonicalize the
+        current size options"""
+        options = self.options
+        return not options["full"] and bool(
+            options["percent"]
+            or options["exact"]
+            or (options["height"] and options["width"] is None)
+        )
 
     def canonicalize(self):
         """Canonicalize the current size options so that
@@ -381,6 +536,7 @@ class ImageSize:
         #   the aspect ratio.
         #   Note: The size keyword “full” will be replaced with “max” in
         #   version 3.0
+        self._options_changed()
 
         if self.options["full"]:
             # nothing to do
@@ -439,7 +595,7 @@ class ImageSize:
             )
 
 
-class ImageRotation:
+class ImageRotation(ImageComponent):
     """IIIF Image rotation Intended to be used with :class:`IIIFImageClient`.
     Can be initialized with related image object and rotation options.
 
@@ -476,6 +632,7 @@ class ImageRotation:
 
     def set_options(self, **options):
         """Update size options.  Same parameters as initialization."""
+        self._options_changed()
         allowed_options = self.options.keys()
         # error if an unrecoganized option is specified
         for key in options:
@@ -487,8 +644,9 @@ class ImageRotation:
         self.options.update(**options)
 
     def as_dict(self):
-        """Return rotation options as a dictionary"""
-        return self.options
+        """Return a copy of rotation options as a dictionary; use
+        :meth:`set_options` to change them"""
+        return self.options.copy()
 
     def __str__(self):
         return "{}{:g}".format(
@@ -497,15 +655,27 @@ class ImageRotation:
         )
 
     def parse(self, rotation):
-        # reset to defaults before parsing
-        self.options = self.rotation_defaults.copy()
+        """Parse an IIIF Image rotation string and update the current
+        rotation"""
+        self._options_changed()
+        self.options = self.parse_options(rotation)
 
-        if str(rotation).startswith("!"):
-            self.options["mirrored"] = True
-            rotation = rotation.lstrip("!")
+    @classmethod
+    def parse_options(cls, rotation):
+        """Parse an IIIF Image rotation string and return a dictionary of
+        rotation options, without modifying the current rotation."""
+        options = cls.rotation_defaults.copy()
+        rotation = str(rotation)
+        if rotation.startswith("!"):
+            options["mirrored"] = True
+            rotation = rotation[1:]
 
         # rotation allows float
-        self.options["degrees"] = float(rotation)
+        try:
+            options["degrees"] = float(rotation)
+        except ValueError:
+            raise ParseError(f"Error parsing rotation: {rotation}")
+        return options
 
     def canonicalize(self):
         """Canonicalize the current region options so that
@@ -519,6 +689,18 @@ class ImageRotation:
         return
 
 
+# image information requests in progress, keyed on info url
+_pending_info = {}
+_pending_info_lock = threading.Lock()
+
+
+#: Parsed IIIF Image API url, as returned by :meth:`IIIFImageClient.parse_url`
+ImageUrl = namedtuple(
+    "ImageUrl",
+    ["api_endpoint", "image_id", "region", "size", "rotation", "quality", "fmt"],
+)
+
+
 class IIIFImageClient:
     """Simple IIIF Image API client for generating IIIF image urls
      in an object-oriented, pythonic fashion.  Can be extended,
@@ -545,6 +727,27 @@ class IIIFImageClient:
         "fmt": default_format,
     }
     allowed_formats = ["jpg", "tif", "png", "gif", "jp2", "pdf", "webp"]
+    #: cache of parsed urls used by :meth:`parse_url` and
+    #: :meth:`init_from_url`; set to None to disable
+    url_cache = LRUCache(maxsize=1024)
+    #: cache of image information shared by all clients in the process,
+    #: keyed on info url; any object with ``get`` and ``set`` methods can
+    #: be used. Set to None to disable.
+    info_cache = LRUCache(maxsize=1024, ttl=3600)
+    #: optional :class:`~piffle.registry.ImageDimensionRegistry` of known
+    #: image dimensions, checked before requesting image information
+    dimension_registry = None
+    #: cache of normalized keys used by :meth:`cache_key`, keyed on url;
+    #: set to None to disable
+    cache_key_cache = LRUCache(maxsize=4096)
+    #: scheme used for api endpoints in :meth:`cache_key`; set to None
+    #: to keep the scheme of each url
+    cache_key_scheme = "https"
+    #: quality and format aliases normalized by :meth:`cache_key`
+    quality_aliases = {"native": "default"}
+    format_aliases = {"jpeg": "jpg", "tiff": "tif"}
+    #: default ports removed from api endpoints by :meth:`cache_key`
+    default_ports = {"http": ":80", "https": ":443"}
 
     def __init__(
         self,
@@ -556,6 +759,8 @@ class IIIFImageClient:
         quality=None,
         fmt=None,
     ):
+        self._cached_url = None
+        self._cached_info_url = None
         self.image_options = self.image_defaults.copy()
         # NOTE: using underscore to differenteate objects from methods
         # but it could be reasonable to make objects public
@@ -592,17 +797,26 @@ class IIIFImageClient:
         return self.image_id
 
     def __str__(self):
-        info = self.image_options.copy()
-        info.update(
-            {
-                "endpoint": self.api_endpoint,
-                "id": self.get_image_id(),
-                "region": str(self.region),
-                "size": str(self.size),
-                "rot": str(self.rotation),
-            }
+        # The rendered url is cached; region, size, and rotation clear it
+        # when their options are updated, and the remaining url parts are
+        # compared on each call.
+        key = (
+            self.api_endpoint,
+            self.get_image_id(),
+            self.image_options["quality"],
+            self.image_options["fmt"],
+        )
+        if self._cached_url is None or self._cached_url[0] != key:
+            url = f"{key[0]}/{key[1]}/{self._request_params()}"
+            self._cached_url = (key, url)
+        return self._cached_url[1]
+
+    def _request_params(self):
+        """Image request parameters portion of the url, i.e.
+        ``{region}/{size}/{rotation}/{quality}.{format}``"""
+        return "{}/{}/{}/{quality}.{fmt}".format(
+            self.region, self.size, self.rotation, **self.image_options
         )
-        return "{endpoint}/{id}/{region}/{size}/{rot}/{quality}.{fmt}".format(**info)
 
     def __repr__(self):
         return f"<IIIFImageClient {self.get_image_id()}>"
@@ -610,16 +824,105 @@ class IIIFImageClient:
 
     def info(self):
         "JSON info url"
-        return f"{self.api_endpoint}/{self.get_image_id()}/info.json"
+        key = (self.api_endpoint, self.get_image_id())
+        if self._cached_info_url is None or self._cached_info_url[0] != key:
+            self._cached_info_url = (key, "{}/{}/info.json".format(*key))
+        return self._cached_info_url[1]
 
     @cached_property
     def image_info(self):
-        "Retrieve image information provided as JSON at info url"
-        resp = requests.get(self.info())
-        if resp.status_code == requests.codes.ok:
-            return resp.json()
+        """Retrieve image information provided as JSON at info url.
+        Checks the :attr:`dimension_registry` and the shared
+        :attr:`info_cache` before making a request; the returned dictionary
+        may be shared with other clients and should not be modified.
+
+        Image information from the dimension registry only includes
+        the fields stored there (width, height, and optionally tiles,
+        sizes, and profile)."""
+        info = self.known_image_info()
+        if info is None:
+            info = self.request_image_info()
+        return info
+
+    def known_image_info(self):
+        """Image information that is available without making a request:
+        previously retrieved for this image, or available in the
+        :attr:`dimension_registry` or the shared :attr:`info_cache`.
+        Returns None if no image information is available."""
+        if "image_info" in self.__dict__:
+            return self.__dict__["image_info"]
+        if self.dimension_registry is not None:
+            info = self.dimension_registry.get(self.api_endpoint, self.get_image_id())
+            if info is not None:
+                return info
+        if self.info_cache is not None:
+            info = self.info_cache.get(self.info())
+            if instrumentation.collectors:
+                instrumentation.record(
+                    "info_cache.miss" if info is None else "info_cache.hit"
+                )
+            return info
+
+    def request_image_info(self):
+        """Request image information from the image server, and add it
+        to the shared :attr:`info_cache`. Raises
+        :class:`requests.HTTPError` if the request is not successful.
+
+        If another thread is already requesting information for the same
+        image, waits for and returns that result instead of making a
+        second request."""
+        from concurrent.futures import Future
+
+        info_url = self.info()
+        with _pending_info_lock:
+            pending = _pending_info.get(info_url)
+            if pending is None:
+                pending = _pending_info[info_url] = Future()
+                requester = True
+            else:
+                requester = False
+        if not requester:
+            return pending.result()
 
-        resp.raise_for_status()
+        try:
+            resp = get_transport().get(info_url)
+            if resp.status_code == HTTPStatus.OK:
+                if instrumentation.collectors:
+                    with instrumentation.timed("json.decode", source=info_url):
+                        info = resp.json()
+                else:
+                    info = resp.json()
+                self._cache_image_info(info)
+            else:
+                info = None
+                resp.raise_for_status()
+        except BaseException as err:
+            pending.set_exception(err)
+            raise
+        else:
+            pending.set_result(info)
+            return info
+        finally:
+            with _pending_info_lock:
+                del _pending_info[info_url]
+
+    def _cache_image_info(self, info):
+        # add retrieved image information to the shared info cache, also
+        # under the endpoint as normalized by cache_key, so that keys for
+        # other variants of the endpoint use the same dimensions
+        if self.info_cache is None:
+            return
+        info_url = self.info()
+        self.info_cache.set(info_url, info)
+        key_info_url = self._cache_key_info_url()
+        if key_info_url != info_url:
+            self.info_cache.set(key_info_url, info)
+
+    def _cache_key_info_url(self):
+        return (
+            f"{self._cache_key_endpoint(self.api_endpoint)}/"
+            f"{self.get_image_id()}/info.json"
+        )
 
     @property
     def image_width(self):
@@ -633,12 +936,17 @@ class IIIFImageClient:
 
     def get_copy(self):
         "Get a clone of the current settings for modification."
-        clone = self.__class__(self.api_endpoint, self.image_id, **self.image_options)
+        # copy instance attributes directly instead of initializing and
+        # validating a new instance, since this is called for every step
+        # in a chain of fluent method calls
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.image_options = self.image_options.copy()
         # copy region, size, and rotation - no longer included in
         # image_options dict
-        clone.region.set_options(**self.region.as_dict())
-        clone.size.set_options(**self.size.as_dict())
-        clone.rotation.set_options(**self.rotation.as_dict())
+        clone.region = self.region.copy(clone)
+        clone.size = self.size.copy(clone)
+        clone.rotation = self.rotation.copy(clone)
         return clone
 
     # method to set quality not yet implemented
@@ -659,69 +967,434 @@ class IIIFImageClient:
         img.rotation.canonicalize()
         return img
 
+    def needs_image_info(self):
+        """Whether image dimensions are required to canonicalize the
+        current image request options"""
+        return self.region.needs_image_info() or self.size.needs_image_info()
+
     @classmethod
-    def init_from_url(cls, url):
-        """Init ImageClient using Image API parameters from URI.  Detect
-        image vs. info request. Can count reliably from the end of the URI
-        backwards, but cannot assume how many slashes make up the api_endpoint.
-        Returns new instance of IIIFImageClient.
+    def canonicalize_urls(cls, urls, max_workers=8):
+        """Canonicalize a batch of IIIF image urls. Urls are grouped by
+        image, so image information is retrieved at most once per image
+        (and not at all when it is already known or is not needed), with
+        requests for different images made concurrently. Returns a list
+        of canonical url strings in the same order as the input urls.
+        Urls that cannot be parsed, or for images whose information cannot
+        be retrieved, are returned as given (and the error logged); other
+        urls in the batch are still canonicalized.
+
+        :param urls: iterable of IIIF image urls
+        :param max_workers: maximum number of concurrent requests for
+            image information
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        urls = list(urls)
+        # images by url index; None for urls returned as given
+        images = []
+        for url in urls:
+            try:
+                images.append(cls.init_from_url(url))
+            except ParseError as err:
+                log.warning("Error parsing image url %s: %s", url, err)
+                images.append(None)
+
+        # group images that need image information by info url
+        pending = {}
+        for index, img in enumerate(images):
+            if img is None or not img.needs_image_info():
+                continue
+            group = pending.get(img.info())
+            if group is None:
+                info = img.known_image_info()
+                if info is not None:
+                    img.image_info = info
+                    continue
+                group = pending[img.info()] = []
+            group.append(index)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    info_url: executor.submit(images[group[0]].request_image_info)
+                    for info_url, group in pending.items()
+                }
+                for info_url, future in futures.items():
+                    try:
+                        info = future.result()
+                    except Exception:
+                        log.warning("Error retrieving image information %s", info_url)
+                        info = None
+                    for index in pending[info_url]:
+                        if info is None:
+                            images[index] = None
+                        else:
+                            images[index].image_info = info
+
+        return [
+            url if img is None else str(img.canonicalize())
+            for url, img in zip(urls, images)
+        ]
+
+    @classmethod
+    def cache_key(cls, url):
+        """Normalize an IIIF image or info url to a single cache key for
+        all requests that are the same in effect, e.g. for a CDN or proxy
+        cache. Builds on :meth:`canonicalize`, and also:
+
+        - normalizes the api endpoint: lower-case host, no default port,
+          and scheme set to :attr:`cache_key_scheme`
+        - normalizes quality and format aliases (:attr:`quality_aliases`,
+          :attr:`format_aliases`)
+        - uses ``max`` for full size requests (``full`` and ``max``)
+        - normalizes rotation to between 0 and 360 degrees
+        - when image dimensions are known, uses ``full`` for regions that
+          cover the whole image, ``w,`` for sizes that keep the aspect
+          ratio, ``max`` for sizes that match the region, and drops the
+          ``^`` prefix when the size is not larger than the region
+
+        Never requests image information; dimensions are used when
+        available from :meth:`known_image_info` for the url's endpoint or
+        the normalized endpoint (where information retrieved or found for
+        any variant of the endpoint is also cached), and otherwise region
+        and size are only normalized for full requests. Keys that will not
+        change when dimensions become known are cached in
+        :attr:`cache_key_cache`.
+        Raises :class:`ParseError` if the url cannot be parsed.
+
+        :param url: IIIF image or info url
+        """
+        if cls.cache_key_cache is not None:
+            key = cls.cache_key_cache.get(url)
+            if key is not None:
+                return key
+
+        parsed = cls.parse_url(url)
+        api_endpoint = cls._cache_key_endpoint(parsed.api_endpoint)
+        if parsed.region is None:
+            # info url
+            key = f"{api_endpoint}/{parsed.image_id}/info.json"
+        else:
+            img = cls.init_from_url(url)
+            # look up dimensions under the original endpoint, then the
+            # normalized endpoint shared by all variants of it
+            info = img.known_image_info()
+            if api_endpoint != img.api_endpoint:
+                if info is not None:
+                    if cls.info_cache is not None:
+                        cls.info_cache.set(img._cache_key_info_url(), info)
+                else:
+                    normalized = cls.init_from_url(url)
+                    normalized.api_endpoint = api_endpoint
+                    info = normalized.known_image_info()
+            if info is not None:
+                img.image_info = info
+                img = img.canonicalize()
+                img._cache_key_dimensions()
+            size = img.size.options
+            # without dimensions, only full region and size requests are
+            # fully normalized
+            complete = info is not None or (
+                img.region.options["full"] and (size["full"] or size["max"])
+            )
+            if size["full"]:
+                img.size.set_options(max=True)
+            rotation = img.rotation.options
+            if not 0 <= rotation["degrees"] < 360:
+                img.rotation.set_options(degrees=rotation["degrees"] % 360)
+            quality = img.image_options["quality"].lower()
+            fmt = img.image_options["fmt"].lower()
+            img.image_options["quality"] = cls.quality_aliases.get(quality, quality)
+            img.image_options["fmt"] = cls.format_aliases.get(fmt, fmt)
+            img.api_endpoint = api_endpoint
+            key = str(img)
+            if not complete:
+                return key
+
+        if cls.cache_key_cache is not None:
+            cls.cache_key_cache.set(url, key)
+        return key
+
+    @classmethod
+    def _cache_key_endpoint(cls, api_endpoint):
+        # normalize scheme, host, and port of an api endpoint
+        scheme, _, remainder = api_endpoint.partition("://")
+        netloc, slash, path = remainder.partition("/")
+        scheme = scheme.lower()
+        netloc = netloc.lower()
+        default_port = cls.default_ports.get(scheme)
+        if default_port is not None and netloc.endswith(default_port):
+            netloc = netloc[: -len(default_port)]
+        if cls.cache_key_scheme is not None:
+            scheme = cls.cache_key_scheme
+        return f"{scheme}://{netloc}{slash}{path}"
+
+    def _cache_key_dimensions(self):
+        # normalize canonical region and size options that are the same
+        # in effect for the known image dimensions
+        image_width, image_height = self.image_width, self.image_height
+        region = self.region.options
+        if not region["full"]:
+            x, y = region["x"], region["y"]
+            # the server crops regions that extend past the image
+            width = min(region["width"], image_width - x)
+            height = min(region["height"], image_height - y)
+            if x == 0 and y == 0 and width == image_width and height == image_height:
+                self.region.parse("full")
+        else:
+            width, height = image_width, image_height
+        if width <= 0 or height <= 0:
+            return
+
+        size = self.size.options
+        if size["full"] or size["max"] or not size["width"]:
+            return
+        if size["height"] is not None:
+            # w,h that keeps the region's aspect ratio is the same as w,
+            scaled = size["width"] * height / width
+            if size["height"] in (int(scaled), round(scaled)):
+                self.size.set_options(height=None)
+        if size["upscaled"] and size["width"] <= width:
+            if size["height"] is None or size["height"] <= height:
+                self.size.set_options(upscaled=False)
+        if size["width"] == width and size["height"] is None and not size["upscaled"]:
+            self.size.parse("max")
+
+    @classmethod
+    def parse_url(cls, url):
+        """Parse an IIIF Image API url without initializing a client.
+        Detect image vs. info request. Can count reliably from the end of
+        the URI backwards, but cannot assume how many slashes make up the
+        api_endpoint. Returns an :class:`ImageUrl`; for info urls, only
+        api endpoint and image id are set. Region, size, and rotation
+        are returned as option dictionaries (as for
+        :meth:`ImageRegion.parse_options`), which should not be modified.
+
+        Results are cached in :attr:`url_cache` when it is set, so parsing
+        the same url repeatedly is a dictionary lookup.
         Per http://iiif.io/api/image/2.0/#image-request-uri-syntax, using
         slashes to parse URI"""
+        if cls.url_cache is not None:
+            parsed = cls.url_cache.get(url)
+            if parsed is None:
+                parsed = cls._parse_url(url)
+                cls.url_cache.set(url, parsed)
+            return parsed
+        return cls._parse_url(url)
+
+    @staticmethod
+    def _parse_url(url):
+        # split scheme and host from the path, and discard any
+        # query string or fragment; fall back to urlparse for anything
+        # other than a simple absolute url
+        scheme, sep, remainder = url.partition("://")
+        if sep and scheme.isalnum():
+            remainder = remainder.partition("#")[0].partition("?")[0]
+            netloc, _, path = remainder.partition("/")
+        else:
+            parsed_url = urlparse(url)
+            scheme, netloc, path = parsed_url.scheme, parsed_url.netloc, parsed_url.path
 
-        # first parse as a url
-        parsed_url = urlparse(url)
-        # then split the path on slashes
-        # and remove any empty strings
-        path_components = [path for path in parsed_url.path.split("/") if path]
+        # split the path on slashes and remove any empty strings
+        path_components = [path for path in path.split("/") if path]
         if not path_components:
             raise ParseError(f"Invalid IIIF image url: {url}")
-        # pop off last portion of the url to determine if this is an info url
-        path_basename = path_components.pop()
-        opts = {}
+        # last portion of the url determines if this is an info url
+        path_basename = path_components[-1]
 
         # info request
         if path_basename == "info.json":
             # NOTE: this is unlikely to happen; more likely, if information is
             # missing, we will misinterpret the api endpoint or the image id
-            if len(path_components) < 1:
+            if len(path_components) < 2:
                 raise ParseError(f"Invalid IIIF image information url: {url}")
-            image_id = path_components.pop()
+            image_id = path_components[-2]
+            endpoint_path = path_components[:-2]
+            region = size = rotation = quality = fmt = None
 
         # image request
         else:
             # check for enough IIIF parameters
-            if len(path_components) < 4:
+            if len(path_components) < 5:
                 raise ParseError(f"Invalid IIIF image request: {url}")
 
-            # pop off url portions as they are used so we can easily
-            # make use of leftover path to reconstruct the api endpoint
-            quality, fmt = path_basename.split(".")
-            rotation = path_components.pop()
-            size = path_components.pop()
-            region = path_components.pop()
-            image_id = path_components.pop()
-            opts.update(
-                {
-                    "region": region,
-                    "size": size,
-                    "rotation": rotation,
-                    "quality": quality,
-                    "fmt": fmt,
-                }
-            )
+            image_id, region, size, rotation = path_components[-5:-1]
+            quality, dot, fmt = path_basename.partition(".")
+            if not dot:
+                raise ParseError(f"Invalid IIIF image request: {url}")
+            endpoint_path = path_components[:-5]
+            region = ImageRegion.parse_options(region)
+            size = ImageSize.parse_options(size)
+            rotation = ImageRotation.parse_options(rotation)
 
         # construct the api endpoint url from the parsed url and whatever
         # portions of the url path are leftover
-        # remove empty strings from the remaining path components
-        path_components = [p for p in path_components if p]
-        api_endpoint = "{}://{}/{}".format(
-            parsed_url.scheme,
-            parsed_url.netloc,
-            "/".join(path_components) if path_components else "",
+        api_endpoint = "{}://{}/{}".format(scheme, netloc, "/".join(endpoint_path))
+        return ImageUrl(
+            api_endpoint.rstrip("/"), image_id, region, size, rotation, quality, fmt
+        )
+
+    @classmethod
+    def init_from_url(cls, url):
+        """Init ImageClient using Image API parameters from URI, as parsed
+        by :meth:`parse_url`. Returns new instance of IIIFImageClient."""
+        parsed = cls.parse_url(url)
+        img = cls(
+            api_endpoint=parsed.api_endpoint,
+            image_id=parsed.image_id,
+            quality=parsed.quality,
+            fmt=parsed.fmt,
+        )
+        # region, size, and rotation are already parsed;
+        # copy the options rather than parsing again
+        if parsed.region is not None:
+            img.region.options = parsed.region.copy()
+            img.size.options = parsed.size.copy()
+            img.rotation.options = parsed.rotation.copy()
+        return img
+
+    @classmethod
+    def init_from_resource(cls, resource, width=None, height=None):
+        """Init ImageClient from an IIIF Presentation image resource with
+        an embedded image service (a version 2 annotation ``resource`` or
+        version 3 annotation ``body``). When image dimensions are known
+        from the service or resource, or are specified (e.g. canvas
+        dimensions), :attr:`image_info` is set with width, height, and
+        any context, profile, tiles, and sizes from the service, so that
+        canonicalization and size calculations do not request image
+        information. Raises :class:`IIIFImageClientException` if the
+        resource has no image service.
+
+        :param resource: image resource dictionary
+        :param width: image width to use if not in the service or resource
+        :param height: image height to use if not in the service or resource
+        """
+        services = resource.get("service") if isinstance(resource, dict) else None
+        if isinstance(services, dict):
+            services = [services]
+        for service in services or []:
+            if not isinstance(service, dict):
+                continue
+            service_id = service.get("id") or service.get("@id")
+            if service_id:
+                break
+        else:
+            raise IIIFImageClientException("Image resource has no image service")
+
+        api_endpoint, _, image_id = service_id.rstrip("/").rpartition("/")
+        img = cls(api_endpoint, image_id)
+        width = service.get("width") or resource.get("width") or width
+        height = service.get("height") or resource.get("height") or height
+        if width and height:
+            info = {"width": int(width), "height": int(height)}
+            # keys may be formatted without @ when loaded as dataclasses
+            context = service.get("@context") or service.get("context")
+            if context is None and service.get("type") == "ImageService3":
+                context = "http://iiif.io/api/image/3/context.json"
+            if context is not None:
+                info["@context"] = context
+            for field in ("profile", "tiles", "sizes"):
+                if service.get(field) is not None:
+                    info[field] = service[field]
+            img.image_info = info
+        return img
+
+    def tile_urls(self, scale_factors=None):
+        """Generate urls for every tile of the image, based on the tile
+        sizes and scale factors in :attr:`image_info`, using the current
+        quality and format. Urls are generated lazily, one scale factor
+        and tile at a time, so large images do not require building a
+        list of every tile.
+
+        :param scale_factors: optional list of scale factors (levels) to
+            restrict to; by default, all advertised scale factors are used
+        """
+        info = self.image_info
+        yield from self.render_tile_urls(
+            self.api_endpoint,
+            self.get_image_id(),
+            info["width"],
+            info["height"],
+            info.get("tiles") or [],
+            scale_factors=scale_factors,
+            # IIIF Image API 3.0 canonical sizes include height
+            include_height="/image/3" in str(info.get("@context", "")),
+            quality=self.image_options["quality"],
+            fmt=self.image_options["fmt"],
         )
 
-        # init and return instance
-        return cls(api_endpoint=api_endpoint, image_id=image_id, **opts)
+    @classmethod
+    def render_tile_urls(
+        cls,
+        api_endpoint,
+        image_id,
+        width,
+        height,
+        tiles,
+        scale_factors=None,
+        include_height=False,
+        quality="default",
+        fmt=default_format,
+    ):
+        """Generate tile urls for an image from its dimensions and tiles
+        information, without requiring image information from the image
+        server. See :meth:`tile_urls`.
+
+        :param api_endpoint: IIIF image api endpoint
+        :param image_id: image id
+        :param width: image width
+        :param height: image height
+        :param tiles: list of tiles as in IIIF image information, with
+            width, optional height, and scaleFactors
+        :param scale_factors: optional list of scale factors to restrict to
+        :param include_height: render tile sizes as w,h instead of w,
+        """
+        prefix = "{}/{}".format(api_endpoint.rstrip("/"), image_id)
+        suffix = f"0/{quality}.{fmt}"
+        for tile in tiles:
+            tile_width = tile["width"]
+            tile_height = tile.get("height") or tile_width
+            for scale in tile.get("scaleFactors", [1]):
+                if scale_factors is not None and scale not in scale_factors:
+                    continue
+                # size of the image region covered by one tile at this scale
+                region_width = tile_width * scale
+                region_height = tile_height * scale
+                for y in range(0, height, region_height):
+                    h = min(region_height, height - y)
+                    # scaled tile height, rounded up
+                    size_h = -(-h // scale)
+                    for x in range(0, width, region_width):
+                        w = min(region_width, width - x)
+                        size_w = -(-w // scale)
+                        if w == width and h == height:
+                            region = "full"
+                        else:
+                            region = f"{x},{y},{w},{h}"
+                        if include_height:
+                            size = f"{size_w},{size_h}"
+                        else:
+                            size = f"{size_w},"
+                        yield f"{prefix}/{region}/{size}/{suffix}"
+
+    @classmethod
+    def render_urls(cls, api_endpoint, image_ids, **options):
+        """Generate IIIF image urls for many image ids that share the same
+        api endpoint and image request options, without initializing a
+        client for each image id. Options are the same as for
+        initialization (region, size, and rotation as IIIF strings, quality,
+        and fmt); they are parsed and rendered once, so any parse errors
+        are raised immediately. Returns a generator of url strings::
+
+            IIIFImageClient.render_urls(endpoint, ids, size="!200,200")
+
+        :param api_endpoint: IIIF image api endpoint
+        :param image_ids: iterable of image ids
+        """
+        template = cls(api_endpoint=api_endpoint, **options)
+        prefix = f"{template.api_endpoint}/"
+        suffix = f"/{template._request_params()}"
+        return (f"{prefix}{image_id}{suffix}" for image_id in image_ids)
 
     def as_dict(self):
         """
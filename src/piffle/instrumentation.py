@@ -0,0 +1,128 @@
+"""Lightweight instrumentation for finding where time goes when loading
+IIIF content and generating image urls. When enabled, piffle records
+events for:
+
+- ``http.request``: HTTP requests made by the shared transport, with
+  host and status (or error) tags
+- ``json.decode``: JSON decoding of manifests and image information,
+  excluding ``format_manifest``
+- ``format_manifest``: key formatting of decoded JSON, with the number
+  of objects formatted
+- ``construct``: initialization of :mod:`piffle.iiif_dataclasses`
+  objects, tagged by class; times include nested objects
+- ``info_cache.hit`` and ``info_cache.miss``: lookups in the shared
+  image information cache (counts only)
+- ``manifest_cache.hit`` and ``manifest_cache.miss``: loads through the
+  shared :class:`~piffle.cache.ManifestCache`, when enabled, tagged by
+  source (``file``, ``url``, or ``revalidated``; counts only)
+
+Events are sent to every registered collector: any object with a
+``record(event, duration, tags)`` method. Collectors are process-wide.
+When no collectors are registered, instrumentation is disabled and
+costs a single check per instrumented call. Use :func:`instrument` to
+collect events in memory for a block of code::
+
+    with instrument() as collector:
+        load_iiif_presentation(url)
+    collector.total_time("http.request")
+"""
+
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+#: registered collectors; instrumentation is enabled if this is not empty
+collectors = []
+_collectors_lock = threading.Lock()
+
+#: a recorded event, with duration in seconds (None for counters)
+Event = namedtuple("Event", ["name", "duration", "tags"])
+
+
+def add_collector(collector):
+    """Register a collector to receive instrumentation events"""
+    with _collectors_lock:
+        collectors.append(collector)
+
+
+def remove_collector(collector):
+    """Unregister a collector"""
+    with _collectors_lock:
+        collectors.remove(collector)
+
+
+def record(event, duration=None, **tags):
+    """Send an event to all registered collectors. Callers should check
+    :data:`collectors` first, to avoid any cost when disabled."""
+    for collector in tuple(collectors):
+        collector.record(event, duration, tags)
+
+
+@contextmanager
+def timed(event, **tags):
+    """Context manager that records an event with the duration of the
+    block. Tags may be updated within the block."""
+    start = time.perf_counter()
+    try:
+        yield tags
+    finally:
+        record(event, time.perf_counter() - start, **tags)
+
+
+class InMemoryCollector:
+    """Collector that keeps all recorded events in memory, with methods
+    to count and total them; intended for tests and ad hoc profiling."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def record(self, event, duration, tags):
+        with self._lock:
+            self.events.append(Event(event, duration, tags))
+
+    def matching(self, event, **tags):
+        """Recorded events with the specified name and tags"""
+        return [
+            recorded
+            for recorded in self.events
+            if recorded.name == event
+            and all(recorded.tags.get(key) == value for key, value in tags.items())
+        ]
+
+    def count(self, event, **tags):
+        """Number of recorded events with the specified name and tags"""
+        return len(self.matching(event, **tags))
+
+    def total_time(self, event, **tags):
+        """Total duration in seconds of recorded events with the
+        specified name and tags"""
+        return sum(recorded.duration or 0 for recorded in self.matching(event, **tags))
+
+    def summary(self):
+        """Dictionary of event name to count and total duration"""
+        summary = {}
+        for recorded in self.events:
+            count, total = summary.get(recorded.name, (0, 0.0))
+            summary[recorded.name] = (count + 1, total + (recorded.duration or 0))
+        return summary
+
+    def clear(self):
+        """Remove all recorded events"""
+        with self._lock:
+            self.events.clear()
+
+
+@contextmanager
+def instrument(collector=None):
+    """Enable instrumentation for the duration of a block, recording
+    events with the specified collector or a new
+    :class:`InMemoryCollector`, which is returned."""
+    if collector is None:
+        collector = InMemoryCollector()
+    add_collector(collector)
+    try:
+        yield collector
+    finally:
+        remove_collector(collector)
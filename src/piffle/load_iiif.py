@@ -1,14 +1,49 @@
 from __future__ import annotations
 
-from piffle.utils import get_manifest, load_manifest
+import logging
+from http import HTTPStatus
+
+from piffle.cache import get_manifest_cache
+from piffle.transport import get_transport
+from piffle.utils import IIIFException, decode_manifest, get_manifest, load_manifest
+
+log = logging.getLogger(__name__)
 
 
 class UnknownClassError(ValueError):
     pass
 
 
-def load_iiif_presentation(id: str, presentation_version: int | float | str = "infer"):
-    """Load a IIIF presentation manifest.
+def load_iiif_json(id: str):
+    """Load IIIF JSON from a filepath, or from a uri if no file exists.
+
+    Parameters
+    ----------
+    id : str
+        The uri or filepath of the IIIF JSON.
+
+    Returns
+    -------
+    dict
+        The loaded JSON data, with keys formatted by
+        :func:`piffle.utils.format_manifest`.
+    """
+    try:
+        return load_manifest(id)
+    except FileNotFoundError:
+        return get_manifest(id)
+
+
+def load_iiif_presentation(
+    id: str,
+    presentation_version: int | float | str = "infer",
+    lazy: bool = False,
+    validation: str | None = None,
+):
+    """Load a IIIF presentation manifest. Uses the shared
+    :class:`~piffle.cache.ManifestCache`, if enabled; objects are cached
+    separately for each `lazy` and `validation` option, and missing
+    fields are reported when content is loaded, not for cached objects.
 
     Parameters
     ----------
@@ -16,6 +51,18 @@ def load_iiif_presentation(id: str, presentation_version: int | float | str = "i
         The uri or filepath of the IIIF presentation.
     presentation_version : int | float | str
         The version of the IIIF presentation (2 or 3). Default is "infer" so will automatically try to detect the version.
+    lazy : bool
+        Initialize nested lists of objects (canvases, annotation pages,
+        annotations, structures, etc.) on first access; see
+        :func:`piffle.iiif_dataclasses.dataclass_utils.lazy_parsing`.
+        Default is False.
+    validation : str | None
+        How missing fields are reported: "log" a warning for each, "report"
+        them in a single summary warning (see
+        :class:`~piffle.iiif_dataclasses.dataclass_utils.ValidationReport`),
+        or "off". Default is None, to use the current
+        :func:`~piffle.iiif_dataclasses.dataclass_utils.validation` mode
+        ("log" unless set).
 
     Returns
     -------
@@ -29,11 +76,105 @@ def load_iiif_presentation(id: str, presentation_version: int | float | str = "i
     UnknownClassError
         If the manifest type is not found in the IIIF presentation classes.
     """
+    cache = get_manifest_cache()
+    if cache is not None:
+        return cache.load(
+            id,
+            lambda content, source: parse_iiif_presentation(
+                decode_manifest(content, source),
+                presentation_version,
+                lazy,
+                validation,
+            ),
+            key=("presentation", presentation_version, lazy, validation),
+        )
+    return parse_iiif_presentation(
+        load_iiif_json(id), presentation_version, lazy, validation
+    )
+
+
+def stream_iiif_presentation(id: str, chunk_size: int = 65536):
+    """Stream the canvases of a large IIIF presentation manifest from a
+    filepath, or from a uri if no file exists, without loading the whole
+    document into memory.
+
+    Parameters
+    ----------
+    id : str
+        The uri or filepath of the IIIF presentation manifest.
+    chunk_size : int
+        Number of bytes to read at a time. Default is 65536.
+
+    Returns
+    -------
+    ManifestStream
+        Iterable of canvases, with manifest fields as ``header``; see
+        :class:`piffle.streaming.ManifestStream`. The file or response is
+        closed when iteration is complete, or when used as a context
+        manager.
+
+    Raises
+    ------
+    IIIFException
+        If the manifest cannot be retrieved or parsed.
+    """
+    from piffle.streaming import ManifestStream
+
     try:
-        manifest = load_manifest(id)
+        manifest = open(id, "rb")
     except FileNotFoundError:
-        manifest = get_manifest(id)
+        pass
+    else:
+        return ManifestStream(
+            iter(lambda: manifest.read(chunk_size), b""), id, manifest.close
+        )
+
+    response = get_transport().get(id, stream=True)
+    if response.status_code != HTTPStatus.OK:
+        response.close()
+        raise IIIFException(
+            f"Error retrieving manifest at {id}: {response.status_code} {response.reason}"
+        )
+    return ManifestStream(response.iter_content(chunk_size), id, response.close)
+
+
+def parse_iiif_presentation(
+    manifest: dict,
+    presentation_version: int | float | str = "infer",
+    lazy: bool = False,
+    validation: str | None = None,
+):
+    """Initialize a IIIF presentation object from loaded JSON data.
+
+    Parameters
+    ----------
+    manifest : dict
+        IIIF presentation JSON data, as returned by :func:`load_iiif_json`.
+    presentation_version : int | float | str
+        The version of the IIIF presentation (2 or 3). Default is "infer" so will automatically try to detect the version.
+    lazy : bool
+        Initialize nested lists of objects on first access. Default is
+        False.
+    validation : str | None
+        How missing fields are reported: "log" a warning for each, "report"
+        them in a single summary warning (see
+        :class:`~piffle.iiif_dataclasses.dataclass_utils.ValidationReport`),
+        or "off". Default is None, to use the current
+        :func:`~piffle.iiif_dataclasses.dataclass_utils.validation` mode
+        ("log" unless set).
+
+    Returns
+    -------
+    IIIFBase
+        The IIIF presentation object.
 
+    Raises
+    ------
+    ValueError
+        If the presentation version is not supported.
+    UnknownClassError
+        If the manifest type is not found in the IIIF presentation classes.
+    """
     if presentation_version in [3, 3.0, "3", "3.0"]:
         from .iiif_dataclasses import MANIFEST3_CLASSES
 
@@ -55,11 +196,21 @@ def load_iiif_presentation(id: str, presentation_version: int | float | str = "i
             f"Class {manifest['type']} not found in IIIF Presentation {presentation_version}"
         )
 
-    return manifest_class(**manifest)
+    from .iiif_dataclasses.dataclass_utils import lazy_parsing
+
+    if lazy:
+        with lazy_parsing():
+            return _construct(manifest_class, manifest, validation)
+    return _construct(manifest_class, manifest, validation)
 
 
-def load_iiif_image(id: str, image_version: int | float | str):
-    """Load a IIIF image.
+def load_iiif_image(
+    id: str, image_version: int | float | str, validation: str | None = None
+):
+    """Load a IIIF image. Uses the shared
+    :class:`~piffle.cache.ManifestCache`, if enabled; objects are cached
+    separately for each `validation` option, and missing fields are
+    reported when content is loaded, not for cached objects.
 
     Parameters
     ----------
@@ -67,6 +218,13 @@ def load_iiif_image(id: str, image_version: int | float | str):
         The uri or filepath of the IIIF image.
     image_version : int | float | str
         The version of the IIIF image (2 or 3).
+    validation : str | None
+        How missing fields are reported: "log" a warning for each, "report"
+        them in a single summary warning (see
+        :class:`~piffle.iiif_dataclasses.dataclass_utils.ValidationReport`),
+        or "off". Default is None, to use the current
+        :func:`~piffle.iiif_dataclasses.dataclass_utils.validation` mode
+        ("log" unless set).
 
     Returns
     -------
@@ -78,18 +236,68 @@ def load_iiif_image(id: str, image_version: int | float | str):
     ValueError
         If the image version is not supported.
     """
-    try:
-        manifest = load_manifest(id)
-    except FileNotFoundError:
-        manifest = get_manifest(id)
+    cache = get_manifest_cache()
+    if cache is not None:
+        return cache.load(
+            id,
+            lambda content, source: parse_iiif_image(
+                decode_manifest(content, source), image_version, validation
+            ),
+            key=("image", image_version, validation),
+        )
+    return parse_iiif_image(load_iiif_json(id), image_version, validation)
+
 
+def parse_iiif_image(
+    manifest: dict, image_version: int | float | str, validation: str | None = None
+):
+    """Initialize a IIIF image object from loaded JSON data.
+
+    Parameters
+    ----------
+    manifest : dict
+        IIIF image JSON data, as returned by :func:`load_iiif_json`.
+    image_version : int | float | str
+        The version of the IIIF image (2 or 3).
+    validation : str | None
+        How missing fields are reported: "log" a warning for each, "report"
+        them in a single summary warning (see
+        :class:`~piffle.iiif_dataclasses.dataclass_utils.ValidationReport`),
+        or "off". Default is None, to use the current
+        :func:`~piffle.iiif_dataclasses.dataclass_utils.validation` mode
+        ("log" unless set).
+
+    Returns
+    -------
+    IIIFBase
+        The IIIF image object.
+
+    Raises
+    ------
+    ValueError
+        If the image version is not supported.
+    """
     if image_version in [3, 3.0, "3", "3.0"]:
         from .iiif_dataclasses.image3 import Image3
 
-        return Image3(**manifest)
+        return _construct(Image3, manifest, validation)
     elif image_version in [2, 2.0, 2.1, "2", "2.0", "2.1"]:
         from .iiif_dataclasses.image2 import Image2
 
-        return Image2(**manifest)
+        return _construct(Image2, manifest, validation)
     else:
         raise ValueError(f"Image version {image_version} not supported.")
+
+
+def _construct(dataclass, manifest: dict, mode: str | None):
+    # initialize a dataclass with missing fields reported as requested;
+    # in report mode, log a single summary of missing fields
+    from .iiif_dataclasses.dataclass_utils import construct, validation
+
+    if mode is None:
+        return construct(dataclass, manifest)
+    with validation(mode) as report:
+        obj = construct(dataclass, manifest)
+    if report is not None:
+        report.log(log, manifest.get("id") or dataclass.__name__)
+    return obj
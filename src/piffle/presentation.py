@@ -1,9 +1,13 @@
 import json
 import os.path
 import urllib
+from http import HTTPStatus
 
 import addict
-import requests
+
+from piffle import utils
+from piffle.cache import get_manifest_cache
+from piffle.transport import get_transport
 
 
 class IIIFException(Exception):
@@ -68,10 +72,11 @@ class IIIFPresentation(AtDict):
     @classmethod
     def get_iiif_url(cls, url):
         """Wrapper around :meth:`requests.get` to support conditionally
-        adding an auth tokens or other parameters."""
+        adding an auth tokens or other parameters. Uses the shared
+        :class:`~piffle.transport.HTTPTransport`; configure request hooks
+        there for e.g. setting auth tokens."""
         request_options = {}
-        # TODO: need some way of configuring hooks for e.g. setting auth tokens
-        return requests.get(url, **request_options)
+        return get_transport().get(url, **request_options)
 
     @classmethod
     def from_file(cls, path):
@@ -88,7 +93,7 @@ class IIIFPresentation(AtDict):
             if the response is not JSON content, or if the JSON cannot be parsed.
         """
         response = cls.get_iiif_url(uri)
-        if response.status_code == requests.codes.ok:
+        if response.status_code == HTTPStatus.OK:
             try:
                 return cls(response.json())
             except json.decoder.JSONDecodeError as err:
@@ -110,7 +115,27 @@ class IIIFPresentation(AtDict):
 
     @classmethod
     def from_file_or_url(cls, path):
-        """Initialize :class:`IIIFPresentation` from a file or a url."""
+        """Initialize :class:`IIIFPresentation` from a file or a url. Uses
+        the shared :class:`~piffle.cache.ManifestCache`, if enabled; urls
+        are retrieved with :meth:`get_iiif_url`."""
+        cache = get_manifest_cache()
+        if cache is not None and (os.path.isfile(path) or cls.is_url(path)):
+            fetch = None
+            if cls.get_iiif_url.__func__ is not IIIFPresentation.get_iiif_url.__func__:
+                # retrieve with the customized request, without conditional
+                # request headers
+                def fetch(url, headers):
+                    return cls.get_iiif_url(url)
+
+            try:
+                return cache.load(
+                    path,
+                    lambda content, source: cls(json.loads(content)),
+                    key=cls,
+                    fetch=fetch,
+                )
+            except utils.IIIFException as err:
+                raise IIIFException(str(err)) from err
         if os.path.isfile(path):
             return cls.from_file(path)
         elif cls.is_url(path):
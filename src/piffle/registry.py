@@ -0,0 +1,165 @@
+import json
+import sqlite3
+import threading
+
+
+class ImageDimensionRegistry:
+    """Local registry of image dimensions and tile information, keyed
+    on IIIF image api endpoint and image id, so that image sizes can be
+    calculated without requesting ``info.json`` from the image server.
+    Data is stored in SQLite; use a file path to persist the registry
+    between processes, or the default in-memory database.
+
+    Use with :class:`~piffle.image.IIIFImageClient` by setting
+    :attr:`~piffle.image.IIIFImageClient.dimension_registry`::
+
+        registry = ImageDimensionRegistry("dimensions.db")
+        registry.load_images(images)
+        IIIFImageClient.dimension_registry = registry
+
+    :param path: path to SQLite database file; defaults to an in-memory
+        database
+    """
+
+    #: additional image information fields stored with dimensions
+    info_fields = ["tiles", "sizes", "profile"]
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                "  endpoint TEXT NOT NULL,"
+                "  image_id TEXT NOT NULL,"
+                "  width INTEGER NOT NULL,"
+                "  height INTEGER NOT NULL,"
+                "  info TEXT,"
+                "  PRIMARY KEY (endpoint, image_id)"
+                ")"
+            )
+
+    @staticmethod
+    def split_id(image_url):
+        """Split an image service id (url) into api endpoint and image id"""
+        api_endpoint, _, image_id = image_url.rstrip("/").rpartition("/")
+        return api_endpoint, image_id
+
+    def _row(self, api_endpoint, image_id, width, height, info):
+        info = {key: val for key, val in info.items() if val is not None}
+        return (
+            api_endpoint.rstrip("/"),
+            image_id,
+            int(width),
+            int(height),
+            json.dumps(info) if info else None,
+        )
+
+    def add(self, api_endpoint, image_id, width, height, **info):
+        """Add or update dimensions for a single image. Any additional
+        image information (e.g. tiles, sizes, profile) is stored and
+        returned with the dimensions."""
+        self.add_many([(api_endpoint, image_id, width, height, info)])
+
+    def add_many(self, images):
+        """Add or update dimensions for many images at once. Expects an
+        iterable of tuples of api endpoint, image id, width, height, and
+        an optional dictionary of additional image information."""
+        rows = (
+            self._row(*image) if len(image) == 5 else self._row(*image, {})
+            for image in images
+        )
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def load_images(self, images):
+        """Bulk load dimensions and tile information from
+        :class:`~piffle.iiif_dataclasses.image2.Image2` or
+        :class:`~piffle.iiif_dataclasses.image3.Image3` objects. Images
+        without an id or dimensions are skipped."""
+        self.add_many(
+            (
+                *self.split_id(image.id),
+                image.width,
+                image.height,
+                {field: getattr(image, field) for field in self.info_fields},
+            )
+            for image in images
+            if image.id and image.width and image.height
+        )
+
+    def load_canvases(self, canvases):
+        """Bulk load image dimensions from the image annotations on
+        IIIF Presentation 2 or 3 canvases (e.g. ``manifest.items`` or
+        ``manifest.sequences[0].canvases``). Uses the dimensions of the
+        annotation image resource when available, otherwise the
+        dimensions of the canvas. Annotations without an image service
+        are skipped."""
+        self.add_many(
+            image for canvas in canvases for image in self._canvas_images(canvas)
+        )
+
+    def _canvas_images(self, canvas):
+        # IIIF Presentation 2: canvas.images is a list of annotations
+        # with image resources; 3: canvas.items is a list of annotation
+        # pages with annotations with image bodies
+        if hasattr(canvas, "images"):
+            resources = [
+                getattr(annotation, "resource", None) for annotation in canvas.images
+            ]
+        else:
+            resources = [
+                getattr(annotation, "body", None)
+                for page in canvas.items
+                for annotation in getattr(page, "items", [])
+                if getattr(annotation, "motivation", None) in (None, "painting")
+            ]
+        for resource in resources:
+            if not isinstance(resource, dict):
+                continue
+            services = resource.get("service")
+            if isinstance(services, dict):
+                services = [services]
+            for service in services or []:
+                service_id = service.get("id") or service.get("@id")
+                width = resource.get("width") or getattr(canvas, "width", None)
+                height = resource.get("height") or getattr(canvas, "height", None)
+                if service_id and width and height:
+                    yield (
+                        *self.split_id(service_id),
+                        width,
+                        height,
+                        {"profile": service.get("profile")},
+                    )
+                    break
+
+    def get(self, api_endpoint, image_id):
+        """Return known image information as a dictionary with width,
+        height, and any additional information that was stored, or None
+        if the image is not in the registry."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT width, height, info FROM images "
+                "WHERE endpoint = ? AND image_id = ?",
+                (api_endpoint.rstrip("/"), image_id),
+            ).fetchone()
+        if row is None:
+            return None
+        width, height, info = row
+        image_info = json.loads(info) if info else {}
+        image_info.update({"width": width, "height": height})
+        return image_info
+
+    def __contains__(self, key):
+        return self.get(*key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        self._db.close()
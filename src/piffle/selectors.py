@@ -0,0 +1,338 @@
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from functools import lru_cache
+
+from piffle.image import IIIFImageClient
+
+#: region of a canvas selected by an annotation target; coordinates are
+#: canvas pixels, or percentages of the canvas if percent is true
+Selection = namedtuple(
+    "Selection", ["canvas_id", "x", "y", "width", "height", "percent"]
+)
+
+#: image painted on a canvas, with canvas and image dimensions
+CanvasImage = namedtuple(
+    "CanvasImage",
+    ["image_url", "canvas_width", "canvas_height", "image_width", "image_height"],
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_fragment(fragment):
+    """Parse a media fragment (``xywh=x,y,w,h``, optionally with
+    ``pixel:`` or ``percent:`` units, or a url ending with such a
+    fragment). Returns a tuple of x, y, width, height, and whether the
+    values are percentages; or None if there is no valid xywh fragment.
+    Results are cached."""
+    _, _, fragment = fragment.rpartition("#")
+    for param in fragment.split("&"):
+        name, _, value = param.partition("=")
+        if name != "xywh":
+            continue
+        percent = value.startswith("percent:")
+        _, _, value = value.rpartition(":")
+        try:
+            x, y, width, height = (float(coord) for coord in value.split(","))
+        except ValueError:
+            return None
+        return (x, y, width, height, percent)
+    return None
+
+
+# path commands and numbers in SVG path data
+_path_tokens = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# parameters for each path command: x and y coordinates, or - for
+# other values (arc radii and flags)
+_path_params = {
+    "M": "xy",
+    "L": "xy",
+    "T": "xy",
+    "H": "x",
+    "V": "y",
+    "C": "xyxyxy",
+    "S": "xyxy",
+    "Q": "xyxy",
+    "A": "-----xy",
+}
+
+
+def _path_points(path):
+    # points of an SVG path, including control points (so the bounding
+    # box may be larger than the drawn curve, but always contains it)
+    tokens = _path_tokens.findall(path)
+    points = []
+    x = y = start_x = start_y = 0.0
+    command = None
+    i = 0
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+            if command in "Zz":
+                x, y = start_x, start_y
+                continue
+        if command is None or command.upper() not in _path_params:
+            return points
+        params = _path_params[command.upper()]
+        values = tokens[i : i + len(params)]
+        if len(values) < len(params):
+            break
+        i += len(params)
+        relative = command.islower()
+        base_x, base_y = x, y
+        for kind, value in zip(params, values):
+            value = float(value)
+            if kind == "x":
+                x = base_x + value if relative else value
+            elif kind == "y":
+                y = base_y + value if relative else value
+            if kind == "y" or (kind == "x" and params == "x"):
+                points.append((x, y))
+        if command in "Mm":
+            start_x, start_y = x, y
+            # subsequent coordinate pairs are implicit line commands
+            command = "l" if relative else "L"
+    return points
+
+
+def _svg_points(element):
+    tag = element.tag.rpartition("}")[2]
+
+    def attr(name):
+        return float(element.get(name, 0))
+
+    if tag == "rect":
+        x, y = attr("x"), attr("y")
+        return [(x, y), (x + attr("width"), y + attr("height"))]
+    if tag in ("circle", "ellipse"):
+        cx, cy = attr("cx"), attr("cy")
+        rx = attr("r") if tag == "circle" else attr("rx")
+        ry = attr("r") if tag == "circle" else attr("ry")
+        return [(cx - rx, cy - ry), (cx + rx, cy + ry)]
+    if tag in ("polygon", "polyline"):
+        values = [
+            float(value) for value in _path_tokens.findall(element.get("points", ""))
+        ]
+        return list(zip(values[::2], values[1::2]))
+    if tag == "line":
+        return [(attr("x1"), attr("y1")), (attr("x2"), attr("y2"))]
+    if tag == "path":
+        return _path_points(element.get("d", ""))
+    return []
+
+
+@lru_cache(maxsize=4096)
+def svg_bounding_box(svg):
+    """Bounding box of the shapes in an SVG selector value, as a tuple
+    of x, y, width, and height; or None if the SVG cannot be parsed or
+    contains no shapes. Results are cached."""
+    try:
+        root = ET.fromstring(svg)
+    except ET.ParseError:
+        return None
+    points = [point for element in root.iter() for point in _svg_points(element)]
+    if not points:
+        return None
+    xs, ys = zip(*points)
+    return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+def _selector_region(selector):
+    # region for a single selector, or list or choice of selectors
+    if isinstance(selector, list):
+        for item in selector:
+            region = _selector_region(item)
+            if region is not None:
+                return region
+        return None
+    if not isinstance(selector, dict):
+        return None
+    selector_type = (selector.get("type") or selector.get("@type") or "").rpartition(
+        ":"
+    )[2]
+    if selector_type == "Choice":
+        return _selector_region([selector.get("default"), selector.get("item")])
+    value = selector.get("value") or selector.get("chars")
+    if not isinstance(value, str):
+        return None
+    if selector_type == "FragmentSelector":
+        return parse_fragment(value)
+    if selector_type == "SvgSelector":
+        bbox = svg_bounding_box(value)
+        return (*bbox, False) if bbox is not None else None
+    return None
+
+
+def _resource_id(resource):
+    if isinstance(resource, dict):
+        return resource.get("id") or resource.get("@id")
+    return resource
+
+
+def parse_target(target):
+    """Parse an annotation target (IIIF Presentation 3 ``target`` or 2
+    ``on``) into a :class:`Selection` of the targeted canvas region.
+    Supports canvas uris with ``#xywh=`` fragments, and specific
+    resources with fragment or SVG selectors (using the SVG bounding
+    box). If there is no selector, the region is None (the whole canvas);
+    if the target cannot be parsed, returns None. For lists of targets,
+    the first target is used."""
+    if isinstance(target, list):
+        target = target[0] if target else None
+    if isinstance(target, str):
+        canvas_id, _, _ = target.partition("#")
+        region = parse_fragment(target) if "#" in target else None
+        return Selection(canvas_id, *(region or (None,) * 5))
+    if not isinstance(target, dict):
+        return None
+    source = target.get("source") or target.get("full")
+    if source is None:
+        # canvas or other resource referenced by id
+        return parse_target(_resource_id(target))
+    canvas_id = _resource_id(source)
+    if not isinstance(canvas_id, str):
+        return None
+    region = _selector_region(target.get("selector"))
+    if region is None and "#" in canvas_id:
+        return parse_target(canvas_id)
+    return Selection(canvas_id, *(region or (None,) * 5))
+
+
+def _annotation_target(annotation):
+    if isinstance(annotation, dict):
+        return annotation.get("target") or annotation.get("on")
+    return getattr(annotation, "target", None) or getattr(annotation, "on", None)
+
+
+def _canvases(manifest):
+    # canvases of a IIIF Presentation 3 or 2 manifest
+    if hasattr(manifest, "sequences"):
+        return [
+            canvas for sequence in manifest.sequences for canvas in sequence.canvases
+        ]
+    return manifest.items
+
+
+def _painting_annotations(canvas):
+    if hasattr(canvas, "images"):
+        return canvas.images
+    return [
+        annotation
+        for page in getattr(canvas, "items", [])
+        for annotation in getattr(page, "items", [])
+        if getattr(annotation, "motivation", None) in (None, "painting")
+    ]
+
+
+def canvas_images(manifest):
+    """Index the images painted on the canvases of a IIIF Presentation 2
+    or 3 manifest. Returns a dictionary of canvas id to
+    :class:`CanvasImage`. Image dimensions are taken from the image
+    resource, or the canvas if not available; canvases without an image
+    service are skipped."""
+    images = {}
+    for canvas in _canvases(manifest):
+        canvas_width = getattr(canvas, "width", None)
+        canvas_height = getattr(canvas, "height", None)
+        for annotation in _painting_annotations(canvas):
+            try:
+                image_url = annotation.get_image_url()
+            except (KeyError, IndexError, TypeError, AttributeError):
+                continue
+            resource = getattr(annotation, "resource", None) or getattr(
+                annotation, "body", None
+            )
+            if not isinstance(resource, dict):
+                resource = {}
+            images[canvas.id] = CanvasImage(
+                image_url,
+                canvas_width,
+                canvas_height,
+                resource.get("width") or canvas_width,
+                resource.get("height") or canvas_height,
+            )
+            break
+    return images
+
+
+def canvas_annotations(manifest):
+    """Non-painting annotations on the canvases of a IIIF Presentation 2
+    or 3 manifest (embedded annotation lists or pages only)."""
+    for canvas in _canvases(manifest):
+        for content in getattr(canvas, "otherContent", None) or getattr(
+            canvas, "annotations", []
+        ):
+            if hasattr(content, "collect_annotations"):
+                yield from content.collect_annotations()
+
+
+def crop_clients(manifest, targets=None, **options):
+    """Generate :class:`~piffle.image.IIIFImageClient` crops for
+    annotations on the canvases of a manifest, e.g. to display search
+    results. The manifest is indexed once; target selectors are parsed
+    (with caching) and canvas coordinates are scaled to image
+    coordinates. Annotations that target a canvas without an image, or
+    that cannot be parsed, are skipped. Yields tuples of annotation and
+    image client.
+
+    :param manifest: IIIF Presentation 2 or 3 manifest
+    :param targets: optional iterable of annotations (dataclasses or
+        dictionaries with a ``target`` or ``on``); defaults to the
+        annotations embedded in the manifest
+    :param options: image request options for every crop (size,
+        rotation, quality, fmt), as for
+        :class:`~piffle.image.IIIFImageClient`
+    """
+    images = canvas_images(manifest)
+    # one client per image, copied for each crop
+    clients = {}
+    if targets is None:
+        targets = canvas_annotations(manifest)
+    for annotation in targets:
+        selection = parse_target(_annotation_target(annotation))
+        if selection is None or selection.canvas_id not in images:
+            continue
+        image = images[selection.canvas_id]
+        client = clients.get(selection.canvas_id)
+        if client is None:
+            api_endpoint, _, image_id = image.image_url.rstrip("/").rpartition("/")
+            client = clients[selection.canvas_id] = IIIFImageClient(
+                api_endpoint, image_id, **options
+            )
+        crop = client.get_copy()
+        if selection.x is not None:
+            if selection.percent:
+                crop.region.set_options(
+                    x=selection.x,
+                    y=selection.y,
+                    width=selection.width,
+                    height=selection.height,
+                    percent=True,
+                )
+            else:
+                # scale canvas coordinates to image coordinates, when both
+                # canvas and image dimensions are known
+                scale_x = _scale(image.image_width, image.canvas_width)
+                scale_y = _scale(image.image_height, image.canvas_height)
+                crop.region.set_options(
+                    x=round(selection.x * scale_x),
+                    y=round(selection.y * scale_y),
+                    width=round(selection.width * scale_x),
+                    height=round(selection.height * scale_y),
+                )
+        yield annotation, crop
+
+
+def _scale(image_size, canvas_size):
+    # scale from canvas to image coordinates for one axis
+    if image_size and canvas_size:
+        return image_size / canvas_size
+    return 1
+
+
+def crop_urls(manifest, targets=None, **options):
+    """Generate crop urls for annotations on the canvases of a manifest;
+    same as :func:`crop_clients`, but yields tuples of annotation and url."""
+    for annotation, crop in crop_clients(manifest, targets, **options):
+        yield annotation, str(crop)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+
+from piffle.utils import IIIFException, format_manifest
+
+# json whitespace
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+#: arrays that are streamed instead of decoded as part of the header:
+#: canvases of a IIIF Presentation 3 manifest (``items``), and of each
+#: sequence of a IIIF Presentation 2 manifest (``sequences``/``canvases``)
+STREAMED_FIELDS = {"items": None, "sequences": {"canvases": None}}
+
+
+class ManifestStream:
+    """
+    Incrementally parse a IIIF Presentation 2 or 3 manifest, yielding
+    one canvas at a time. The document is read in chunks and decoded one
+    JSON value at a time, so memory use is bounded by the largest single
+    canvas (or header field) rather than the whole manifest.
+
+    Iterating yields :class:`~piffle.iiif_dataclasses.presentation3.Canvas3`
+    or :class:`~piffle.iiif_dataclasses.presentation2.Canvas2` objects.
+    Top-level manifest fields other than canvases are available as
+    :attr:`header`, which includes the fields read so far; fields that
+    follow the canvases in the document (e.g. ``structures``) are only
+    available once iteration is complete. For IIIF Presentation 2, the
+    header includes ``sequences`` without their canvases.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes or str
+        The manifest JSON, e.g. file or HTTP response content. Bytes
+        are decoded as UTF-8.
+    source : str
+        Name of the source, for error messages.
+    close : callable | None
+        Called to release the source when iteration is complete or the
+        stream is closed.
+    """
+
+    def __init__(self, chunks, source="manifest", close=None):
+        self.source = source
+        self._chunks = iter(chunks)
+        self._close = close
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder(object_hook=format_manifest)
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._header = {}
+        self._started = False
+
+    @property
+    def header(self) -> dict:
+        """Manifest fields read so far, excluding canvases, with keys
+        formatted by :func:`piffle.utils.format_manifest`."""
+        return _format_header(self._header, STREAMED_FIELDS)
+
+    def __iter__(self):
+        if self._started:
+            raise IIIFException("Manifest stream can only be iterated once")
+        self._started = True
+        from piffle.load_iiif import parse_iiif_presentation
+
+        try:
+            for item in self._members(self._header, STREAMED_FIELDS):
+                yield parse_iiif_presentation(item)
+            if self._peek() != "":
+                self._error("Extra data after manifest")
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the source"""
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _members(self, target, streamed):
+        # parse the members of an object into target, yielding elements
+        # of streamed arrays instead of storing them
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                self._error("Expecting property name")
+            self._expect(":")
+            if key in streamed and self._peek() == "[":
+                nested = streamed[key]
+                headers = target[key] = []
+                for _i in self._elements():
+                    if nested is None:
+                        yield self._value()
+                    elif self._peek() == "{":
+                        header = {}
+                        headers.append(header)
+                        yield from self._members(header, nested)
+                    else:
+                        headers.append(self._value())
+                if nested is None:
+                    # streamed elements are not part of the header
+                    del target[key]
+            else:
+                target[key] = self._value()
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                self._error("Expecting ',' delimiter")
+
+    def _elements(self):
+        # iterate over the elements of an array; the caller consumes
+        # each element
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self._peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                self._error("Expecting ',' delimiter")
+
+    def _value(self):
+        # decode a single JSON value at the current position, reading
+        # more content until the value is complete
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as err:
+                if self._eof:
+                    raise IIIFException(f"Error parsing JSON for {self.source}: {err}")
+            else:
+                # a number at the end of the buffer may continue in the
+                # next chunk
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            # read until the unparsed content doubles, so values larger
+            # than a chunk are not decoded once per chunk
+            self._read(2 * (len(self._buffer) - self._pos))
+
+    def _peek(self):
+        # skip whitespace and return the next character, or an empty
+        # string at the end of the document
+        while True:
+            self._pos = _whitespace.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos : self._pos + 1]
+            self._read()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def _read(self, size=1):
+        # discard parsed content and read chunks until at least size
+        # characters are unparsed or the document is read
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size or length == len(self._buffer):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                parts.append(self._decoder.decode(b"", final=True))
+                self._eof = True
+                break
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            parts.append(chunk)
+            length += len(chunk)
+        self._buffer = "".join(parts)
+
+    def _error(self, message):
+        raise IIIFException(
+            f"Error parsing JSON for {self.source}: {message} "
+            f"(near {self._buffer[self._pos : self._pos + 20]!r})"
+        )
+
+
+def _format_header(header, streamed):
+    # format keys of the header and any nested headers of streamed arrays;
+    # copied, since format_manifest returns objects with no keys to
+    # format as they are
+    formatted = dict(format_manifest(header))
+    for key, nested in streamed.items():
+        if nested is not None and isinstance(formatted.get(key), list):
+            formatted[key] = [
+                _format_header(item, nested) if isinstance(item, dict) else item
+                for item in formatted[key]
+            ]
+    return formatted
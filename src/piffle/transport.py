@@ -0,0 +1,282 @@
+import asyncio
+import time
+import weakref
+from urllib.parse import urlparse
+
+from piffle import instrumentation
+
+
+class HTTPTransport:
+    """HTTP transport shared by everything in piffle that retrieves
+    content over HTTP (image information, presentation manifests).
+    Wraps a :class:`requests.Session`, so connections are pooled and
+    kept alive between requests to the same host, and adds default
+    timeouts and retries.
+
+    To customize requests (e.g. for authentication), configure
+    default headers or auth, or add a request hook; hooks are called
+    with the url and a dictionary of request options, which they may
+    modify::
+
+        def add_token(url, options):
+            if url.startswith("https://private.example.com/"):
+                options.setdefault("headers", {})["Authorization"] = "Bearer ..."
+
+        set_transport(HTTPTransport(request_hooks=[add_token]))
+
+    :param pool_connections: number of hosts to keep connection pools for
+    :param pool_maxsize: maximum number of connections to keep per host
+    :param timeout: default timeout in seconds, as a single value or a
+        tuple of connect and read timeouts
+    :param retries: number of times to retry failed connections and
+        temporary server errors
+    :param backoff_factor: backoff factor between retries
+    :param headers: optional dictionary of headers to send with every request
+    :param auth: optional auth to use for every request (any auth supported
+        by :mod:`requests`)
+    :param request_hooks: optional list of request hooks
+    :param session: optional :class:`requests.Session` to use instead of
+        creating a new one
+    """
+
+    #: status codes for temporary server errors that should be retried
+    retry_status_codes = (502, 503, 504)
+
+    def __init__(
+        self,
+        pool_connections=10,
+        pool_maxsize=10,
+        timeout=(5, 30),
+        retries=3,
+        backoff_factor=0.5,
+        headers=None,
+        auth=None,
+        request_hooks=None,
+        session=None,
+    ):
+        # requests is imported when a transport is first needed, so that
+        # piffle modules can be imported without loading it
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.request_hooks = list(request_hooks or [])
+        self.session = session if session is not None else requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.retry_status_codes,
+            allowed_methods=["GET", "HEAD"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        if auth is not None:
+            self.session.auth = auth
+
+    def get(self, url, **options):
+        """Make a GET request with the shared session; takes the same
+        options as :meth:`requests.Session.get`. Returns a
+        :class:`requests.Response`."""
+        options.setdefault("timeout", self.timeout)
+        for hook in self.request_hooks:
+            hook(url, options)
+        if not instrumentation.collectors:
+            return self.session.get(url, **options)
+
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **options)
+        except Exception as err:
+            instrumentation.record(
+                "http.request",
+                time.perf_counter() - start,
+                host=host,
+                error=err.__class__.__name__,
+            )
+            raise
+        instrumentation.record(
+            "http.request",
+            time.perf_counter() - start,
+            host=host,
+            status=response.status_code,
+        )
+        return response
+
+    def close(self):
+        """Close the session and any pooled connections"""
+        self.session.close()
+
+
+class AsyncHTTPTransport:
+    """Asynchronous counterpart of :class:`HTTPTransport`, used by
+    :mod:`piffle.aio`. Wraps an :class:`httpx.AsyncClient` (install with
+    ``pip install piffle[httpx]``), so requests are made on the event
+    loop without a thread each, with pooled connections, default
+    timeouts, retries, headers, auth, and request hooks as for
+    :class:`HTTPTransport`. Redirects are followed, as with
+    :mod:`requests`.
+
+    Connections cannot be shared between event loops, so a client is
+    created for each event loop the transport is used with; call
+    :meth:`aclose` before the event loop is closed (e.g. at the end of
+    the coroutine run with :func:`asyncio.run`) to close its
+    connections.
+
+    :param max_connections: maximum number of connections open at once
+    :param timeout: default timeout in seconds, as a single value or a
+        tuple of connect and read timeouts
+    :param retries: number of times to retry failed connections and
+        temporary server errors
+    :param backoff_factor: backoff factor between retries
+    :param headers: optional dictionary of headers to send with every request
+    :param auth: optional auth to use for every request (any auth supported
+        by :mod:`httpx`)
+    :param request_hooks: optional list of request hooks, called with the
+        url and a dictionary of request options, which they may modify
+    """
+
+    #: status codes for temporary server errors that should be retried
+    retry_status_codes = HTTPTransport.retry_status_codes
+
+    def __init__(
+        self,
+        max_connections=10,
+        timeout=(5, 30),
+        retries=3,
+        backoff_factor=0.5,
+        headers=None,
+        auth=None,
+        request_hooks=None,
+    ):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx is not installed; install piffle[httpx]")
+
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.request_hooks = list(request_hooks or [])
+        self._limits = httpx.Limits(max_connections=max_connections)
+        self._client_options = dict(
+            timeout=timeout, headers=headers, auth=auth, follow_redirects=True
+        )
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        # client for the running event loop
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # connection failures are retried by the httpx transport
+            transport = httpx.AsyncHTTPTransport(
+                retries=self.retries, limits=self._limits
+            )
+            client = self._clients[loop] = httpx.AsyncClient(
+                transport=transport, **self._client_options
+            )
+        return client
+
+    async def get(self, url, **options):
+        """Make a GET request; takes the same options as
+        :meth:`httpx.AsyncClient.get`. Returns an :class:`httpx.Response`.
+        Temporary server errors are retried with increasing delays."""
+        for hook in self.request_hooks:
+            hook(url, options)
+        client = self._client()
+        for attempt in range(self.retries + 1):
+            response = await self._get(client, url, options)
+            if (
+                response.status_code not in self.retry_status_codes
+                or attempt == self.retries
+            ):
+                return response
+            await asyncio.sleep(self.backoff_factor * 2**attempt)
+
+    async def _get(self, client, url, options):
+        if not instrumentation.collectors:
+            return await client.get(url, **options)
+
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, **options)
+        except Exception as err:
+            instrumentation.record(
+                "http.request",
+                time.perf_counter() - start,
+                host=host,
+                error=err.__class__.__name__,
+            )
+            raise
+        instrumentation.record(
+            "http.request",
+            time.perf_counter() - start,
+            host=host,
+            status=response.status_code,
+        )
+        return response
+
+    async def aclose(self):
+        """Close the client for the running event loop and its pooled
+        connections"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_transport = None
+_async_transport = None
+
+
+def get_transport():
+    """Return the shared :class:`HTTPTransport`, creating one with
+    default settings if none has been set."""
+    global _transport
+    if _transport is None:
+        _transport = HTTPTransport()
+    return _transport
+
+
+def set_transport(transport):
+    """Set the shared :class:`HTTPTransport` used for all requests (e.g.
+    to configure pool sizes, timeouts, or authentication, or to use a
+    stand-in for testing). Returns the previous transport, if any. Use
+    None to reset to a default transport."""
+    global _transport
+    previous = _transport
+    _transport = transport
+    return previous
+
+
+def get_async_transport():
+    """Return the shared :class:`AsyncHTTPTransport`, creating one with
+    default settings if none has been set."""
+    global _async_transport
+    if _async_transport is None:
+        _async_transport = AsyncHTTPTransport()
+    return _async_transport
+
+
+def set_async_transport(transport):
+    """Set the shared :class:`AsyncHTTPTransport` used by
+    :mod:`piffle.aio`. Returns the previous transport, if any. Use None
+    to reset to a default transport."""
+    global _async_transport
+    previous = _async_transport
+    _async_transport = transport
+    return previous
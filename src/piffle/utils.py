@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import functools
 import json
+import time
+from http import HTTPStatus
 
-import requests
+from piffle import instrumentation
+from piffle.transport import get_transport
 
 
 class IIIFException(Exception):
     """Custom exception for IIIF errors"""
 
 
-def format_manifest(d: dict):
+def _format_keys(d: dict):
     formatted = {}
     for k, v in d.items():
         if k.startswith("@"):
@@ -22,11 +26,175 @@ def format_manifest(d: dict):
     return formatted
 
 
+# key rewriting plans, by the keys of a decoded object in order; see
+# _key_plan. Objects of the same kind have the same keys, so a manifest
+# needs only a handful of plans
+_key_plans = {}
+_key_plans_maxsize = 4096
+
+
+def _key_plan(keys: tuple):
+    # determine how format_manifest rewrites objects with these keys:
+    # None if no keys change; otherwise the formatted keys, and the
+    # field lists to insert (with their positions) among the values.
+    # Objects where formatted keys collide are rewritten key by key.
+    formatted = _format_keys(dict(zip(keys, range(len(keys)))))
+    if tuple(formatted) == keys:
+        plan = None
+    elif len(formatted) - len(keys) != sum(
+        isinstance(value, list) for value in formatted.values()
+    ):
+        plan = _format_keys
+    else:
+        fields = tuple(
+            (index, value)
+            for index, value in enumerate(formatted.values())
+            if isinstance(value, list)
+        )
+        plan = (tuple(formatted), fields)
+    if len(_key_plans) >= _key_plans_maxsize:
+        _key_plans.clear()
+    _key_plans[keys] = plan
+    return plan
+
+
+def format_manifest(d: dict):
+    """Format the keys of a decoded JSON object for use as dataclass
+    fields: a leading ``@`` or ``_`` is removed, and the formatted names
+    are listed in ``_at_fields`` and ``_underscore_fields``. Objects
+    with no keys to format are returned unchanged; rewriting is planned
+    once per distinct set of keys, so formatting a large manifest with
+    many objects of the same kind is a table lookup per object."""
+    keys = tuple(d)
+    try:
+        plan = _key_plans[keys]
+    except KeyError:
+        plan = _key_plan(keys)
+    if plan is None:
+        return d
+    if plan is _format_keys:
+        return _format_keys(d)
+    formatted_keys, fields = plan
+    values = list(d.values())
+    for index, field_list in fields:
+        values.insert(index, field_list.copy())
+    return dict(zip(formatted_keys, values))
+
+
+def _format_objects(data, object_hook):
+    # apply object_hook to every object in already decoded json,
+    # replacing objects in their containers
+    if type(data) is dict:
+        data = object_hook(data)
+    stack = [data]
+    while stack:
+        container = stack.pop()
+        items = container.items() if type(container) is dict else enumerate(container)
+        for key, value in items:
+            if type(value) is dict:
+                formatted = object_hook(value)
+                if formatted is not value:
+                    container[key] = formatted
+                stack.append(formatted)
+            elif type(value) is list:
+                stack.append(value)
+    return data
+
+
+#: JSON decoding backends for manifests; see :func:`set_json_backend`
+JSON_BACKENDS = ("json", "orjson")
+
+_json_backend = "json"
+
+
+@functools.cache
+def _import_orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def get_json_backend() -> str:
+    """Return the name of the JSON backend used to decode manifests."""
+    return _json_backend
+
+
+def set_json_backend(backend: str) -> str:
+    """Set the JSON backend used to decode manifests loaded from files
+    or urls. Returns the previous backend.
+
+    - ``json`` (default): the standard library decoder, with keys
+      formatted by :func:`format_manifest` as each object is decoded
+    - ``orjson``: decode with :mod:`orjson` (must be installed), then
+      format keys of the decoded objects. Decoding is faster, but
+      formatting keys afterwards takes about as long as the standard
+      decoder's per-object call, so for manifests with ``@context``,
+      ``@id`` or ``_`` keys it is no faster overall; compare with
+      ``benchmarks/bench_json.py`` for your content.
+
+    :param backend: one of :data:`JSON_BACKENDS`
+    """
+    global _json_backend
+    if backend not in JSON_BACKENDS:
+        raise ValueError(
+            f"Unknown JSON backend {backend!r}; expected one of {JSON_BACKENDS}"
+        )
+    if backend == "orjson" and _import_orjson() is None:
+        raise ImportError("orjson is not installed")
+    previous = _json_backend
+    _json_backend = backend
+    return previous
+
+
+def _decode_json(data: bytes | str, object_hook):
+    if _json_backend == "orjson":
+        return _format_objects(_import_orjson().loads(data), object_hook)
+    return json.loads(data, object_hook=object_hook)
+
+
+def decode_manifest(data: bytes | str, source: str = "manifest"):
+    """Decode manifest JSON content with the configured JSON backend,
+    with keys formatted by :func:`format_manifest`. Raises
+    :class:`json.JSONDecodeError` if the content is not valid JSON."""
+    # when instrumented, record decoding and key formatting times separately
+    if not instrumentation.collectors:
+        return _decode_json(data, format_manifest)
+
+    format_time = 0.0
+    objects = 0
+
+    def object_hook(d: dict):
+        nonlocal format_time, objects
+        start = time.perf_counter()
+        formatted = format_manifest(d)
+        format_time += time.perf_counter() - start
+        objects += 1
+        return formatted
+
+    start = time.perf_counter()
+    data = _decode_json(data, object_hook)
+    duration = time.perf_counter() - start
+    instrumentation.record("json.decode", duration - format_time, source=source)
+    instrumentation.record(
+        "format_manifest", format_time, source=source, objects=objects
+    )
+    return data
+
+
 def get_manifest(url: str):
-    response = requests.get(url)
-    if response.status_code == requests.codes.ok:
+    return decode_response(url, get_transport().get(url), decode_manifest)
+
+
+def decode_response(url: str, response, decode):
+    """Decode the content of a response for a manifest or other IIIF
+    JSON with the specified decode function, called with the response
+    content and url. Raises :class:`IIIFException` if the request was
+    not successful or the content cannot be decoded."""
+    if response.status_code == HTTPStatus.OK:
         try:
-            return response.json(object_hook=format_manifest)
+            return decode(response.content, url)
         except json.decoder.JSONDecodeError as err:
             # if json fails, two possibilities:
             # - we didn't actually get json (e.g. redirect for auth)
@@ -35,11 +203,13 @@ def get_manifest(url: str):
             # - there is something wrong with the json
             raise IIIFException(f"Error parsing JSON for {url}: {err}")
 
+    # httpx responses (see piffle.aio) have reason_phrase instead of reason
+    reason = getattr(response, "reason", None) or getattr(response, "reason_phrase", "")
     raise IIIFException(
-        f"Error retrieving manifest at {url}: {response.status_code} {response.reason}"
+        f"Error retrieving manifest at {url}: {response.status_code} {reason}"
     )
 
 
 def load_manifest(path: str):
-    with open(path) as manifest:
-        return json.load(manifest, object_hook=format_manifest)
+    with open(path, "rb") as manifest:
+        return decode_manifest(manifest.read(), path)
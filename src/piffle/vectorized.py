@@ -0,0 +1,216 @@
+"""NumPy-backed batch canonicalization and rendering of IIIF image
+region and size options, for generating large numbers of image urls
+(e.g. crops for detected regions) without initializing a client and
+canonicalizing options one image at a time. Requires numpy; install
+with ``pip install piffle[numpy]``.
+
+Regions and sizes are represented as named tuples of arrays, with
+the same fields as :class:`~piffle.image.ImageRegion` and
+:class:`~piffle.image.ImageSize` options; missing sizes and percentages
+are represented as 0. Results match the scalar
+:meth:`~piffle.image.ImageRegion.canonicalize` and
+:meth:`~piffle.image.ImageSize.canonicalize` exactly::
+
+    crops = regions(x, y, w, h, percent=True)
+    crops = canonicalize_regions(crops, image_widths, image_heights)
+    thumbs = canonicalize_sizes(sizes(width=200), image_widths, image_heights)
+    urls = render_urls(api_endpoint, image_ids, crops, thumbs)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from piffle.image import IIIFImageClient
+
+#: arrays of region options; coordinates are floats
+Regions = namedtuple(
+    "Regions", ["full", "square", "x", "y", "width", "height", "percent"]
+)
+#: arrays of size options; width and height are integers, 0 if unset
+Sizes = namedtuple(
+    "Sizes", ["full", "max", "width", "height", "percent", "exact", "upscaled"]
+)
+
+
+def regions(x=0, y=0, width=0, height=0, percent=False, square=False, full=False):
+    """Initialize :class:`Regions` from arrays or scalars, which are
+    broadcast to the same shape."""
+    arrays = np.broadcast_arrays(
+        *np.atleast_1d(x, y, width, height, percent, square, full)
+    )
+    x, y, width, height, percent, square, full = arrays
+    return Regions(
+        full=full.astype(bool),
+        square=square.astype(bool),
+        x=x.astype(float),
+        y=y.astype(float),
+        width=width.astype(float),
+        height=height.astype(float),
+        percent=percent.astype(bool),
+    )
+
+
+def sizes(
+    width=0, height=0, percent=0, exact=False, max=False, full=False, upscaled=False
+):
+    """Initialize :class:`Sizes` from arrays or scalars, which are
+    broadcast to the same shape."""
+    arrays = np.broadcast_arrays(
+        *np.atleast_1d(width, height, percent, exact, max, full, upscaled)
+    )
+    width, height, percent, exact, max_, full, upscaled = arrays
+    return Sizes(
+        full=full.astype(bool),
+        max=max_.astype(bool),
+        width=width.astype(np.int64),
+        height=height.astype(np.int64),
+        percent=percent.astype(float),
+        exact=exact.astype(bool),
+        upscaled=upscaled.astype(bool),
+    )
+
+
+def _broadcast(options, image_width, image_height):
+    # broadcast options and image dimensions to the same shape
+    *fields, image_width, image_height = np.broadcast_arrays(
+        *options, image_width, image_height
+    )
+    return options._make(fields), image_width.astype(float), image_height.astype(float)
+
+
+def canonicalize_regions(region, image_width, image_height):
+    """Canonicalize :class:`Regions` against arrays (or scalars) of image
+    dimensions; equivalent to
+    :meth:`piffle.image.ImageRegion.canonicalize`. Returns new
+    :class:`Regions`."""
+    region, image_width, image_height = _broadcast(region, image_width, image_height)
+    full = region.full
+    square = region.square & ~full
+    percent = region.percent & ~full & ~square
+
+    # square regions of square images are full; otherwise center the
+    # square on the long edge
+    square_image = image_width == image_height
+    full = full | (square & square_image)
+    square = square & ~square_image
+    short_edge = np.minimum(image_width, image_height)
+    wide = image_height == short_edge
+    x = np.where(square & wide, (image_width - short_edge) / 2, region.x)
+    y = np.where(square & ~wide, (image_height - short_edge) / 2, region.y)
+    x = np.where(square & ~wide, 0, x)
+    y = np.where(square & wide, 0, y)
+    width = np.where(square, short_edge, region.width)
+    height = np.where(square, short_edge, region.height)
+
+    # convert percentages to pixels, truncated as with int()
+    x = np.where(percent, np.trunc(x / 100 * image_width), x)
+    y = np.where(percent, np.trunc(y / 100 * image_height), y)
+    width = np.where(percent, np.trunc(width / 100 * image_width), width)
+    height = np.where(percent, np.trunc(height / 100 * image_height), height)
+
+    return Regions(
+        full=full,
+        square=np.zeros_like(square),
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        percent=np.zeros_like(percent),
+    )
+
+
+def canonicalize_sizes(size, image_width, image_height):
+    """Canonicalize :class:`Sizes` against arrays (or scalars) of image
+    dimensions; equivalent to :meth:`piffle.image.ImageSize.canonicalize`.
+    Returns new :class:`Sizes`."""
+    size, image_width, image_height = _broadcast(size, image_width, image_height)
+    active = ~size.full & ~size.max
+    percent = active & (size.percent != 0)
+    exact = active & ~percent & size.exact
+    height_only = active & ~percent & ~exact & (size.height != 0) & (size.width == 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # percentage of image dimensions
+        scale = np.where(percent, size.percent / 100, 0.0)
+        # exact: best fit, preserving aspect ratio
+        exact_scale = np.minimum(size.width / image_width, size.height / image_height)
+        scale = np.where(exact, exact_scale, scale)
+        # height only: scale to width only
+        scale = np.where(height_only, size.height / image_height, scale)
+        # truncated as with int()
+        scaled_width = np.trunc(image_width * scale)
+        scaled_height = np.trunc(image_height * scale)
+
+    converted = percent | exact
+    width = np.where(converted | height_only, scaled_width, size.width)
+    height = np.where(converted, scaled_height, size.height)
+    height = np.where(height_only, 0, height)
+
+    return Sizes(
+        full=size.full,
+        max=size.max,
+        width=width.astype(np.int64),
+        height=height.astype(np.int64),
+        percent=np.where(percent, 0.0, size.percent),
+        exact=size.exact & ~exact,
+        upscaled=size.upscaled,
+    )
+
+
+def render_regions(region):
+    """Render :class:`Regions` as a list of IIIF region strings, as
+    :class:`~piffle.image.ImageRegion` does."""
+    return [
+        "full"
+        if full
+        else "square"
+        if square
+        else f"{'pct:' if percent else ''}{x:g},{y:g},{w:g},{h:g}"
+        for full, square, x, y, w, h, percent in zip(
+            *(field.tolist() for field in region)
+        )
+    ]
+
+
+def render_sizes(size):
+    """Render :class:`Sizes` as a list of IIIF size strings, as
+    :class:`~piffle.image.ImageSize` does."""
+    rendered = []
+    for full, max_, w, h, percent, exact, upscaled in zip(
+        *(field.tolist() for field in size)
+    ):
+        if full:
+            rendered.append("full")
+            continue
+        upscaled = "^" if upscaled else ""
+        if max_:
+            rendered.append(f"{upscaled}max")
+        elif percent:
+            rendered.append(f"{upscaled}pct:{percent:g}")
+        else:
+            exact = "!" if exact else ""
+            rendered.append(f"{upscaled}{exact}{w or ''},{h or ''}")
+    return rendered
+
+
+def render_urls(
+    api_endpoint,
+    image_ids,
+    region,
+    size,
+    rotation="0",
+    quality="default",
+    fmt=IIIFImageClient.default_format,
+):
+    """Generate IIIF image urls for arrays of image ids, regions and sizes
+    that share the same api endpoint, rotation, quality and format.
+    Returns a generator of url strings."""
+    prefix = "{}/".format(api_endpoint.rstrip("/"))
+    suffix = f"/{rotation}/{quality}.{fmt}"
+    return (
+        f"{prefix}{image_id}/{region_str}/{size_str}{suffix}"
+        for image_id, region_str, size_str in zip(
+            image_ids, render_regions(region), render_sizes(size)
+        )
+    )
@@ -0,0 +1,214 @@
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+from piffle.image import IIIFImageClient, ImageSize
+from piffle.transport import get_transport
+
+log = logging.getLogger(__name__)
+
+
+class WarmSummary:
+    """Summary of a cache warming run: number of requests, bytes
+    received, request latencies, and failures (keyed on url)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.latencies = []
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def record(self, url, latency, size=0, error=None):
+        """Record the result of a single request"""
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+            self.latencies.append(latency)
+            if error is not None:
+                self.failures[url] = error
+
+    @property
+    def succeeded(self):
+        "Number of successful requests"
+        return self.requests - len(self.failures)
+
+    @property
+    def mean_latency(self):
+        "Mean request latency in seconds"
+        return statistics.fmean(self.latencies) if self.latencies else 0.0
+
+    @property
+    def max_latency(self):
+        "Maximum request latency in seconds"
+        return max(self.latencies, default=0.0)
+
+    def latency_percentile(self, percent):
+        """Request latency in seconds at the specified percentile (1-99)"""
+        if len(self.latencies) < 2:
+            return self.max_latency
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[
+            percent - 1
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.requests} requests, {len(self.failures)} failed, "
+            f"{self.bytes} bytes; latency mean {self.mean_latency * 1000:.1f} ms, "
+            f"p95 {self.latency_percentile(95) * 1000:.1f} ms, "
+            f"max {self.max_latency * 1000:.1f} ms"
+        )
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self}>"
+
+
+class HostRateLimiter:
+    """Thread-safe rate limiter that spaces requests to the same host
+    at least `1 / rate` seconds apart.
+
+    :param rate: maximum requests per second per host
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until a request to the host for this url is allowed"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class CacheWarmer:
+    """Request derivative images for every image in a IIIF manifest or
+    collection, so that they are cached by the image server before
+    users request them. Images are found via the painting annotations
+    of a :class:`~piffle.iiif_dataclasses.presentation2.Manifest2`,
+    :class:`~piffle.iiif_dataclasses.presentation3.Manifest3`, or
+    collection (anything with ``collect_annotations``); each configured
+    size, and optionally every tile at selected scale factors, is
+    requested through the shared :class:`~piffle.transport.HTTPTransport`::
+
+        warmer = CacheWarmer(sizes=["!200,200", "1000,"], scale_factors=[4, 8])
+        summary = warmer.warm(manifest)
+
+    Urls are generated lazily and at most `max_in_flight` requests are
+    queued or in progress at once, so collections with many images and
+    tiles do not need to fit in memory.
+
+    :param sizes: list of IIIF size strings to request for each image
+    :param tiles: request tiles, based on image information from the
+        image server
+    :param scale_factors: optional list of scale factors to request tiles
+        for; by default, all scale factors (implies `tiles`)
+    :param quality: image quality
+    :param fmt: image format
+    :param max_workers: number of concurrent requests
+    :param max_in_flight: maximum number of queued or in-progress requests;
+        defaults to twice `max_workers`
+    :param rate: optional maximum number of requests per second per host
+    """
+
+    def __init__(
+        self,
+        sizes=("!200,200",),
+        tiles=False,
+        scale_factors=None,
+        quality="default",
+        fmt=IIIFImageClient.default_format,
+        max_workers=8,
+        max_in_flight=None,
+        rate=None,
+    ):
+        # validate sizes up front rather than once per image
+        for size in sizes:
+            ImageSize.parse_options(size)
+        self.sizes = list(sizes)
+        self.tiles = tiles or scale_factors is not None
+        self.scale_factors = scale_factors
+        self.quality = quality
+        self.fmt = fmt
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or max_workers * 2
+        self.rate_limiter = HostRateLimiter(rate) if rate else None
+
+    @staticmethod
+    def image_urls(iiif):
+        """Unique image service urls for the painting annotations of a
+        manifest or collection, in order. Annotations without an image
+        service are skipped."""
+        seen = set()
+        for annotation in iiif.collect_annotations():
+            try:
+                image_url = annotation.get_image_url()
+            except (KeyError, IndexError, TypeError, AttributeError):
+                continue
+            if image_url and image_url not in seen:
+                seen.add(image_url)
+                yield image_url
+
+    def derivative_urls(self, iiif, summary=None):
+        """Generate the urls to request for a manifest or collection.
+        If a summary is specified, failures to retrieve image
+        information for tiles are recorded on it."""
+        for image_url in self.image_urls(iiif):
+            api_endpoint, _, image_id = image_url.rstrip("/").rpartition("/")
+            img = IIIFImageClient(
+                api_endpoint, image_id, quality=self.quality, fmt=self.fmt
+            )
+            for size in self.sizes:
+                img.size.parse(size)
+                yield str(img)
+            if self.tiles:
+                start = time.perf_counter()
+                try:
+                    img.image_info
+                except (requests.RequestException, ValueError) as err:
+                    log.warning(f"Failed to retrieve image information: {err}")
+                    if summary is not None:
+                        summary.record(
+                            img.info(), time.perf_counter() - start, error=str(err)
+                        )
+                    continue
+                yield from img.tile_urls(scale_factors=self.scale_factors)
+
+    def fetch(self, url, summary):
+        """Request a single url and record the result on the summary"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(url)
+        start = time.perf_counter()
+        size = 0
+        error = None
+        try:
+            with get_transport().get(url, stream=True) as response:
+                for chunk in response.iter_content(chunk_size=65536):
+                    size += len(chunk)
+                if response.status_code >= 400:
+                    error = f"{response.status_code} {response.reason}"
+        except requests.RequestException as err:
+            error = str(err)
+        summary.record(url, time.perf_counter() - start, size, error)
+
+    def warm(self, iiif):
+        """Request all derivative urls for a manifest or collection.
+        Returns a :class:`WarmSummary`."""
+        summary = WarmSummary()
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for url in self.derivative_urls(iiif, summary):
+                in_flight.acquire()
+                future = executor.submit(self.fetch, url, summary)
+                future.add_done_callback(lambda _future: in_flight.release())
+        return summary
@@ -0,0 +1,100 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from piffle.image import IIIFImageClient
+from piffle.transport import (
+    AsyncHTTPTransport,
+    HTTPTransport,
+    set_async_transport,
+    set_transport,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_image_caches():
+    # image information is cached across clients; make sure
+    # tests do not see image information retrieved by other tests
+    if IIIFImageClient.info_cache is not None:
+        IIIFImageClient.info_cache.clear()
+    if IIIFImageClient.cache_key_cache is not None:
+        IIIFImageClient.cache_key_cache.clear()
+    yield
+
+
+class LocalServer(ThreadingHTTPServer):
+    """Local stand-in HTTP server for tests. Serves responses configured
+    in :attr:`routes`, keyed on path, and records request paths and
+    headers in :attr:`requests`."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), LocalRequestHandler)
+        self.routes = {}
+        self.requests = []
+
+    def url(self, path=""):
+        return f"http://127.0.0.1:{self.server_port}/{path.lstrip('/')}"
+
+    def add_json(self, path, data, status=200, headers=None):
+        """Serve data as JSON at the specified path"""
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        self.routes[path] = (status, headers, json.dumps(data).encode())
+
+
+class LocalRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        response = self.server.routes.get(self.path)
+        if callable(response):
+            response = response(self)
+        status, headers, body = response or (404, {}, b"Not Found")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # don't log requests to stderr
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """Local HTTP server running in a background thread"""
+    server = LocalServer()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def transport():
+    """Shared HTTP transport for tests, without retries or delays"""
+    test_transport = HTTPTransport(retries=0, timeout=5)
+    previous = set_transport(test_transport)
+    yield test_transport
+    set_transport(previous)
+    test_transport.close()
+
+
+@pytest.fixture
+def async_transport():
+    """Shared asynchronous HTTP transport for tests, without retries or
+    delays"""
+    pytest.importorskip("httpx")
+    test_transport = AsyncHTTPTransport(retries=0, timeout=5)
+    previous = set_async_transport(test_transport)
+    yield test_transport
+    set_async_transport(previous)
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from piffle import aio
+from piffle.cache import ManifestCache, set_manifest_cache
+from piffle.iiif_dataclasses.dataclass_utils import LazyList
+from piffle.iiif_dataclasses.image3 import Image3
+from piffle.iiif_dataclasses.presentation2 import Manifest2
+from piffle.iiif_dataclasses.presentation3 import Annotation3
+from piffle.image import IIIFImageClient
+from piffle.transport import AsyncHTTPTransport, get_async_transport
+from piffle.utils import IIIFException
+
+httpx = pytest.importorskip("httpx")
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+sample_image_info = {
+    "@context": "http://iiif.io/api/image/3/context.json",
+    "id": "img1",
+    "type": "ImageService3",
+    "protocol": "http://iiif.io/api/image",
+    "profile": "level1",
+    "width": 100,
+    "height": 200,
+}
+
+
+def run(coro, transport=None):
+    # run in a new event loop, closing the transport's connections for it
+    async def main():
+        try:
+            return await coro
+        finally:
+            await (transport or get_async_transport()).aclose()
+
+    return asyncio.run(main())
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name)) as fixture:
+        return json.load(fixture)
+
+
+def test_fetch_image_info(http_server, async_transport):
+    http_server.add_json("/iiif/img1/info.json", sample_image_info)
+    img = IIIFImageClient(http_server.url("iiif"), "img1")
+    info = run(aio.fetch_image_info(img))
+    assert info == sample_image_info
+    # set on the client, so no further requests are made
+    assert img.image_width == 100
+    # available to other clients from the shared cache
+    other = IIIFImageClient(http_server.url("iiif"), "img1")
+    assert run(aio.fetch_image_info(other)) == sample_image_info
+    assert len(http_server.requests) == 1
+
+    img = IIIFImageClient(http_server.url("iiif"), "missing")
+    with pytest.raises(httpx.HTTPStatusError):
+        run(aio.fetch_image_info(img))
+
+
+def test_fetch_image_info_combined(http_server, async_transport):
+    http_server.add_json("/iiif/img1/info.json", sample_image_info)
+    images = [IIIFImageClient(http_server.url("iiif"), "img1") for _ in range(3)]
+
+    async def fetch_all():
+        return await asyncio.gather(*(aio.fetch_image_info(img) for img in images))
+
+    assert run(fetch_all()) == [sample_image_info] * 3
+    # concurrent requests for the same image are combined
+    assert len(http_server.requests) == 1
+
+
+def test_load_iiif_presentation(http_server, async_transport):
+    http_server.add_json("/manifest2.json", load_fixture("manifest2.json"))
+    http_server.add_json("/annotation3.json", load_fixture("annotation3.json"))
+    manifest = run(aio.load_iiif_presentation(http_server.url("manifest2.json")))
+    assert isinstance(manifest, Manifest2)
+    annotation = run(aio.load_iiif_presentation(http_server.url("annotation3.json"), 3))
+    assert isinstance(annotation, Annotation3)
+
+    # local files are supported too
+    manifest = run(
+        aio.load_iiif_presentation(os.path.join(FIXTURE_DIR, "manifest2.json"))
+    )
+    assert isinstance(manifest, Manifest2)
+
+    with pytest.raises(IIIFException, match="404 Not Found"):
+        run(aio.load_iiif_presentation(http_server.url("missing.json")))
+
+
+def piffle_records(caplog):
+    return [record for record in caplog.records if record.name.startswith("piffle")]
+
+
+def test_load_iiif_presentation_options(http_server, async_transport, caplog):
+    # the manifest sequence has no id
+    http_server.add_json("/manifest2.json", load_fixture("manifest2.json"))
+    url = http_server.url("manifest2.json")
+    lazy = run(aio.load_iiif_presentation(url, lazy=True, validation="off"))
+    assert isinstance(lazy.sequences, LazyList)
+    assert not piffle_records(caplog)
+    run(aio.load_iiif_presentation(url, validation="report"))
+    (record,) = piffle_records(caplog)
+    assert "Sequence.id (1)" in record.getMessage()
+
+
+def test_load_cached(http_server, async_transport):
+    content = json.dumps(load_fixture("manifest2.json")).encode()
+
+    def etag_route(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return (304, {"ETag": '"v1"'}, b"")
+        return (200, {"Content-Type": "application/json", "ETag": '"v1"'}, content)
+
+    http_server.routes["/manifest2.json"] = etag_route
+    url = http_server.url("manifest2.json")
+    cache = ManifestCache(ttl=0)
+    previous = set_manifest_cache(cache)
+    try:
+        manifest = run(aio.load_iiif_presentation(url))
+        assert run(aio.load_iiif_presentation(url)) is manifest
+    finally:
+        set_manifest_cache(previous)
+    # revalidated with a conditional request
+    assert http_server.requests[1][1]["If-None-Match"] == '"v1"'
+    assert cache.misses == 1
+
+
+def test_load_iiif_image(http_server, async_transport):
+    http_server.add_json("/iiif/img1/info.json", sample_image_info)
+    image = run(aio.load_iiif_image(http_server.url("iiif/img1/info.json"), 3))
+    assert isinstance(image, Image3)
+    assert image.width == 100
+
+
+def test_gather_bounded(http_server, async_transport):
+    # track the number of concurrent requests handled by the server
+    lock = threading.Lock()
+    active = []
+    max_active = []
+
+    def slow_response(handler):
+        with lock:
+            active.append(1)
+            max_active.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        info = {**sample_image_info, "id": handler.path}
+        return (200, {"Content-Type": "application/json"}, json.dumps(info).encode())
+
+    paths = [f"/iiif/img{i}/info.json" for i in range(8)]
+    for path in paths:
+        http_server.routes[path] = slow_response
+
+    images = run(
+        aio.gather_bounded(
+            aio.load_iiif_image, [http_server.url(path) for path in paths], 3, limit=3
+        )
+    )
+    # results are returned in order
+    assert [image.id for image in images] == paths
+    assert max(max_active) <= 3
+    assert max(max_active) > 1
+
+    # requests do not use worker threads, so are not limited by the
+    # default executor
+    async def gather_one_thread():
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=1)
+        )
+        return await aio.gather_bounded(
+            aio.load_iiif_image, [http_server.url(path) for path in paths], 3, limit=4
+        )
+
+    max_active.clear()
+    assert len(run(gather_one_thread())) == len(paths)
+    assert max(max_active) > 1
+
+    # exceptions can be returned instead of raised
+    results = run(
+        aio.gather_bounded(
+            aio.load_iiif_image,
+            [http_server.url(paths[0]), http_server.url("missing")],
+            3,
+            return_exceptions=True,
+        )
+    )
+    assert isinstance(results[0], Image3)
+    assert isinstance(results[1], IIIFException)
+
+
+def test_retries(http_server):
+    responses = iter([(503, {}, b"")] * 2)
+
+    def unavailable(handler):
+        response = next(responses, None)
+        if response is None:
+            return (200, {"Content-Type": "application/json"}, b"{}")
+        return response
+
+    http_server.routes["/info.json"] = unavailable
+    transport = AsyncHTTPTransport(retries=2, backoff_factor=0)
+    response = run(transport.get(http_server.url("info.json")), transport)
+    assert response.status_code == 200
+    assert len(http_server.requests) == 3
@@ -0,0 +1,281 @@
+import json
+import os
+import shutil
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from piffle import presentation
+from piffle.cache import LRUCache, ManifestCache, set_manifest_cache
+from piffle.iiif_dataclasses.image3 import Image3
+from piffle.iiif_dataclasses.presentation2 import Manifest2
+from piffle.load_iiif import load_iiif_image, load_iiif_presentation
+from piffle.utils import IIIFException
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+
+class TestLRUCache:
+    def test_get_set(self):
+        cache = LRUCache()
+        assert cache.get("a") is None
+        assert cache.get("a", "default") == "default"
+        assert cache.misses == 2
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.hits == 1
+        assert "a" in cache
+        assert len(cache) == 1
+
+        cache.delete("a")
+        assert "a" not in cache
+        # deleting a missing key is not an error
+        cache.delete("a")
+
+    def test_maxsize(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # access a so that b is least recently used
+        cache.get("a")
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+        # unbounded
+        cache = LRUCache(maxsize=None)
+        for i in range(1000):
+            cache.set(i, i)
+        assert len(cache) == 1000
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.hits == 0
+        assert cache.misses == 0
+        assert "0 hits" in repr(cache)
+
+    @patch("piffle.cache.time")
+    def test_ttl(self, mocktime):
+        mocktime.monotonic.return_value = 100
+        cache = LRUCache(ttl=10)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        mocktime.monotonic.return_value = 109
+        assert "a" in cache
+        # expired
+        mocktime.monotonic.return_value = 110
+        assert "a" not in cache
+        assert cache.get("a") is None
+        assert cache.misses == 1
+        assert len(cache) == 0
+
+
+@pytest.fixture
+def manifest_cache():
+    """Shared manifest cache for tests"""
+    cache = ManifestCache(ttl=60)
+    previous = set_manifest_cache(cache)
+    yield cache
+    set_manifest_cache(previous)
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    path = str(tmp_path / "manifest2.json")
+    shutil.copy(os.path.join(FIXTURE_DIR, "manifest2.json"), path)
+    return path
+
+
+def etag_route(data, etag):
+    # serve data with an ETag, and 304 Not Modified for conditional
+    # requests with a matching ETag
+    def route(handler):
+        if handler.headers.get("If-None-Match") == etag:
+            return (304, {"ETag": etag}, b"")
+        return (200, {"Content-Type": "application/json", "ETag": etag}, data)
+
+    return route
+
+
+class TestManifestCache:
+    def test_file(self, manifest_cache, manifest_path):
+        manifest = load_iiif_presentation(manifest_path)
+        assert isinstance(manifest, Manifest2)
+        assert load_iiif_presentation(manifest_path) is manifest
+        assert manifest_cache.hits == 1
+        assert manifest_cache.misses == 1
+        # loaded differently from the same content
+        assert load_iiif_presentation(manifest_path, lazy=True) is not manifest
+        assert len(manifest_cache) == 2
+        assert load_iiif_presentation(manifest_path, validation="off") is not manifest
+        assert len(manifest_cache) == 3
+
+        # modified file is reloaded
+        with open(manifest_path) as manifest_file:
+            data = json.load(manifest_file)
+        data["label"] = "Modified"
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(data, manifest_file)
+        stat = os.stat(manifest_path)
+        os.utime(manifest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+        modified = load_iiif_presentation(manifest_path)
+        assert modified is not manifest
+        assert modified.label == "Modified"
+
+        manifest_cache.invalidate(manifest_path)
+        assert len(manifest_cache) == 0
+        assert manifest_cache.size == 0
+
+    def test_validation(self, manifest_cache, manifest_path, caplog):
+        # the manifest sequence has no id
+        unchecked = load_iiif_presentation(manifest_path, lazy=True, validation="off")
+        unchecked.sequences[0]
+        assert not caplog.records
+        # loaded separately for another validation mode, so that lazy
+        # lists report missing fields as requested
+        manifest = load_iiif_presentation(manifest_path, lazy=True)
+        assert manifest is not unchecked
+        manifest.sequences[0]
+        assert "missing 'id'" in caplog.records[0].getMessage()
+
+        # reported when loaded, not for cached objects
+        caplog.clear()
+        manifest = load_iiif_presentation(manifest_path, validation="report")
+        (record,) = caplog.records
+        assert record.validation_report.total == 1
+        caplog.clear()
+        assert load_iiif_presentation(manifest_path, validation="report") is manifest
+        assert not caplog.records
+
+    def test_url(self, manifest_cache, http_server, transport):
+        with open(os.path.join(FIXTURE_DIR, "manifest2.json"), "rb") as manifest:
+            content = manifest.read()
+        http_server.routes["/manifest.json"] = etag_route(content, '"v1"')
+        url = http_server.url("manifest.json")
+        manifest = load_iiif_presentation(url)
+        assert load_iiif_presentation(url) is manifest
+        # reused without a request until the time to live expires
+        assert len(http_server.requests) == 1
+
+        with patch("piffle.cache.time") as mocktime:
+            # expired; revalidated with a conditional request
+            mocktime.monotonic.return_value = time.monotonic() + 120
+            assert load_iiif_presentation(url) is manifest
+            assert len(http_server.requests) == 2
+            assert http_server.requests[1][1]["If-None-Match"] == '"v1"'
+            assert manifest_cache.hits == 2
+
+            # changed content is reloaded
+            mocktime.monotonic.return_value += 120
+            http_server.routes["/manifest.json"] = etag_route(content, '"v2"')
+            assert load_iiif_presentation(url) is not manifest
+            assert manifest_cache.misses == 2
+
+        # content without an ETag is reloaded when expired
+        http_server.add_json("/image.json", {"id": "img", "type": "ImageService3"})
+        manifest_cache.ttl = 0
+        image = load_iiif_image(http_server.url("image.json"), 3)
+        assert isinstance(image, Image3)
+        assert load_iiif_image(http_server.url("image.json"), 3) is not image
+
+    def test_errors_not_cached(self, manifest_cache, http_server, transport):
+        url = http_server.url("manifest.json")
+        with pytest.raises(IIIFException, match="404"):
+            load_iiif_presentation(url)
+        http_server.routes["/manifest.json"] = (
+            200,
+            {"Content-Type": "text/html"},
+            b"<html></html>",
+        )
+        with pytest.raises(IIIFException, match="No JSON found"):
+            load_iiif_presentation(url)
+        assert len(manifest_cache) == 0
+        http_server.add_json("/manifest.json", {"type": "Manifest", "id": url})
+        assert load_iiif_presentation(url).id == url
+
+    def test_limits(self, manifest_path):
+        cache = ManifestCache(maxsize=2)
+        for key in range(3):
+            cache.load(manifest_path, lambda content, source: content, key=key)
+        assert len(cache) == 2
+        assert cache.size == 2 * os.path.getsize(manifest_path)
+
+        cache = ManifestCache(max_bytes=os.path.getsize(manifest_path) * 3 // 2)
+        for key in range(3):
+            cache.load(manifest_path, lambda content, source: content, key=key)
+        assert len(cache) == 1
+        assert "1 hits" not in repr(cache)
+
+        # content larger than the budget is not cached
+        cache = ManifestCache(max_bytes=10)
+        cache.load(manifest_path, lambda content, source: content)
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_concurrent(self, manifest_path):
+        cache = ManifestCache()
+        calls = []
+
+        def parse(content, source):
+            calls.append(source)
+            time.sleep(0.05)
+            return object()
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.load(manifest_path, parse))
+            )
+            for _i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+
+    def test_iiif_presentation(self, manifest_cache, http_server, transport):
+        path = os.path.join(FIXTURE_DIR, "manifest2.json")
+        pres = presentation.IIIFPresentation.from_file_or_url(path)
+        assert presentation.IIIFPresentation.from_file_or_url(path) is pres
+        assert pres.type == "sc:Manifest"
+        with pytest.raises(presentation.IIIFException, match="404"):
+            presentation.IIIFPresentation.from_file_or_url(http_server.url("missing"))
+        with pytest.raises(presentation.IIIFException, match="File not found"):
+            presentation.IIIFPresentation.from_file_or_url("missing.json")
+
+    def test_iiif_presentation_get_iiif_url(
+        self, manifest_cache, http_server, transport
+    ):
+        requested = []
+
+        class TokenPresentation(presentation.IIIFPresentation):
+            @classmethod
+            def get_iiif_url(cls, url):
+                requested.append(url)
+                return transport.get(url, headers={"Authorization": "Bearer token"})
+
+        http_server.add_json("/manifest.json", {"@type": "sc:Manifest"})
+        url = http_server.url("manifest.json")
+        pres = TokenPresentation.from_file_or_url(url)
+        assert pres.type == "sc:Manifest"
+        assert requested == [url]
+        assert http_server.requests[0][1]["Authorization"] == "Bearer token"
+        assert TokenPresentation.from_file_or_url(url) is pres
+
+    def test_disabled(self, manifest_path):
+        manifest = load_iiif_presentation(manifest_path)
+        assert load_iiif_presentation(manifest_path) is not manifest
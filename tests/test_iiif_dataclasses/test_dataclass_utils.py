@@ -0,0 +1,207 @@
+import copy
+import logging
+import os
+import pickle
+
+import pytest
+
+from piffle.iiif_dataclasses.dataclass_utils import (
+    LazyList,
+    ValidationReport,
+    lazy_parsing,
+    parse_item,
+    parse_items,
+    validation,
+)
+from piffle.iiif_dataclasses.presentation3 import AnnotationPage3, Canvas3
+from piffle.load_iiif import load_iiif_presentation
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class Parser:
+    def __init__(self):
+        self.parsed = []
+
+    def __call__(self, item):
+        self.parsed.append(item)
+        return item * 10
+
+
+class TestLazyList:
+    def test_access(self):
+        parse = Parser()
+        items = LazyList([1, 2, 3, 4], parse)
+        assert len(items) == 4
+        assert not items.materialized
+        assert items[1] == 20
+        assert items[-1] == 40
+        # parsed once, then cached
+        assert items[1] == 20
+        assert parse.parsed == [2, 4]
+        assert items[:2] == [10, 20]
+        assert parse.parsed == [2, 4, 1]
+        with pytest.raises(IndexError):
+            items[4]
+        assert list(reversed(items)) == [40, 30, 20, 10]
+        assert items.materialized
+        assert parse.parsed == [2, 4, 1, 3]
+
+    def test_iterate(self):
+        parse = Parser()
+        items = LazyList([1, 2, 3], parse)
+        iterator = iter(items)
+        assert next(iterator) == 10
+        assert parse.parsed == [1]
+        assert list(items) == [10, 20, 30]
+        assert parse.parsed == [1, 2, 3]
+
+    def test_materializing(self):
+        items = LazyList([1, 2, 3], Parser())
+        assert items == [10, 20, 30]
+        assert items.materialized
+        assert isinstance(items, list)
+
+        for operation, expected in [
+            (lambda items: 20 in items, True),
+            (lambda items: items.index(30), 2),
+            (lambda items: items + [1], [10, 20, 30, 1]),
+            (lambda items: items.copy(), [10, 20, 30]),
+            (lambda items: copy.deepcopy(items), [10, 20, 30]),
+            (lambda items: pickle.loads(pickle.dumps(items)), [10, 20, 30]),
+            (lambda items: repr(items), "[10, 20, 30]"),
+        ]:
+            assert operation(LazyList([1, 2, 3], Parser())) == expected
+
+        items = LazyList([1, 2, 3], Parser())
+        items.append(4)
+        items.insert(0, 5)
+        assert list(items) == [5, 10, 20, 30, 4]
+        del items[0]
+        items[0] = 0
+        assert items == [0, 20, 30, 4]
+
+    def test_lazy_operands(self):
+        # other lazy lists are parsed too
+        assert LazyList([1, 2], Parser()) == LazyList([1, 2], Parser())
+        assert LazyList([1], Parser()) + LazyList([2], Parser()) == [10, 20]
+        assert [1] + LazyList([2], Parser()) == [1, 20]
+        items = LazyList([1], Parser())
+        items += LazyList([2], Parser())
+        items.extend(LazyList([3], Parser()))
+        assert list.__eq__(items, [10, 20, 30])
+
+    def test_without_parse(self):
+        items = LazyList(item for item in [1, 2])
+        assert items.materialized
+        assert items == [1, 2]
+        assert LazyList() == []
+
+    def test_empty(self):
+        items = LazyList([], Parser())
+        assert items.materialized
+        assert items == []
+
+
+class TestParseItems:
+    page = {
+        "id": "http://example.com/page/1",
+        "type": "AnnotationPage",
+        "items": [],
+    }
+
+    def test_eager(self):
+        pages = parse_items([self.page], parse_item, dataclass=AnnotationPage3)
+        assert type(pages) is list
+        assert isinstance(pages[0], AnnotationPage3)
+
+    def test_lazy(self):
+        with lazy_parsing():
+            pages = parse_items([self.page], parse_item, dataclass=AnnotationPage3)
+        assert isinstance(pages, LazyList)
+        assert isinstance(pages[0], AnnotationPage3)
+        # lists in lazily parsed items are lazy
+        assert isinstance(pages[0].items, LazyList)
+
+        with lazy_parsing(), lazy_parsing(False):
+            pages = parse_items([self.page], parse_item, dataclass=AnnotationPage3)
+        assert type(pages) is list
+
+    def test_lazy_canvas(self):
+        canvas = {
+            "id": "http://example.com/canvas/1",
+            "type": "Canvas",
+            "items": [self.page],
+        }
+        with lazy_parsing():
+            lazy_canvas = Canvas3(**canvas)
+        assert lazy_canvas == Canvas3(**canvas)
+
+
+class TestValidation:
+    # annotation page without id or type, in a canvas without id
+    canvas = {
+        "type": "Canvas",
+        "items": [{"items": []}, {"items": []}],
+    }
+
+    def test_report(self):
+        report = ValidationReport(samples=2)
+        for id in ["a", "b", "c", None]:
+            report.add("Canvas", "label", id)
+        report.add("Range", "type")
+        assert report.total == 5
+        assert len(report) == 2
+        assert report.as_dict() == {
+            "Canvas": {"label": {"count": 4, "samples": ["a", "b"]}},
+            "Range": {"type": {"count": 1, "samples": []}},
+        }
+        assert report.summary() == "Canvas.label (4), Range.type (1)"
+        assert "5 missing fields" in repr(report)
+
+    def test_modes(self, caplog):
+        with caplog.at_level(logging.WARNING):
+            Canvas3(**self.canvas)
+        assert "PlaceholderCanvas is missing 'id' field." in caplog.messages
+        assert caplog.messages.count("AnnotationPage is missing 'id' field.") == 2
+
+        caplog.clear()
+        with caplog.at_level(logging.WARNING), validation() as report:
+            Canvas3(**self.canvas)
+        assert caplog.messages == []
+        assert report.counts[("AnnotationPage", "type")] == 2
+        assert report.counts[("PlaceholderCanvas", "id")] == 1
+
+        with caplog.at_level(logging.WARNING), validation("off") as report:
+            Canvas3(**self.canvas)
+        assert report is None
+        assert caplog.messages == []
+
+        with pytest.raises(ValueError):
+            with validation("strict"):
+                pass
+
+    def test_lazy(self, caplog):
+        with validation() as report, lazy_parsing():
+            canvas = Canvas3(**self.canvas)
+        assert ("AnnotationPage", "id") not in report.counts
+        # lazily initialized items are reported as when the list was created
+        with caplog.at_level(logging.WARNING):
+            canvas.items[0]
+        assert caplog.messages == []
+        assert report.counts[("AnnotationPage", "id")] == 1
+
+    def test_load(self, caplog):
+        path = os.path.join(FIXTURE_DIR, "manifest2.json")
+        with caplog.at_level(logging.WARNING):
+            manifest = load_iiif_presentation(path, validation="report")
+        (record,) = caplog.records
+        assert record.getMessage() == (
+            f"Missing fields in {manifest.id}: Sequence.id (1)"
+        )
+        assert record.validation_report.counts == {("Sequence", "id"): 1}
+
+        caplog.clear()
+        with caplog.at_level(logging.WARNING):
+            load_iiif_presentation(path, validation="off")
+        assert caplog.records == []
@@ -1,12 +1,15 @@
-import json
 import os
+from dataclasses import asdict
 from unittest.mock import patch
 
 import pytest
 import requests
 
+from piffle.iiif_dataclasses.dataclass_utils import LazyList
 from piffle.iiif_dataclasses.presentation2 import IIIFPresentation2, Manifest2
-from piffle.utils import IIIFException, format_manifest
+from piffle.image import IIIFImageClientException
+from piffle.load_iiif import load_iiif_presentation
+from piffle.utils import IIIFException
 
 FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
@@ -28,12 +31,12 @@ class TestIIIFPresentation2:
 
     def test_from_url(self):
         manifest_url = "http://ma.ni/fe.st"
-        with open(self.test_manifest) as manifest:
-            data = json.load(manifest, object_hook=format_manifest)
-        with patch("piffle.utils.requests.get") as mock_get:
+        with open(self.test_manifest, "rb") as manifest:
+            content = manifest.read()
+        with patch("piffle.transport.HTTPTransport.get") as mock_get:
             mockresponse = mock_get.return_value
             mockresponse.status_code = requests.codes.ok
-            mockresponse.json.return_value = data
+            mockresponse.content = content
             pres = IIIFPresentation2.from_url(manifest_url)
             assert pres.type == "sc:Manifest"
             mock_get.assert_called_with(manifest_url)
@@ -52,9 +55,7 @@ class TestIIIFPresentation2:
                 mockresponse.status_code = requests.codes.ok
                 # content type header does not indicate json
                 mockresponse.headers = {"content-type": "text/html"}
-                mockresponse.json.side_effect = json.decoder.JSONDecodeError(
-                    "err", "doc", 1
-                )
+                mockresponse.content = b"<html>Log in</html>"
                 IIIFPresentation2.from_url(manifest_url)
             assert "No JSON found" in str(excinfo.value)
 
@@ -62,9 +63,7 @@ class TestIIIFPresentation2:
             with pytest.raises(IIIFException) as excinfo:
                 # content type header indicates json, but parsing failed
                 mockresponse.headers = {"content-type": "application/json"}
-                mockresponse.json.side_effect = json.decoder.JSONDecodeError(
-                    "err", "doc", 1
-                )
+                mockresponse.content = b'{"id": "http://ma.ni/fe.st",'
                 IIIFPresentation2.from_url(manifest_url)
             assert "Error parsing JSON" in str(excinfo.value)
 
@@ -132,3 +131,48 @@ class TestIIIFPresentation2:
         )
         pres.label = "unlisted single title"
         assert pres.first_label == pres.label
+
+    def test_get_image_client(self):
+        pres = IIIFPresentation2.load(self.test_manifest)
+        canvas = pres.sequences[0].canvases[0]
+        image_id = (
+            "service:gmd:gmd397m:g3974m:g3974am:g3974am_g000031927:00003_1927-0001"
+        )
+        # image information from the resource; no request needed
+        with patch("piffle.image.get_transport") as mock_get_transport:
+            img = canvas.get_image_client()
+            assert img.api_endpoint == "https://tile.loc.gov/image-services/iiif"
+            assert img.image_id == image_id
+            assert img.image_info == {
+                "width": 1730,
+                "height": 2042,
+                "@context": "http://iiif.io/api/image/2/context.json",
+                "profile": "http://iiif.io/api/image/2/level2.json",
+            }
+            assert str(img.size(height=1021).canonicalize()).endswith(
+                "/full/865,/0/default.jpg"
+            )
+            assert canvas.images[0].get_image_client().image_info == img.image_info
+            mock_get_transport.assert_not_called()
+
+        canvas.images = []
+        with pytest.raises(IIIFImageClientException):
+            canvas.get_image_client()
+
+    def test_load_lazy(self):
+        pres = load_iiif_presentation(self.test_manifest, lazy=True)
+        assert isinstance(pres.sequences, LazyList)
+        assert not pres.sequences.materialized
+        canvas = pres.sequences[0].canvases[0]
+        assert canvas.label == "Page 1"
+        assert not pres.sequences[0].canvases.materialized
+        assert pres == IIIFPresentation2.load(self.test_manifest)
+        assert load_iiif_presentation(
+            self.test_manifest, lazy=True
+        ) == load_iiif_presentation(self.test_manifest, lazy=True)
+
+    def test_asdict_lazy(self):
+        # asdict rebuilds lists with the type of the original list
+        assert asdict(load_iiif_presentation(self.test_manifest, lazy=True)) == asdict(
+            load_iiif_presentation(self.test_manifest)
+        )
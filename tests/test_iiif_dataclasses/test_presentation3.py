@@ -1,4 +1,3 @@
-import json
 import os
 from unittest.mock import patch
 
@@ -8,10 +7,12 @@ import requests
 from piffle.iiif_dataclasses.presentation3 import (
     Annotation3,
     AnnotationPage3,
+    Canvas3,
     GeoreferenceAnnotation3,
     IIIFPresentation3,
 )
-from piffle.utils import IIIFException, format_manifest
+from piffle.image import IIIFImageClientException
+from piffle.utils import IIIFException
 
 FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
@@ -63,12 +64,12 @@ class TestIIIFPresentation3:
 
     def test_from_url(self):
         manifest_url = "http://ma.ni/fe.st"
-        with open(self.test_annotation) as manifest:
-            data = json.load(manifest, object_hook=format_manifest)
-        with patch("piffle.utils.requests.get") as mock_get:
+        with open(self.test_annotation, "rb") as manifest:
+            content = manifest.read()
+        with patch("piffle.transport.HTTPTransport.get") as mock_get:
             mockresponse = mock_get.return_value
             mockresponse.status_code = requests.codes.ok
-            mockresponse.json.return_value = data
+            mockresponse.content = content
             pres = IIIFPresentation3.load(manifest_url)
             assert pres.type == "Annotation"
             mock_get.assert_called_with(manifest_url)
@@ -87,9 +88,7 @@ class TestIIIFPresentation3:
                 mockresponse.status_code = requests.codes.ok
                 # content type header does not indicate json
                 mockresponse.headers = {"content-type": "text/html"}
-                mockresponse.json.side_effect = json.decoder.JSONDecodeError(
-                    "err", "doc", 1
-                )
+                mockresponse.content = b"<html>Log in</html>"
                 IIIFPresentation3.load(manifest_url)
             assert "No JSON found" in str(excinfo.value)
 
@@ -97,9 +96,7 @@ class TestIIIFPresentation3:
             with pytest.raises(IIIFException) as excinfo:
                 # content type header indicates json, but parsing failed
                 mockresponse.headers = {"content-type": "application/json"}
-                mockresponse.json.side_effect = json.decoder.JSONDecodeError(
-                    "err", "doc", 1
-                )
+                mockresponse.content = b'{"id": "http://ma.ni/fe.st",'
                 IIIFPresentation3.load(manifest_url)
             assert "Error parsing JSON" in str(excinfo.value)
 
@@ -205,3 +202,77 @@ class TestIIIFPresentation3:
         assert pres.first_label == pres.label[0]
         pres.label = "unlisted single title"
         assert pres.first_label == pres.label
+
+    def test_get_image_url(self):
+        # georeference annotation: image service is the target source
+        pres = IIIFPresentation3.load(self.test_annotation)
+        assert pres.get_image_url() == (
+            "https://dlc.services/iiif-img/7/4/26174d19-1d4f-4dcb-9920-4c1692c18fe0"
+        )
+        # painting annotation: image service on the body
+        annotation = Annotation3(
+            id="http://example.com/annotation/1",
+            type="Annotation",
+            motivation="painting",
+            target="http://example.com/canvas/1",
+            body={
+                "id": "http://example.com/iiif/img1/full/max/0/default.jpg",
+                "type": "Image",
+                "service": [{"id": "http://example.com/iiif/img1"}],
+            },
+        )
+        assert annotation.get_image_url() == "http://example.com/iiif/img1"
+        annotation.body["service"] = {"id": "http://example.com/iiif/img2"}
+        assert annotation.get_image_url() == "http://example.com/iiif/img2"
+
+    def test_get_image_client(self):
+        body = {
+            "id": "http://example.com/iiif/img1/full/max/0/default.jpg",
+            "type": "Image",
+            "width": 2000,
+            "height": 1000,
+            "service": [
+                {"id": "http://example.com/iiif/img1", "type": "ImageService3"}
+            ],
+        }
+        canvas = Canvas3(
+            id="http://example.com/canvas/1",
+            type="Canvas",
+            width=400,
+            height=200,
+            items=[
+                {
+                    "id": "http://example.com/page/1",
+                    "type": "AnnotationPage",
+                    "items": [
+                        {
+                            "id": "http://example.com/annotation/1",
+                            "type": "Annotation",
+                            "motivation": "painting",
+                            "target": "http://example.com/canvas/1",
+                            "body": body,
+                        }
+                    ],
+                }
+            ],
+        )
+        with patch("piffle.image.get_transport") as mock_get_transport:
+            img = canvas.get_image_client()
+            assert str(img) == ("http://example.com/iiif/img1/full/full/0/default.jpg")
+            assert img.image_info == {
+                "width": 2000,
+                "height": 1000,
+                "@context": "http://iiif.io/api/image/3/context.json",
+            }
+            assert str(img.region(square=True).canonicalize()) == (
+                "http://example.com/iiif/img1/500,0,1000,1000/full/0/default.jpg"
+            )
+            mock_get_transport.assert_not_called()
+
+        # canvas dimensions are used when the body has none
+        del body["width"], body["height"]
+        assert canvas.get_image_client().image_info["width"] == 400
+
+        body["service"] = []
+        with pytest.raises(IIIFImageClientException):
+            canvas.get_image_client()
@@ -1,9 +1,15 @@
-from unittest.mock import patch
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
 
 import pytest
 import requests
 
 from piffle import image
+from piffle.cache import LRUCache
+from piffle.iiif_dataclasses.image2 import Image2
+from piffle.iiif_dataclasses.image3 import Image3
 
 api_endpoint = "http://imgserver.co"
 image_id = "img1"
@@ -174,6 +180,127 @@ class TestIIIFImageClient:
         # original image object should be unchanged, and still show defaults
         assert f"{api_endpoint}/{image_id}/full/full/0/default.jpg" == str(img)
 
+    def test_get_copy(self):
+        img = image.IIIFImageClient.init_from_url(VALID_URLS["complex"])
+        img.image_info = sample_image_info
+        clone = img.get_copy()
+        assert clone is not img
+        assert str(clone) == str(img)
+        # components are copied and associated with the new image
+        for component in ["region", "size", "rotation"]:
+            assert getattr(clone, component) is not getattr(img, component)
+            assert getattr(clone, component).img is clone
+            assert (
+                getattr(clone, component).as_dict() == getattr(img, component).as_dict()
+            )
+        # previously retrieved image info is preserved
+        assert clone.image_info == sample_image_info
+
+        # modifying the copy does not change the original
+        clone.size.set_options(width=100)
+        clone.region.parse("full")
+        clone.image_options["fmt"] = "png"
+        assert str(img) == VALID_URLS["complex"]
+
+        # subclass attributes are preserved
+        class CustomImageClient(image.IIIFImageClient):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.custom = "value"
+
+        img = CustomImageClient(api_endpoint, image_id)
+        clone = img.size(width=100)
+        assert isinstance(clone, CustomImageClient)
+        assert clone.custom == "value"
+
+    def test_cached_url(self):
+        img = image.IIIFImageClient.init_from_url(VALID_URLS["complex"])
+        url = str(img)
+        assert url == VALID_URLS["complex"]
+        # rendered url is cached
+        assert str(img) is url
+        info_url = img.info()
+        assert img.info() is info_url
+
+        # cached url is cleared when any image request option changes
+        img.region.set_options(x=0, y=0, width=10, height=20)
+        assert str(img) == f"{api_endpoint}/{image_id}/0,0,10,20/256,/!90/default.jpg"
+        img.region.parse("full")
+        img.size.parse("max")
+        img.rotation.parse("180")
+        assert str(img) == f"{api_endpoint}/{image_id}/full/max/180/default.jpg"
+        img.size.parse("full")
+        img.size.set_options(width=50)
+        img.rotation.set_options(mirrored=True)
+        assert str(img) == f"{api_endpoint}/{image_id}/full/50,/!180/default.jpg"
+        img.image_options["quality"] = "gray"
+        img.image_options["fmt"] = "png"
+        assert str(img) == f"{api_endpoint}/{image_id}/full/50,/!180/gray.png"
+        img.api_endpoint = "http://other.server"
+        img.image_id = "img2"
+        assert str(img) == "http://other.server/img2/full/50,/!180/gray.png"
+        # as_dict returns copies of options, so cannot change the url
+        img.as_dict()["size"].update(full=False, width=300)
+        assert str(img) == "http://other.server/img2/full/50,/!180/gray.png"
+        assert img.info() == "http://other.server/img2/info.json"
+
+        with patch.object(image.IIIFImageClient, "image_info", new=sample_image_info):
+            img.region.parse("pct:10,10,50,50")
+            img.size.parse(",100")
+            assert "pct:10,10,50,50/,100" in str(img)
+            img.region.canonicalize()
+            img.size.canonicalize()
+            assert "211,303,1056,1519/69," in str(img)
+
+        # fluent methods return new images with their own urls
+        img = image.IIIFImageClient.init_from_url(VALID_URLS["simple"])
+        assert str(img) == VALID_URLS["simple"]
+        assert str(img.size(width=10)).endswith("/full/10,/0/default.jpg")
+        assert str(img.region(x=1, y=2, width=3, height=4)).endswith(
+            "/1,2,3,4/full/0/default.jpg"
+        )
+        assert str(img.rotation(degrees=90)).endswith("/full/full/90/default.jpg")
+        assert str(img.format("png")).endswith("/full/full/0/default.png")
+        # original is unchanged
+        assert str(img) == VALID_URLS["simple"]
+
+    def test_init_from_resource(self):
+        resource = {
+            "id": f"{api_endpoint}/{image_id}/full/max/0/default.jpg",
+            "width": 300,
+            "height": 200,
+            "service": {
+                "id": f"{api_endpoint}/{image_id}/",
+                "profile": "level1",
+                "tiles": [{"width": 256, "scaleFactors": [1, 2]}],
+            },
+        }
+        img = image.IIIFImageClient.init_from_resource(resource)
+        assert img.api_endpoint == api_endpoint
+        assert img.image_id == image_id
+        assert img.image_info == {
+            "width": 300,
+            "height": 200,
+            "profile": "level1",
+            "tiles": [{"width": 256, "scaleFactors": [1, 2]}],
+        }
+        # dimensions in the service are preferred
+        resource["service"].update({"width": 3000, "height": 2000})
+        img = image.IIIFImageClient.init_from_resource(resource)
+        assert (img.image_width, img.image_height) == (3000, 2000)
+
+        # specified dimensions are used if not in the resource
+        resource = {"service": [{"@id": f"{api_endpoint}/{image_id}"}]}
+        img = image.IIIFImageClient.init_from_resource(resource, 10, 20)
+        assert img.image_info == {"width": 10, "height": 20}
+        # no image information without dimensions
+        img = image.IIIFImageClient.init_from_resource(resource)
+        assert "image_info" not in img.__dict__
+
+        for resource in [{}, {"service": []}, {"service": "id"}, None]:
+            with pytest.raises(image.IIIFImageClientException):
+                image.IIIFImageClient.init_from_resource(resource)
+
     def test_init_from_url(self):
         # well-formed
         # - info url
@@ -214,6 +341,162 @@ class TestIIIFImageClient:
         with pytest.raises(image.ParseError, match="Invalid IIIF image url"):
             image.IIIFImageClient.init_from_url("http://info.json")
 
+    def test_parse_url(self):
+        parsed = image.IIIFImageClient.parse_url(VALID_URLS["complex"])
+        assert isinstance(parsed, image.ImageUrl)
+        assert parsed.api_endpoint == api_endpoint
+        assert parsed.image_id == image_id
+        assert parsed.region == image.ImageRegion.parse_options("2560,2560,256,256")
+        assert parsed.size == image.ImageSize.parse_options("256,")
+        assert parsed.rotation == {"degrees": 90.0, "mirrored": True}
+        assert parsed.quality == "default"
+        assert parsed.fmt == "jpg"
+
+        # info url
+        parsed = image.IIIFImageClient.parse_url(VALID_URLS["info-loris"])
+        assert parsed.api_endpoint == f"{api_endpoint}/loris"
+        assert parsed.image_id == image_id
+        assert parsed.region is None
+        assert parsed.fmt is None
+
+        # query string, fragment, and duplicate slashes are ignored
+        parsed = image.IIIFImageClient.parse_url(
+            "https://imgserver.co//iiif/img1/full/max/0/default.png?token=a#frag"
+        )
+        assert parsed.api_endpoint == "https://imgserver.co/iiif"
+        assert parsed.fmt == "png"
+
+        # IIIF Image API 3.0 upscaling
+        parsed = image.IIIFImageClient.parse_url(
+            f"{api_endpoint}/{image_id}/full/^!300,200/0/default.jpg"
+        )
+        assert parsed.size["upscaled"] is True
+        assert parsed.size["exact"] is True
+
+        with pytest.raises(image.ParseError, match="Invalid IIIF image request"):
+            image.IIIFImageClient.parse_url(
+                f"{api_endpoint}/{image_id}/full/full/0/default"
+            )
+        with pytest.raises(image.ParseError, match="Error parsing rotation"):
+            image.IIIFImageClient.parse_url(
+                f"{api_endpoint}/{image_id}/full/full/abc/default.jpg"
+            )
+
+    def test_parse_url_cache(self):
+        url_cache = LRUCache(maxsize=2)
+        with patch.object(image.IIIFImageClient, "url_cache", new=url_cache):
+            parsed = image.IIIFImageClient.parse_url(VALID_URLS["simple"])
+            assert url_cache.misses == 1
+            assert image.IIIFImageClient.parse_url(VALID_URLS["simple"]) is parsed
+            assert url_cache.hits == 1
+
+            # clients do not share option dictionaries with cached results
+            img = image.IIIFImageClient.init_from_url(VALID_URLS["simple"])
+            img.size.set_options(width=100)
+            assert parsed.size["width"] is None
+            assert (
+                str(image.IIIFImageClient.init_from_url(VALID_URLS["simple"]))
+                == (VALID_URLS["simple"])
+            )
+
+            # cache size is bounded
+            image.IIIFImageClient.parse_url(VALID_URLS["complex"])
+            image.IIIFImageClient.parse_url(VALID_URLS["exact"])
+            assert len(url_cache) == 2
+            assert VALID_URLS["simple"] not in url_cache
+
+        # caching can be disabled
+        with patch.object(image.IIIFImageClient, "url_cache", new=None):
+            parsed = image.IIIFImageClient.parse_url(VALID_URLS["simple"])
+            assert image.IIIFImageClient.parse_url(VALID_URLS["simple"]) is not parsed
+            assert parsed == image.IIIFImageClient.parse_url(VALID_URLS["simple"])
+
+    def test_render_urls(self):
+        image_ids = ["img1", "img2", "img3"]
+        urls = image.IIIFImageClient.render_urls(
+            f"{api_endpoint}/", image_ids, size="!200,200", rotation="90", fmt="png"
+        )
+        # generator, not a list
+        assert not isinstance(urls, list)
+        urls = list(urls)
+        assert urls == [
+            str(
+                image.IIIFImageClient(api_endpoint, img_id)
+                .size(width=200, height=200, exact=True)
+                .rotation(degrees=90)
+                .format("png")
+            )
+            for img_id in image_ids
+        ]
+        assert urls[0] == f"{api_endpoint}/img1/full/!200,200/90/default.png"
+
+        # defaults
+        assert list(image.IIIFImageClient.render_urls(api_endpoint, [image_id])) == [
+            VALID_URLS["simple"]
+        ]
+
+        # options are parsed once, up front
+        with pytest.raises(image.ParseError, match="Error parsing size"):
+            image.IIIFImageClient.render_urls(api_endpoint, image_ids, size="a,")
+
+    def test_tile_urls(self):
+        img = image.IIIFImageClient(api_endpoint, image_id)
+        img.image_info = {
+            "width": 1000,
+            "height": 700,
+            "tiles": [{"width": 512, "scaleFactors": [1, 2, 4]}],
+        }
+        urls = img.tile_urls()
+        # generator, not a list
+        assert not isinstance(urls, list)
+        urls = list(urls)
+        prefix = f"{api_endpoint}/{image_id}"
+        assert urls == [
+            f"{prefix}/0,0,512,512/512,/0/default.jpg",
+            f"{prefix}/512,0,488,512/488,/0/default.jpg",
+            f"{prefix}/0,512,512,188/512,/0/default.jpg",
+            f"{prefix}/512,512,488,188/488,/0/default.jpg",
+            f"{prefix}/full/500,/0/default.jpg",
+            f"{prefix}/full/250,/0/default.jpg",
+        ]
+
+        # restrict to selected scale factors; uses current quality and format
+        assert list(img.format("png").tile_urls(scale_factors=[2])) == [
+            f"{prefix}/full/500,/0/default.png"
+        ]
+
+        # sizes include height for image api 3; tile height may differ
+        img.image_info.update(
+            {
+                "@context": "http://iiif.io/api/image/3/context.json",
+                "tiles": [{"width": 512, "height": 256, "scaleFactors": [2]}],
+            }
+        )
+        assert list(img.tile_urls()) == [
+            f"{prefix}/0,0,1000,512/500,256/0/default.jpg",
+            f"{prefix}/0,512,1000,188/500,94/0/default.jpg",
+        ]
+
+        # no tiles
+        img.image_info = {"width": 1000, "height": 700}
+        assert list(img.tile_urls()) == []
+
+    def test_tile_urls_dataclasses(self):
+        tiles = [{"width": 512, "scaleFactors": [1, 2]}]
+        image2 = Image2(
+            id=f"{api_endpoint}/{image_id}", width=600, height=400, tiles=tiles
+        )
+        assert list(image2.tile_urls(scale_factors=[2], fmt="png")) == [
+            f"{api_endpoint}/{image_id}/full/300,/0/default.png"
+        ]
+        assert len(list(image2.tile_urls())) == 3
+        image3 = Image3(
+            id=f"{api_endpoint}/{image_id}", width=600, height=400, tiles=tiles
+        )
+        assert list(image3.tile_urls(scale_factors=[2])) == [
+            f"{api_endpoint}/{image_id}/full/300,200/0/default.jpg"
+        ]
+
     def test_as_dicts(self):
         img = image.IIIFImageClient.init_from_url(VALID_URLS["complex"])
         assert img.as_dict() == {
@@ -234,33 +517,246 @@ class TestIIIFImageClient:
                 "height": None,
                 "percent": None,
                 "width": 256,
+                "upscaled": False,
             },
             "quality": "default",
             "format": "jpg",
         }
 
-    @patch("piffle.image.requests")
-    def test_image_info(self, mockrequests):
+    @patch("piffle.transport.HTTPTransport.get")
+    def test_image_info(self, mock_get):
         # test image info logic by mocking requests
-        mockrequests.codes.ok = requests.codes.ok
-        mockresponse = mockrequests.get.return_value
+        mockresponse = mock_get.return_value
         mockresponse.status_code = requests.codes.ok
         mockresponse.json.return_value = sample_image_info
 
         # valid response
         img = image.IIIFImageClient.init_from_url(VALID_URLS["simple"])
         assert img.image_info == sample_image_info
-        mockrequests.get.assert_called_with(img.info())
+        mock_get.assert_called_with(img.info())
         mockresponse.json.assert_called_with()
 
+        # image info is shared with other clients for the same image
+        mock_get.reset_mock()
+        img = image.IIIFImageClient.init_from_url(VALID_URLS["simple"])
+        assert img.image_info == sample_image_info
+        mock_get.assert_not_called()
+
         # error response
         mockresponse.status_code = 400
         mockresponse.raise_for_status.side_effect = requests.HTTPError()
+        image.IIIFImageClient.info_cache.clear()
         img = image.IIIFImageClient.init_from_url(VALID_URLS["simple"])
         with pytest.raises(requests.HTTPError):
             img.image_info  # reset cached info
         mockresponse.raise_for_status.assert_called_with()
 
+    @patch("piffle.transport.HTTPTransport.get")
+    def test_image_info_cache(self, mock_get):
+        mockresponse = mock_get.return_value
+        mockresponse.status_code = requests.codes.ok
+        mockresponse.json.return_value = sample_image_info
+
+        info_cache = LRUCache(maxsize=10, ttl=60)
+        with patch.object(image.IIIFImageClient, "info_cache", new=info_cache):
+            img = image.IIIFImageClient.init_from_url(VALID_URLS["complex"])
+            assert img.image_info == sample_image_info
+            assert info_cache.misses == 1
+            assert img.info() in info_cache
+            # copies, canonicalized images, and new clients for the
+            # same image all use the cached info
+            canonical = img.size(width=100).canonicalize()
+            assert canonical.image_width == sample_image_info["width"]
+            other = image.IIIFImageClient(api_endpoint, image_id)
+            assert other.image_height == sample_image_info["height"]
+            assert mock_get.call_count == 1
+            assert info_cache.hits == 1
+
+            # different image
+            assert image.IIIFImageClient(api_endpoint, "img2").image_info
+            assert mock_get.call_count == 2
+            assert info_cache.misses == 2
+
+        # cache can be disabled
+        with patch.object(image.IIIFImageClient, "info_cache", new=None):
+            for _i in range(2):
+                assert image.IIIFImageClient(api_endpoint, image_id).image_info
+            assert mock_get.call_count == 4
+
+    def test_request_image_info_single_flight(self):
+        # concurrent requests for the same image share one request
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get(url):
+            started.set()
+            release.wait(5)
+            response = Mock(status_code=requests.codes.ok)
+            response.json.return_value = sample_image_info
+            return response
+
+        with patch(
+            "piffle.transport.HTTPTransport.get", side_effect=slow_get
+        ) as mock_get:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                first = executor.submit(get_test_imgclient().request_image_info)
+                started.wait(5)
+                others = [
+                    executor.submit(get_test_imgclient().request_image_info)
+                    for _i in range(3)
+                ]
+                # give other threads time to start waiting
+                time.sleep(0.2)
+                release.set()
+                results = [first.result()] + [other.result() for other in others]
+            assert results == [sample_image_info] * 4
+            assert mock_get.call_count == 1
+
+            # errors are raised for all waiting requests
+            mock_get.side_effect = requests.ConnectionError
+            with pytest.raises(requests.ConnectionError):
+                get_test_imgclient().request_image_info()
+            assert image._pending_info == {}
+
+    def test_needs_image_info(self):
+        img = get_test_imgclient()
+        assert not img.needs_image_info()
+        for region in ["full", "0,0,10,10"]:
+            for size in ["full", "max", "10,", "10,20", "^max"]:
+                img = image.IIIFImageClient(api_endpoint, image_id, region, size)
+                assert not img.needs_image_info()
+        for region in ["square", "pct:10,10,50,50"]:
+            img = image.IIIFImageClient(api_endpoint, image_id, region=region)
+            assert img.needs_image_info()
+        for size in ["pct:50", "!10,10", ",10"]:
+            img = image.IIIFImageClient(api_endpoint, image_id, size=size)
+            assert img.needs_image_info()
+
+    def test_canonicalize_urls(self, http_server, transport):
+        images = {"img1": (100, 100), "img2": (50, 100), "img3": (200, 50)}
+        for img_id, (width, height) in images.items():
+            http_server.add_json(
+                f"/iiif/{img_id}/info.json", {"width": width, "height": height}
+            )
+        endpoint = http_server.url("iiif")
+        urls = [
+            f"{endpoint}/img1/square/pct:25/90.0/default.jpg",
+            f"{endpoint}/img2/full/!50,50/0/default.jpg",
+            f"{endpoint}/img1/pct:10,10,50,50/,50/0/default.jpg",
+            f"{endpoint}/img2/square/full/0/default.jpg",
+            # no image information needed
+            f"{endpoint}/img3/0,0,10,10/10,/0/default.jpg",
+        ]
+        assert image.IIIFImageClient.canonicalize_urls(urls, max_workers=2) == [
+            f"{endpoint}/img1/full/25,25/90/default.jpg",
+            f"{endpoint}/img2/full/25,50/0/default.jpg",
+            f"{endpoint}/img1/10,10,50,50/50,/0/default.jpg",
+            f"{endpoint}/img2/0,25,50,50/full/0/default.jpg",
+            f"{endpoint}/img3/0,0,10,10/10,/0/default.jpg",
+        ]
+        # same results as canonicalizing one at a time
+        assert image.IIIFImageClient.canonicalize_urls(urls) == [
+            str(image.IIIFImageClient.init_from_url(url).canonicalize()) for url in urls
+        ]
+        # image information requested once per image, only when needed
+        assert sorted(path for path, _headers in http_server.requests) == [
+            "/iiif/img1/info.json",
+            "/iiif/img2/info.json",
+        ]
+
+        # urls for images whose information cannot be retrieved are
+        # returned as given, without failing the rest of the batch
+        missing = f"{endpoint}/missing/square/full/0/default.jpg"
+        urls = [f"{endpoint}/img3/square/full/0/default.jpg", missing]
+        assert image.IIIFImageClient.canonicalize_urls(urls) == [
+            f"{endpoint}/img3/75,0,50,50/full/0/default.jpg",
+            missing,
+        ]
+        # as are urls that cannot be parsed
+        malformed = f"{endpoint}/img1/full/abc/0/default.jpg"
+        assert image.IIIFImageClient.canonicalize_urls(
+            [malformed, f"{endpoint}/img1/square/full/0/default.jpg", "nonsense"]
+        ) == [malformed, f"{endpoint}/img1/full/full/0/default.jpg", "nonsense"]
+
+    def test_cache_key(self):
+        cache_key = image.IIIFImageClient.cache_key
+        info_cache = image.IIIFImageClient.info_cache
+        info_cache.set("http://img.co/iiif/sq/info.json", {"width": 100, "height": 100})
+        info_cache.set(
+            "http://img.co/iiif/wide/info.json", {"width": 200, "height": 100}
+        )
+
+        # endpoint variants, format and quality aliases, full vs max,
+        # rotation; no dimensions needed
+        key = "https://img.co/iiif/other/full/max/0/default.jpg"
+        for url in [
+            "http://img.co/iiif/other/full/full/0/default.jpg",
+            "https://IMG.co:443/iiif/other/full/max/0.0/native.jpeg",
+            "http://img.co:80/iiif//other/full/max/360/default.jpg?x=1",
+        ]:
+            assert cache_key(url) == key
+        assert (
+            cache_key("http://img.co/iiif/other/info.json")
+            == "https://img.co/iiif/other/info.json"
+        )
+
+        # region and size equivalents, using known dimensions
+        key = "https://img.co/iiif/sq/full/50,/90/default.jpg"
+        for url in [
+            "http://img.co/iiif/sq/square/,50/90.0/default.jpg",
+            "http://img.co/iiif/sq/pct:0,0,100,100/pct:50/90/default.jpg",
+            "http://img.co/iiif/sq/0,0,100,100/50,50/90/default.jpg",
+            "http://img.co/iiif/sq/0,0,500,500/^50,/90/default.jpg",
+        ]:
+            assert cache_key(url) == key
+        assert cache_key("http://img.co/iiif/wide/full/200,100/0/default.jpg") == (
+            "https://img.co/iiif/wide/full/max/0/default.jpg"
+        )
+        assert cache_key("http://img.co/iiif/wide/square/^200,/0/default.png") == (
+            "https://img.co/iiif/wide/50,0,100,100/^200,/0/default.png"
+        )
+        # different requests keep different keys
+        assert cache_key("http://img.co/iiif/wide/full/100,100/0/default.jpg") == (
+            "https://img.co/iiif/wide/full/100,100/0/default.jpg"
+        )
+
+        # without dimensions, region and size are not changed and the
+        # key is not cached
+        url = "http://img.co/iiif/new/square/,50/0/default.jpg"
+        assert cache_key(url) == "https://img.co/iiif/new/square/,50/0/default.jpg"
+        info_cache.set("http://img.co/iiif/new/info.json", {"width": 10, "height": 10})
+        assert cache_key(url) == "https://img.co/iiif/new/full/50,/0/default.jpg"
+        # cached once complete
+        info_cache.clear()
+        assert cache_key(url) == "https://img.co/iiif/new/full/50,/0/default.jpg"
+
+        # scheme can be preserved
+        with patch.object(image.IIIFImageClient, "cache_key_scheme", new=None):
+            image.IIIFImageClient.cache_key_cache.clear()
+            assert cache_key("http://img.co/iiif/other/info.json") == (
+                "http://img.co/iiif/other/info.json"
+            )
+
+        with pytest.raises(image.ParseError):
+            cache_key("http://img.co/iiif/other/full")
+
+    def test_cache_key_endpoint_variants(self, http_server, transport):
+        cache_key = image.IIIFImageClient.cache_key
+        # dimensions found for one variant of an endpoint are used for others
+        image.IIIFImageClient.info_cache.set(
+            "http://Ex.org:80/iiif/a/info.json", {"width": 1000, "height": 500}
+        )
+        key = "https://ex.org/iiif/a/full/500,/0/default.jpg"
+        assert cache_key("http://Ex.org:80/iiif/a/full/!500,500/0/default.jpg") == key
+        assert cache_key("https://ex.org/iiif/a/full/!500,500/0/default.jpg") == key
+
+        # as are dimensions retrieved for any variant
+        http_server.add_json("/iiif/b/info.json", {"width": 100, "height": 200})
+        img = image.IIIFImageClient(http_server.url("iiif"), "b")
+        assert img.image_width == 100
+        url = str(img.size(width=100)).replace("http://", "https://")
+        assert cache_key(url).endswith("/iiif/b/full/max/0/default.jpg")
+
     def test_image_width_height(self):
         img = image.IIIFImageClient.init_from_url(VALID_URLS["simple"])
 
@@ -539,11 +1035,25 @@ class TestImageSize:
         assert size_opts["full"] is False
         assert size_opts["percent"] == 55
 
+        # invalid or incomplete size strings
+        # upscaled sizes (IIIF Image API 3.0)
+        for size_str in ["^max", "^pct:150", "^300,", "^,200", "^!300,200"]:
+            size.parse(size_str)
+            assert str(size) == size_str  # round trip
+            assert size.as_dict()["upscaled"] is True
+        size.parse("^!300,200")
+        assert size.as_dict()["exact"] is True
+        assert size.as_dict()["width"] == 300
+
         # invalid or incomplete size strings
         with pytest.raises(image.ParseError):
             size.parse("pct:")
         with pytest.raises(image.ParseError):
             size.parse("one,two")
+        with pytest.raises(image.ParseError, match="Error parsing size: 200"):
+            size.parse("200")
+        with pytest.raises(image.ParseError, match="Error parsing size: 1,2,3"):
+            size.parse("1,2,3")
 
     def test_canonicalize(self):
         # any canonicalization that requires image dimensions to calculate
@@ -585,6 +1095,77 @@ class TestImageSize:
             img.size.canonicalize()
             assert str(img.size) == "25,50"
 
+    def test_nearest_size(self):
+        sizes = [
+            {"width": 250, "height": 188},
+            {"width": 500, "height": 375},
+            {"width": 1000, "height": 750},
+        ]
+        nearest = image.ImageSize.nearest_size
+        assert nearest(sizes, width=400) == sizes[1]
+        assert nearest(sizes, width=300) == sizes[0]
+        assert nearest(sizes, width=300, mode="not_smaller") == sizes[1]
+        assert nearest(sizes, width=400, mode="not_larger") == sizes[0]
+        assert nearest(sizes, height=700) == sizes[2]
+        # bounding box: size must fit in both dimensions to be not larger
+        assert nearest(sizes, width=600, height=300, mode="not_larger") == sizes[0]
+        assert nearest(sizes, width=600, height=300, mode="not_smaller") == sizes[1]
+        # no size qualifies: use the closest
+        assert nearest(sizes, width=2000, mode="not_smaller") == sizes[2]
+        assert nearest(sizes, width=100, mode="not_larger") == sizes[0]
+        # equally close: prefer larger
+        assert nearest(sizes, width=750) == sizes[2]
+        # no sizes
+        assert nearest([], width=100) is None
+        assert nearest(None, width=100, mode="not_smaller") is None
+
+        with pytest.raises(image.IIIFImageClientException, match="Unknown snap"):
+            nearest(sizes, width=100, mode="closest")
+        with pytest.raises(image.IIIFImageClientException, match="without width"):
+            nearest(sizes)
+
+    def test_snap(self):
+        img = image.IIIFImageClient(api_endpoint, image_id)
+        img.image_info = {
+            "width": 4000,
+            "height": 3000,
+            "sizes": [
+                {"width": 250, "height": 188},
+                {"width": 500, "height": 375},
+                {"width": 1000, "height": 750},
+            ],
+        }
+        assert str(img.size(width=400, snap="nearest").size) == "500,375"
+        assert str(img.size(height=200, snap="not_smaller").size) == "500,375"
+        snapped = img.size(width=300, height=300, exact=True, snap="not_larger")
+        assert str(snapped.size) == "250,188"
+        # percent of image dimensions: 400x300
+        assert str(img.size(percent=10, snap="nearest").size) == "500,375"
+        # full and max are unchanged
+        assert str(img.size(max=True, snap="nearest").size) == "max"
+        # original is unchanged
+        assert str(img.size) == "full"
+        # regions are not snapped to sizes of the full image
+        region = img.region(x=0, y=0, width=400, height=2000)
+        assert str(region.size(width=300, snap="nearest").size) == "300,"
+
+        # sizes from image information or Image2/Image3 objects
+        size = image.ImageSize(width=900)
+        size.snap(info={"sizes": [{"width": 800, "height": 600}]})
+        assert str(size) == "800,600"
+        size = image.ImageSize(width=900)
+        size.snap(
+            info=Image3(width=1600, height=1200, sizes=[{"width": 800, "height": 600}])
+        )
+        assert str(size) == "800,600"
+        # no sizes advertised: unchanged
+        size = image.ImageSize(width=900)
+        size.snap(info={"width": 1000, "height": 800})
+        assert str(size) == "900,"
+        # no image
+        with pytest.raises(image.IIIFImageClientException, match="without image"):
+            size.snap()
+
 
 class TestImageRotation:
     def test_defaults(self):
@@ -630,3 +1211,6 @@ class TestImageRotation:
         rotation.parse(rotation_str)
         assert str(rotation) == rotation_str  # round trip
         assert rotation.as_dict()["mirrored"] is True
+
+        with pytest.raises(image.ParseError, match="Error parsing rotation: ninety"):
+            rotation.parse("ninety")
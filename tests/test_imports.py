@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def loaded_modules(code, names):
+    # run code in a fresh interpreter and return which of the named
+    # modules were imported
+    script = f"import sys\n{code}\nprint(*[n for n in {names!r} if n in sys.modules])"
+    output = subprocess.run(
+        [sys.executable, "-c", script], check=True, capture_output=True, text=True
+    )
+    return output.stdout.split()
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["piffle.image", "piffle.iiif_dataclasses", "piffle.load_iiif", "piffle.utils"],
+)
+def test_no_requests_on_import(module):
+    assert loaded_modules(f"import {module}", ["requests", "urllib3"]) == []
+
+
+def test_requests_loaded_for_transport():
+    code = "from piffle.transport import get_transport; get_transport()"
+    assert loaded_modules(code, ["requests"]) == ["requests"]
+
+
+def test_dataclasses_lazy():
+    modules = [
+        "piffle.iiif_dataclasses.presentation2",
+        "piffle.iiif_dataclasses.presentation3",
+    ]
+    assert loaded_modules("import piffle.iiif_dataclasses", modules) == []
+    assert loaded_modules("from piffle.iiif_dataclasses import Canvas2", modules) == [
+        "piffle.iiif_dataclasses.presentation2"
+    ]
+    assert loaded_modules(
+        "from piffle.iiif_dataclasses import MANIFEST3_CLASSES", modules
+    ) == ["piffle.iiif_dataclasses.presentation3"]
+
+
+def test_dataclasses_attributes():
+    import piffle.iiif_dataclasses as iiif_dataclasses
+    from piffle.iiif_dataclasses.presentation3 import Canvas3
+
+    assert iiif_dataclasses.Canvas3 is Canvas3
+    assert iiif_dataclasses.MANIFEST3_CLASSES["Canvas"] is Canvas3
+    assert iiif_dataclasses.MANIFEST2_CLASSES["sc:Canvas"].__name__ == "Canvas2"
+    assert set(iiif_dataclasses.__all__) <= set(dir(iiif_dataclasses))
+    with pytest.raises(AttributeError):
+        iiif_dataclasses.Canvas4
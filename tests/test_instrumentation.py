@@ -0,0 +1,88 @@
+import os
+
+import pytest
+import requests
+
+from piffle import instrumentation
+from piffle.image import IIIFImageClient
+from piffle.instrumentation import InMemoryCollector, instrument
+from piffle.load_iiif import load_iiif_presentation
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+
+class TestInMemoryCollector:
+    def test_record(self):
+        collector = InMemoryCollector()
+        collector.record("http.request", 0.5, {"host": "a", "status": 200})
+        collector.record("http.request", 0.25, {"host": "b", "status": 404})
+        collector.record("info_cache.hit", None, {})
+        assert collector.count("http.request") == 2
+        assert collector.count("http.request", host="b") == 1
+        assert collector.count("http.request", host="c") == 0
+        assert collector.total_time("http.request") == 0.75
+        assert collector.total_time("http.request", status=200) == 0.5
+        assert collector.summary() == {
+            "http.request": (2, 0.75),
+            "info_cache.hit": (1, 0.0),
+        }
+        collector.clear()
+        assert collector.events == []
+
+
+class TestInstrument:
+    def test_instrument(self):
+        assert instrumentation.collectors == []
+        with instrument() as collector:
+            assert instrumentation.collectors == [collector]
+            instrumentation.record("test", 1.0, tag="a")
+            with instrumentation.timed("timed", tag="b") as tags:
+                tags["extra"] = True
+        assert instrumentation.collectors == []
+        # not recorded when disabled
+        instrumentation.record("test", 1.0)
+        assert collector.count("test") == 1
+        (event,) = collector.matching("timed")
+        assert event.tags == {"tag": "b", "extra": True}
+        assert event.duration >= 0
+
+        # custom collector; removed on error
+        custom = InMemoryCollector()
+        with pytest.raises(ValueError), instrument(custom) as collector:
+            raise ValueError
+        assert collector is custom
+        assert instrumentation.collectors == []
+
+    def test_load_presentation(self):
+        path = os.path.join(FIXTURE_DIR, "manifest2.json")
+        with instrument() as collector:
+            manifest = load_iiif_presentation(path)
+        assert collector.count("json.decode", source=path) == 1
+        (formatted,) = collector.matching("format_manifest")
+        assert formatted.tags["objects"] > 0
+        assert collector.count("construct", cls="Manifest2") == 1
+        canvases = manifest.sequences[0].canvases
+        assert collector.count("construct", cls="Canvas2") == len(canvases)
+        assert collector.count("http.request") == 0
+
+    def test_http(self, http_server, transport):
+        http_server.add_json("/iiif/img1/info.json", {"width": 100, "height": 200})
+        host = f"127.0.0.1:{http_server.server_port}"
+        with instrument() as collector:
+            img = IIIFImageClient(http_server.url("iiif"), "img1")
+            assert img.image_info["width"] == 100
+            assert IIIFImageClient(http_server.url("iiif"), "img1").image_info
+            with pytest.raises(requests.HTTPError):
+                IIIFImageClient(http_server.url("iiif"), "img2").image_info
+        assert collector.count("http.request", host=host, status=200) == 1
+        assert collector.count("http.request", host=host, status=404) == 1
+        assert collector.count("json.decode", source=img.info()) == 1
+        assert collector.count("info_cache.miss") == 2
+        assert collector.count("info_cache.hit") == 1
+
+        # connection errors
+        with instrument() as collector, pytest.raises(requests.ConnectionError):
+            transport.get("http://127.0.0.1:1/")
+        assert collector.count("http.request", error="ConnectionError") == 1
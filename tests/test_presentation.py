@@ -22,15 +22,14 @@ class TestIIIFPresentation:
         manifest_url = "http://ma.ni/fe.st"
         with open(self.test_manifest) as manifest:
             data = json.loads(manifest.read())
-        with patch("piffle.presentation.requests") as mockrequests:
-            mockrequests.codes = requests.codes
-            mockresponse = mockrequests.get.return_value
+        with patch("piffle.transport.HTTPTransport.get") as mock_get:
+            mockresponse = mock_get.return_value
             mockresponse.status_code = requests.codes.ok
             mockresponse.json.return_value = data
             pres = IIIFPresentation.from_url(manifest_url)
             assert pres.type == "sc:Manifest"
-            mockrequests.get.assert_called_with(manifest_url)
-            mockrequests.get.return_value.json.assert_called_with()
+            mock_get.assert_called_with(manifest_url)
+            mock_get.return_value.json.assert_called_with()
 
             # error handling
             # bad status code response on the url
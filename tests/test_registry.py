@@ -0,0 +1,162 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from piffle.iiif_dataclasses.image2 import Image2
+from piffle.iiif_dataclasses.image3 import Image3
+from piffle.iiif_dataclasses.presentation2 import IIIFPresentation2
+from piffle.iiif_dataclasses.presentation3 import Manifest3
+from piffle.image import IIIFImageClient
+from piffle.registry import ImageDimensionRegistry
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+api_endpoint = "http://imgserver.co/iiif"
+
+tiles = [{"width": 512, "scaleFactors": [1, 2, 4, 8]}]
+
+
+def manifest3(image_width=2000, image_height=3000):
+    return Manifest3(
+        context="http://iiif.io/api/presentation/3/context.json",
+        id="http://example.com/manifest",
+        type="Manifest",
+        label={"en": ["Test manifest"]},
+        items=[
+            {
+                "id": f"http://example.com/canvas/{i}",
+                "type": "Canvas",
+                "width": 1000,
+                "height": 1500,
+                "items": [
+                    {
+                        "id": f"http://example.com/page/{i}",
+                        "type": "AnnotationPage",
+                        "items": [
+                            {
+                                "id": f"http://example.com/annotation/{i}",
+                                "type": "Annotation",
+                                "motivation": "painting",
+                                "target": f"http://example.com/canvas/{i}",
+                                "body": {
+                                    "id": f"{api_endpoint}/img{i}/full/max/0/default.jpg",
+                                    "type": "Image",
+                                    "width": image_width,
+                                    "height": image_height,
+                                    "service": [
+                                        {
+                                            "id": f"{api_endpoint}/img{i}",
+                                            "type": "ImageService3",
+                                            "profile": "level1",
+                                        }
+                                    ],
+                                },
+                            }
+                        ],
+                    }
+                ],
+            }
+            for i in range(3)
+        ],
+    )
+
+
+class TestImageDimensionRegistry:
+    def test_add_get(self):
+        registry = ImageDimensionRegistry()
+        assert registry.get(api_endpoint, "img1") is None
+        registry.add(f"{api_endpoint}/", "img1", 100, 200, tiles=tiles, sizes=None)
+        assert registry.get(api_endpoint, "img1") == {
+            "width": 100,
+            "height": 200,
+            "tiles": tiles,
+        }
+        assert (api_endpoint, "img1") in registry
+        assert len(registry) == 1
+        # update existing entry
+        registry.add(api_endpoint, "img1", 300, 400)
+        assert registry.get(api_endpoint, "img1") == {"width": 300, "height": 400}
+        assert len(registry) == 1
+
+        registry.add_many(
+            [
+                (api_endpoint, "img2", 10, 20),
+                (api_endpoint, "img3", 30, 40, {"profile": "level2"}),
+            ]
+        )
+        assert len(registry) == 3
+        assert registry.get(api_endpoint, "img3")["profile"] == "level2"
+
+    def test_persistence(self, tmp_path):
+        db_path = str(tmp_path / "dimensions.db")
+        registry = ImageDimensionRegistry(db_path)
+        registry.add(api_endpoint, "img1", 100, 200)
+        registry.close()
+        assert ImageDimensionRegistry(db_path).get(api_endpoint, "img1") == {
+            "width": 100,
+            "height": 200,
+        }
+
+    def test_load_images(self):
+        registry = ImageDimensionRegistry()
+        registry.load_images(
+            [
+                Image2(id=f"{api_endpoint}/img1", width=100, height=200, tiles=tiles),
+                Image3(id=f"{api_endpoint}/img2/", width=300, height=400),
+                # missing dimensions; skipped
+                Image3(id=f"{api_endpoint}/img3"),
+            ]
+        )
+        assert len(registry) == 2
+        assert registry.get(api_endpoint, "img1")["tiles"] == tiles
+        assert registry.get(api_endpoint, "img2") == {"width": 300, "height": 400}
+
+    def test_load_canvases(self):
+        registry = ImageDimensionRegistry()
+        registry.load_canvases(manifest3().items)
+        assert len(registry) == 3
+        assert registry.get(api_endpoint, "img0") == {
+            "width": 2000,
+            "height": 3000,
+            "profile": "level1",
+        }
+
+        # presentation 2
+        manifest = IIIFPresentation2.load(os.path.join(FIXTURE_DIR, "manifest2.json"))
+        registry.load_canvases(manifest.sequences[0].canvases)
+        assert len(registry) == 5
+        image_id = manifest.sequences[0].canvases[0].images[0].resource["service"]["id"]
+        assert registry.get(*ImageDimensionRegistry.split_id(image_id)) == {
+            "width": 1730,
+            "height": 2042,
+            "profile": "http://iiif.io/api/image/2/level2.json",
+        }
+
+    def test_canvas_dimensions(self):
+        # image dimensions missing; use canvas dimensions
+        manifest = manifest3(image_width=None, image_height=None)
+        registry = ImageDimensionRegistry()
+        registry.load_canvases(manifest.items)
+        assert registry.get(api_endpoint, "img1")["width"] == 1000
+
+    @patch("piffle.transport.HTTPTransport.get")
+    def test_image_client(self, mock_get):
+        registry = ImageDimensionRegistry()
+        registry.load_canvases(manifest3().items)
+        with patch.object(IIIFImageClient, "dimension_registry", new=registry):
+            img = IIIFImageClient(api_endpoint, "img1")
+            canonical = img.region(x=10, y=10, width=50, height=50, percent=True).size(
+                height=300
+            )
+            assert str(canonical.canonicalize()) == (
+                f"{api_endpoint}/img1/200,300,1000,1500/200,/0/default.jpg"
+            )
+            mock_get.assert_not_called()
+
+            # unknown image falls back to image server
+            mock_get.side_effect = ConnectionError
+            with pytest.raises(ConnectionError):
+                assert IIIFImageClient(api_endpoint, "unknown").image_info
@@ -0,0 +1,217 @@
+import os
+
+from piffle import selectors
+from piffle.iiif_dataclasses.presentation2 import IIIFPresentation2
+from piffle.iiif_dataclasses.presentation3 import Manifest3
+from piffle.selectors import Selection
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+api_endpoint = "http://imgserver.co/iiif"
+canvas_id = "http://example.com/canvas/1"
+svg = (
+    '<svg xmlns="http://www.w3.org/2000/svg"><path d="M100,200 l300,0 l0,400 z"/></svg>'
+)
+
+
+def manifest3():
+    # canvas is half the size of the image
+    return Manifest3(
+        context="http://iiif.io/api/presentation/3/context.json",
+        id="http://example.com/manifest",
+        type="Manifest",
+        label={"en": ["Test manifest"]},
+        items=[
+            {
+                "id": canvas_id,
+                "type": "Canvas",
+                "width": 1000,
+                "height": 1500,
+                "items": [
+                    {
+                        "id": "http://example.com/page/1",
+                        "type": "AnnotationPage",
+                        "items": [
+                            {
+                                "id": "http://example.com/annotation/1",
+                                "type": "Annotation",
+                                "motivation": "painting",
+                                "target": canvas_id,
+                                "body": {
+                                    "id": f"{api_endpoint}/img1/full/max/0/default.jpg",
+                                    "type": "Image",
+                                    "width": 2000,
+                                    "height": 3000,
+                                    "service": [{"id": f"{api_endpoint}/img1"}],
+                                },
+                            }
+                        ],
+                    }
+                ],
+                "annotations": [
+                    {
+                        "id": "http://example.com/page/2",
+                        "type": "AnnotationPage",
+                        "items": [
+                            {
+                                "id": "http://example.com/annotation/2",
+                                "type": "Annotation",
+                                "motivation": "commenting",
+                                "target": f"{canvas_id}#xywh=10,20,30,40",
+                            }
+                        ],
+                    }
+                ],
+            }
+        ],
+    )
+
+
+class TestParsing:
+    def test_parse_fragment(self):
+        assert selectors.parse_fragment("xywh=10,20,30,40") == (
+            10.0,
+            20.0,
+            30.0,
+            40.0,
+            False,
+        )
+        assert selectors.parse_fragment(f"{canvas_id}#xywh=pixel:1,2,3,4") == (
+            1.0,
+            2.0,
+            3.0,
+            4.0,
+            False,
+        )
+        assert selectors.parse_fragment("t=10&xywh=percent:1.5,2,3,4") == (
+            1.5,
+            2.0,
+            3.0,
+            4.0,
+            True,
+        )
+        assert selectors.parse_fragment("xywh=1,2,3") is None
+        assert selectors.parse_fragment("t=10") is None
+
+    def test_svg_bounding_box(self):
+        assert selectors.svg_bounding_box(svg) == (100.0, 200.0, 300.0, 400.0)
+        assert selectors.svg_bounding_box(
+            "<svg><polygon points='10,20 50,5 30 60'/><rect x='0' y='10' "
+            "width='5' height='5'/></svg>"
+        ) == (0.0, 5.0, 50.0, 55.0)
+        assert selectors.svg_bounding_box(
+            "<svg><circle cx='50' cy='50' r='10'/></svg>"
+        ) == (40.0, 40.0, 20.0, 20.0)
+        # absolute horizontal/vertical lines, curves with control points
+        assert selectors.svg_bounding_box(
+            "<svg><path d='M10 10 H 90 V 90 H 10 Z'/></svg>"
+        ) == (10.0, 10.0, 80.0, 80.0)
+        assert selectors.svg_bounding_box(
+            "<svg><path d='M0,0 c10,-10 20,10 30,0'/></svg>"
+        ) == (0.0, -10.0, 30.0, 20.0)
+        # no shapes or invalid
+        assert selectors.svg_bounding_box("<svg></svg>") is None
+        assert selectors.svg_bounding_box("<svg>") is None
+
+    def test_parse_target(self):
+        # presentation 3 uri with fragment
+        assert selectors.parse_target(f"{canvas_id}#xywh=10,20,30,40") == Selection(
+            canvas_id, 10.0, 20.0, 30.0, 40.0, False
+        )
+        # whole canvas
+        assert selectors.parse_target(canvas_id) == Selection(
+            canvas_id, None, None, None, None, None
+        )
+        assert selectors.parse_target({"id": canvas_id, "type": "Canvas"}) == (
+            selectors.parse_target(canvas_id)
+        )
+        # specific resource with fragment selector
+        assert selectors.parse_target(
+            {
+                "type": "SpecificResource",
+                "source": {"id": canvas_id, "type": "Canvas"},
+                "selector": {"type": "FragmentSelector", "value": "xywh=1,2,3,4"},
+            }
+        ) == Selection(canvas_id, 1.0, 2.0, 3.0, 4.0, False)
+        # svg selector
+        assert selectors.parse_target(
+            {
+                "type": "SpecificResource",
+                "source": canvas_id,
+                "selector": [{"type": "SvgSelector", "value": svg}],
+            }
+        ) == Selection(canvas_id, 100.0, 200.0, 300.0, 400.0, False)
+        # presentation 2 specific resource with choice of selectors
+        assert selectors.parse_target(
+            [
+                {
+                    "@type": "oa:SpecificResource",
+                    "full": canvas_id,
+                    "selector": {
+                        "@type": "oa:Choice",
+                        "default": {"@type": "oa:FragmentSelector", "value": "xywh=a"},
+                        "item": {"@type": "oa:SvgSelector", "value": svg},
+                    },
+                }
+            ]
+        ) == Selection(canvas_id, 100.0, 200.0, 300.0, 400.0, False)
+        # not a canvas target
+        assert selectors.parse_target(None) is None
+        assert selectors.parse_target([]) is None
+        assert selectors.parse_target({"source": {"type": "Canvas"}}) is None
+
+
+class TestCrops:
+    def test_canvas_images(self):
+        images = selectors.canvas_images(manifest3())
+        assert images == {
+            canvas_id: selectors.CanvasImage(
+                f"{api_endpoint}/img1", 1000, 1500, 2000, 3000
+            )
+        }
+        # presentation 2
+        manifest = IIIFPresentation2.load(os.path.join(FIXTURE_DIR, "manifest2.json"))
+        images = selectors.canvas_images(manifest)
+        canvas = manifest.sequences[0].canvases[0]
+        assert (
+            images[canvas.id].image_url == (canvas.images[0].resource["service"]["id"])
+        )
+        assert images[canvas.id].image_width == 1730
+
+    def test_crop_urls(self):
+        manifest = manifest3()
+        # annotations embedded in the manifest; canvas scaled to image
+        assert [url for _annotation, url in selectors.crop_urls(manifest)] == [
+            f"{api_endpoint}/img1/20,40,60,80/full/0/default.jpg"
+        ]
+        # search hits, with size options
+        hits = [
+            {"id": "hit1", "on": f"{canvas_id}#xywh=100,100,50,25"},
+            {"id": "hit2", "target": f"{canvas_id}#xywh=percent:10,10,50,50"},
+            {"id": "hit3", "target": canvas_id},
+            {"id": "hit4", "target": "http://example.com/canvas/unknown#xywh=1,2,3,4"},
+        ]
+        results = list(selectors.crop_urls(manifest, hits, size="!200,200"))
+        assert results == [
+            (hits[0], f"{api_endpoint}/img1/200,200,100,50/!200,200/0/default.jpg"),
+            (hits[1], f"{api_endpoint}/img1/pct:10,10,50,50/!200,200/0/default.jpg"),
+            (hits[2], f"{api_endpoint}/img1/full/!200,200/0/default.jpg"),
+        ]
+
+    def test_crop_clients(self):
+        hits = [{"target": f"{canvas_id}#xywh=1,2,3,4"}] * 2
+        crops = [crop for _hit, crop in selectors.crop_clients(manifest3(), hits)]
+        # separate clients for each crop
+        assert crops[0] is not crops[1]
+        assert crops[0].region.as_dict()["width"] == 6
+
+    def test_crop_unknown_canvas_size(self):
+        # image dimensions are known, canvas dimensions are not: not scaled
+        manifest = manifest3()
+        canvas = manifest.items[0]
+        canvas.width = canvas.height = None
+        hits = [{"target": f"{canvas_id}#xywh=10,10,100,100"}]
+        ((_hit, url),) = selectors.crop_urls(manifest, hits)
+        assert url == f"{api_endpoint}/img1/10,10,100,100/full/0/default.jpg"
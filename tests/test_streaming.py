@@ -0,0 +1,130 @@
+import json
+import os
+
+import pytest
+
+from piffle.iiif_dataclasses.presentation2 import Canvas2
+from piffle.iiif_dataclasses.presentation3 import Canvas3
+from piffle.load_iiif import load_iiif_presentation, stream_iiif_presentation
+from piffle.streaming import ManifestStream
+from piffle.utils import IIIFException
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+manifest3 = {
+    "@context": "http://iiif.io/api/presentation/3/context.json",
+    "id": "http://example.com/manifest",
+    "type": "Manifest",
+    "label": {"en": ["Test manifest éè"]},
+    "items": [
+        {
+            "id": f"http://example.com/canvas/{i}",
+            "type": "Canvas",
+            "label": {"none": [f"№ {i}"]},
+            "width": 1000 + i,
+            "height": 1234567,
+            "items": [],
+        }
+        for i in range(5)
+    ],
+    "structures": [{"id": "http://example.com/range/1", "type": "Range"}],
+}
+
+
+def chunked(text, size):
+    data = text.encode()
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestManifestStream:
+    def test_iterate(self):
+        text = json.dumps(manifest3)
+        # small chunks split strings, numbers, and multibyte characters
+        for size in [1, 3, 7, 100, len(text)]:
+            stream = ManifestStream(chunked(text, size))
+            canvases = list(stream)
+            assert [canvas.id for canvas in canvases] == [
+                f"http://example.com/canvas/{i}" for i in range(5)
+            ]
+            assert all(isinstance(canvas, Canvas3) for canvas in canvases)
+            assert canvases[3].width == 1003
+            assert canvases[3].height == 1234567
+            assert canvases[3].label == {"none": ["№ 3"]}
+            # header keys are formatted; fields after canvases included
+            header = stream.header
+            assert header["context"] == manifest3["@context"]
+            assert header["label"] == manifest3["label"]
+            assert header["structures"][0]["id"] == "http://example.com/range/1"
+            assert "items" not in header
+
+        # str chunks are supported
+        assert len(list(ManifestStream([text]))) == 5
+
+    def test_header_before_canvases(self):
+        stream = ManifestStream(chunked(json.dumps(manifest3), 10))
+        iterator = iter(stream)
+        next(iterator)
+        assert stream.header["id"] == "http://example.com/manifest"
+        assert "structures" not in stream.header
+        list(iterator)
+        assert "structures" in stream.header
+        # can only be iterated once
+        with pytest.raises(IIIFException):
+            list(stream)
+
+    def test_empty(self):
+        stream = ManifestStream([json.dumps({"type": "Manifest", "items": []})])
+        assert list(stream) == []
+        assert stream.header == {"type": "Manifest"}
+
+    def test_close(self):
+        closed = []
+        stream = ManifestStream([json.dumps(manifest3)], close=lambda: closed.append(1))
+        list(stream)
+        assert closed == [1]
+        stream.close()
+        assert closed == [1]
+
+        closed.clear()
+        with ManifestStream([json.dumps(manifest3)], close=lambda: closed.append(1)):
+            pass
+        assert closed == [1]
+
+    def test_invalid(self):
+        for text in [
+            '{"items": [{"type": "Canvas", "id": "x"',
+            '{"items": [{"type": "Canvas"} {"type": "Canvas"}]}',
+            '{"items": []',
+            '["not", "a", "manifest"]',
+            '{"items": []} extra',
+        ]:
+            with pytest.raises(IIIFException):
+                list(ManifestStream(chunked(text, 4), source="test.json"))
+
+
+class TestStreamIIIFPresentation:
+    def test_file(self):
+        path = os.path.join(FIXTURE_DIR, "manifest2.json")
+        manifest = load_iiif_presentation(path)
+        stream = stream_iiif_presentation(path, chunk_size=512)
+        canvases = list(stream)
+        assert canvases == manifest.sequences[0].canvases
+        assert all(isinstance(canvas, Canvas2) for canvas in canvases)
+        header = stream.header
+        assert header["label"] == manifest.label
+        # sequences are included without canvases
+        assert header["sequences"][0]["type"] == "sc:Sequence"
+        assert "canvases" not in header["sequences"][0]
+
+    def test_url(self, http_server, transport):
+        http_server.add_json("/manifest.json", manifest3)
+        stream = stream_iiif_presentation(
+            http_server.url("manifest.json"), chunk_size=64
+        )
+        assert len(list(stream)) == 5
+        assert stream.header["id"] == "http://example.com/manifest"
+
+        with pytest.raises(IIIFException, match="404"):
+            stream_iiif_presentation(http_server.url("missing.json"))
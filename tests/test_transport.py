@@ -0,0 +1,105 @@
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from piffle import transport as transport_module
+from piffle.image import IIIFImageClient
+from piffle.presentation import IIIFPresentation
+from piffle.transport import HTTPTransport, get_transport, set_transport
+from piffle.utils import get_manifest
+
+sample_image_info = {"id": "img1", "width": 100, "height": 200}
+sample_manifest = {
+    "@context": "http://iiif.io/api/presentation/2/context.json",
+    "@id": "http://example.com/manifest",
+    "@type": "sc:Manifest",
+    "label": "Test",
+}
+
+
+class TestHTTPTransport:
+    def test_init(self):
+        auth = ("user", "pass")
+        transport = HTTPTransport(
+            pool_connections=2,
+            pool_maxsize=20,
+            retries=5,
+            headers={"User-Agent": "piffle-test"},
+            auth=auth,
+        )
+        adapter = transport.session.get_adapter("https://example.com/")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 20
+        assert adapter.max_retries.total == 5
+        assert transport.session.get_adapter("http://example.com/") is adapter
+        assert transport.session.headers["User-Agent"] == "piffle-test"
+        assert transport.session.auth == auth
+
+        # existing session
+        session = requests.Session()
+        assert HTTPTransport(session=session).session is session
+
+    def test_get(self):
+        session = Mock()
+        hook = Mock()
+        transport = HTTPTransport(session=session, timeout=3, request_hooks=[hook])
+        url = "http://example.com/info.json"
+        assert transport.get(url) == session.get.return_value
+        session.get.assert_called_with(url, timeout=3)
+        hook.assert_called_with(url, {"timeout": 3})
+        # explicit timeout takes precedence
+        transport.get(url, timeout=10)
+        session.get.assert_called_with(url, timeout=10)
+
+        # hooks can modify request options
+        def add_header(url, options):
+            options["headers"] = {"Authorization": "Bearer token"}
+
+        transport.request_hooks = [add_header]
+        transport.get(url)
+        session.get.assert_called_with(
+            url, timeout=3, headers={"Authorization": "Bearer token"}
+        )
+
+        transport.close()
+        session.close.assert_called_with()
+
+    def test_get_set_transport(self):
+        previous = set_transport(None)
+        try:
+            default = get_transport()
+            assert isinstance(default, HTTPTransport)
+            # same instance is returned on subsequent calls
+            assert get_transport() is default
+            custom = HTTPTransport()
+            assert set_transport(custom) is default
+            assert get_transport() is custom
+        finally:
+            transport_module._transport = previous
+
+    def test_local_server(self, http_server, transport):
+        http_server.add_json("/iiif/img1/info.json", sample_image_info)
+        http_server.add_json("/manifest", sample_manifest)
+        transport.session.headers["X-Test"] = "yes"
+
+        # image info
+        img = IIIFImageClient(http_server.url("iiif"), "img1")
+        assert img.image_width == 100
+        # presentation manifests
+        assert IIIFPresentation.from_url(http_server.url("manifest")).label == "Test"
+        assert get_manifest(http_server.url("manifest"))["label"] == "Test"
+
+        assert [path for path, _headers in http_server.requests] == [
+            "/iiif/img1/info.json",
+            "/manifest",
+            "/manifest",
+        ]
+        assert all(
+            headers["X-Test"] == "yes" for _path, headers in http_server.requests
+        )
+
+        # errors
+        img = IIIFImageClient(http_server.url("iiif"), "missing")
+        with pytest.raises(requests.HTTPError):
+            assert img.image_info
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+from piffle import utils
+from piffle.utils import (
+    format_manifest,
+    get_json_backend,
+    load_manifest,
+    set_json_backend,
+)
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+objects = [
+    {},
+    {"id": "a", "type": "Canvas"},
+    {"@context": "c", "@id": "a", "@type": "sc:Canvas", "label": "x"},
+    {"label": "x", "_private": 1, "@id": "a", "@_both": 2, "@a@b": 3},
+    # formatted keys collide with existing keys
+    {"@id": "a", "id": "b", "_type": "c", "type": "d"},
+]
+
+
+@pytest.fixture
+def json_backend():
+    previous = get_json_backend()
+    yield set_json_backend
+    set_json_backend(previous)
+
+
+class TestFormatManifest:
+    def test_format(self):
+        assert format_manifest({"@id": "a", "_type": "b", "label": "c"}) == {
+            "_at_fields": ["id"],
+            "id": "a",
+            "_underscore_fields": ["type"],
+            "type": "b",
+            "label": "c",
+        }
+        # unchanged objects are returned as is
+        unchanged = {"id": "a", "type": "Canvas"}
+        assert format_manifest(unchanged) is unchanged
+
+    def test_same_as_key_by_key(self):
+        for obj in objects:
+            # formatted twice, to use the plan for the same keys
+            for _ in range(2):
+                formatted = format_manifest(dict(obj))
+                expected = utils._format_keys(obj)
+                assert formatted == expected
+                assert list(formatted) == list(expected)
+        # field lists are not shared between objects
+        first = format_manifest({"@id": "a"})
+        first["_at_fields"].append("other")
+        assert format_manifest({"@id": "b"})["_at_fields"] == ["id"]
+
+    def test_plans_bounded(self, monkeypatch):
+        monkeypatch.setattr(utils, "_key_plans", {})
+        monkeypatch.setattr(utils, "_key_plans_maxsize", 3)
+        for i in range(10):
+            format_manifest({f"@key{i}": i})
+        assert len(utils._key_plans) <= 3
+
+
+class TestJSONBackend:
+    def test_set_backend(self, json_backend):
+        assert get_json_backend() == "json"
+        with pytest.raises(ValueError):
+            json_backend("simplejson")
+        assert get_json_backend() == "json"
+
+    def test_set_orjson(self, json_backend, monkeypatch):
+        monkeypatch.setattr(utils, "_import_orjson", lambda: None)
+        with pytest.raises(ImportError):
+            json_backend("orjson")
+        assert get_json_backend() == "json"
+
+    @pytest.mark.parametrize("backend", ["json", "orjson"])
+    def test_load(self, json_backend, backend):
+        if backend == "orjson":
+            pytest.importorskip("orjson")
+        json_backend(backend)
+        path = os.path.join(FIXTURE_DIR, "manifest2.json")
+        with open(path) as manifest:
+            expected = json.load(manifest, object_hook=utils._format_keys)
+        assert load_manifest(path) == expected
+        for obj in objects:
+            content = json.dumps({"items": [obj, [obj]], "obj": obj}).encode()
+            assert utils.decode_manifest(content, "test") == json.loads(
+                content, object_hook=utils._format_keys
+            )
+
+    @pytest.mark.parametrize("backend", ["json", "orjson"])
+    def test_invalid(self, tmp_path, json_backend, backend):
+        if backend == "orjson":
+            pytest.importorskip("orjson")
+        json_backend(backend)
+        path = tmp_path / "manifest.json"
+        path.write_text('{"id": "a",')
+        with pytest.raises(json.JSONDecodeError):
+            load_manifest(str(path))
@@ -0,0 +1,143 @@
+import pytest
+
+from piffle.image import IIIFImageClient
+
+np = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("piffle.vectorized")
+
+api_endpoint = "http://imgserver.co/iiif"
+
+
+def scalar_urls(image_ids, region_strings, size_strings, widths, heights):
+    # canonicalize one image at a time, for comparison
+    urls = []
+    for image_id, region, size, width, height in zip(
+        image_ids, region_strings, size_strings, widths, heights
+    ):
+        img = IIIFImageClient(api_endpoint, image_id, region=region, size=size)
+        img.image_info = {"width": width, "height": height}
+        urls.append(str(img.canonicalize()))
+    return urls
+
+
+class TestVectorized:
+    def test_regions(self):
+        crops = vectorized.regions([10, 20.5], 5, 50, 60, percent=[True, False])
+        assert crops.x.tolist() == [10.0, 20.5]
+        assert crops.y.tolist() == [5.0, 5.0]
+        assert crops.percent.tolist() == [True, False]
+        assert vectorized.render_regions(crops) == [
+            "pct:10,5,50,60",
+            "20.5,5,50,60",
+        ]
+        assert vectorized.render_regions(
+            vectorized.regions(full=[True, False], square=[False, True])
+        ) == ["full", "square"]
+
+    def test_sizes(self):
+        thumbs = vectorized.sizes(
+            width=[200, 0, 0, 100, 0],
+            height=[0, 300, 0, 100, 0],
+            percent=[0, 0, 50, 0, 0],
+        )
+        assert thumbs.width.dtype == np.int64
+        assert vectorized.render_sizes(thumbs) == [
+            "200,",
+            ",300",
+            "pct:50",
+            "100,100",
+            ",",
+        ]
+        assert vectorized.render_sizes(
+            vectorized.sizes(
+                width=200,
+                height=100,
+                exact=True,
+                upscaled=[False, True, True],
+                max=[False, False, True],
+            )
+        ) == ["!200,100", "^!200,100", "^max"]
+        assert vectorized.render_sizes(vectorized.sizes(full=[True])) == ["full"]
+
+    def test_canonicalize(self):
+        image_ids = ["img1", "img2", "img3", "img4", "img5", "img6"]
+        widths = [1000, 1000, 800, 333, 1000, 1000]
+        heights = [1000, 700, 1200, 777, 700, 700]
+        region_strings = [
+            "square",
+            "square",
+            "square",
+            "pct:12.5,33.3,50,25.7",
+            "full",
+            "10,20,300,400",
+        ]
+        size_strings = ["pct:25", "!200,200", ",150", "!301,97", "max", "full"]
+        crops = vectorized.regions(
+            x=[0, 0, 0, 12.5, 0, 10],
+            y=[0, 0, 0, 33.3, 0, 20],
+            width=[0, 0, 0, 50, 0, 300],
+            height=[0, 0, 0, 25.7, 0, 400],
+            percent=[False, False, False, True, False, False],
+            square=[True, True, True, False, False, False],
+            full=[False, False, False, False, True, False],
+        )
+        thumbs = vectorized.sizes(
+            width=[0, 200, 0, 301, 0, 0],
+            height=[0, 200, 150, 97, 0, 0],
+            percent=[25, 0, 0, 0, 0, 0],
+            exact=[False, True, False, True, False, False],
+            max=[False, False, False, False, True, False],
+            full=[False, False, False, False, False, True],
+        )
+        crops = vectorized.canonicalize_regions(crops, widths, heights)
+        thumbs = vectorized.canonicalize_sizes(thumbs, widths, heights)
+        urls = list(vectorized.render_urls(api_endpoint, image_ids, crops, thumbs))
+        assert urls == scalar_urls(
+            image_ids, region_strings, size_strings, widths, heights
+        )
+        assert urls[0] == f"{api_endpoint}/img1/full/250,250/0/default.jpg"
+        assert urls[1] == f"{api_endpoint}/img2/150,0,700,700/200,140/0/default.jpg"
+
+    def test_canonicalize_random(self):
+        rng = np.random.default_rng(1234)
+        count = 1000
+        widths = rng.integers(100, 20000, count)
+        heights = rng.integers(100, 20000, count)
+        x, y = rng.uniform(0, 50, (2, count)).round(2)
+        w, h = rng.uniform(1, 50, (2, count)).round(2)
+        percent = rng.uniform(1, 100, count).round(1)
+        thumb_width = rng.integers(1, 1000, count)
+        thumb_height = rng.integers(1, 1000, count)
+        # size syntax: 0 pct:n, 1 !w,h, 2 ,h, 3 w,h
+        kind = rng.integers(0, 4, count)
+
+        crops = vectorized.regions(x, y, w, h, percent=True)
+        thumbs = vectorized.sizes(
+            width=np.where(kind == 2, 0, thumb_width),
+            height=np.where(kind == 0, 0, thumb_height),
+            percent=np.where(kind == 0, percent, 0),
+            exact=kind == 1,
+        )
+        image_ids = [f"img{i}" for i in range(count)]
+        urls = list(
+            vectorized.render_urls(
+                api_endpoint,
+                image_ids,
+                vectorized.canonicalize_regions(crops, widths, heights),
+                vectorized.canonicalize_sizes(thumbs, widths, heights),
+            )
+        )
+        assert urls == scalar_urls(
+            image_ids,
+            vectorized.render_regions(crops),
+            vectorized.render_sizes(thumbs),
+            widths.tolist(),
+            heights.tolist(),
+        )
+
+    def test_canonicalize_broadcast(self):
+        # the same size for images with different dimensions
+        thumbs = vectorized.canonicalize_sizes(
+            vectorized.sizes(width=200, height=200, exact=True), [1000, 400], [500, 800]
+        )
+        assert vectorized.render_sizes(thumbs) == ["200,100", "100,200"]
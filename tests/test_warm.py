@@ -0,0 +1,168 @@
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from piffle.iiif_dataclasses.presentation2 import IIIFPresentation2
+from piffle.iiif_dataclasses.presentation3 import Collection3, Manifest3
+from piffle.image import ParseError
+from piffle.warm import CacheWarmer, HostRateLimiter, WarmSummary
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__), "test_iiif_dataclasses", "fixtures"
+)
+
+
+def manifest3(api_endpoint, image_ids):
+    return Manifest3(
+        context="http://iiif.io/api/presentation/3/context.json",
+        id="http://example.com/manifest",
+        type="Manifest",
+        label={"en": ["Test manifest"]},
+        items=[
+            {
+                "id": f"http://example.com/canvas/{i}",
+                "type": "Canvas",
+                "width": 1000,
+                "height": 700,
+                "items": [
+                    {
+                        "id": f"http://example.com/page/{i}",
+                        "type": "AnnotationPage",
+                        "items": [
+                            {
+                                "id": f"http://example.com/annotation/{i}",
+                                "type": "Annotation",
+                                "motivation": "painting",
+                                "target": f"http://example.com/canvas/{i}",
+                                "body": {
+                                    "id": f"{api_endpoint}/{image_id}/full/max/0/default.jpg",
+                                    "type": "Image",
+                                    "service": [{"id": f"{api_endpoint}/{image_id}"}],
+                                },
+                            }
+                        ],
+                    }
+                ],
+            }
+            for i, image_id in enumerate(image_ids)
+        ],
+    )
+
+
+class TestWarmSummary:
+    def test_record(self):
+        summary = WarmSummary()
+        assert summary.mean_latency == 0.0
+        assert summary.latency_percentile(95) == 0.0
+        summary.record("http://example.com/a", 0.1, 100)
+        summary.record("http://example.com/b", 0.3, 200)
+        summary.record("http://example.com/c", 0.2, error="404 Not Found")
+        assert summary.requests == 3
+        assert summary.succeeded == 2
+        assert summary.bytes == 300
+        assert summary.failures == {"http://example.com/c": "404 Not Found"}
+        assert summary.mean_latency == pytest.approx(0.2)
+        assert summary.max_latency == 0.3
+        assert 0.2 < summary.latency_percentile(95) <= 0.3
+        assert "3 requests, 1 failed, 300 bytes" in str(summary)
+
+
+class TestHostRateLimiter:
+    def test_wait(self):
+        limiter = HostRateLimiter(rate=20)
+        start = time.monotonic()
+        for _i in range(3):
+            limiter.wait("http://example.com/a")
+        # second and third requests to the same host are delayed
+        assert time.monotonic() - start >= 0.1
+        # other hosts are not
+        start = time.monotonic()
+        limiter.wait("http://example.org/a")
+        assert time.monotonic() - start < 0.05
+
+
+class TestCacheWarmer:
+    def test_init(self):
+        warmer = CacheWarmer(scale_factors=[4], max_workers=4)
+        assert warmer.tiles
+        assert warmer.max_in_flight == 8
+        assert warmer.rate_limiter is None
+        with pytest.raises(ParseError):
+            CacheWarmer(sizes=["200"])
+
+    def test_image_urls(self):
+        api_endpoint = "http://imgserver.co/iiif"
+        manifest = manifest3(api_endpoint, ["img1", "img2", "img1"])
+        # duplicates are skipped
+        assert list(CacheWarmer.image_urls(manifest)) == [
+            f"{api_endpoint}/img1",
+            f"{api_endpoint}/img2",
+        ]
+        # collections
+        collection = Collection3(
+            id="http://example.com/collection", type="Collection", items=[manifest]
+        )
+        assert len(list(CacheWarmer.image_urls(collection))) == 2
+
+        # presentation 2
+        manifest = IIIFPresentation2.load(os.path.join(FIXTURE_DIR, "manifest2.json"))
+        image_urls = list(CacheWarmer.image_urls(manifest))
+        assert len(image_urls) == 2
+        canvas = manifest.sequences[0].canvases[0]
+        assert image_urls[0] == canvas.images[0].resource["service"]["id"]
+
+    @patch("piffle.transport.HTTPTransport.get")
+    def test_derivative_urls(self, mock_get):
+        api_endpoint = "http://imgserver.co/iiif"
+        manifest = manifest3(api_endpoint, ["img1", "img2"])
+        warmer = CacheWarmer(sizes=["!200,200", "1000,"], fmt="png")
+        urls = warmer.derivative_urls(manifest)
+        assert not isinstance(urls, list)
+        assert list(urls) == [
+            f"{api_endpoint}/img1/full/!200,200/0/default.png",
+            f"{api_endpoint}/img1/full/1000,/0/default.png",
+            f"{api_endpoint}/img2/full/!200,200/0/default.png",
+            f"{api_endpoint}/img2/full/1000,/0/default.png",
+        ]
+        # no image information needed without tiles
+        mock_get.assert_not_called()
+
+    def test_warm(self, http_server, transport):
+        api_endpoint = http_server.url("iiif")
+        manifest = manifest3(api_endpoint, ["img1", "img2"])
+        http_server.add_json(
+            "/iiif/img1/info.json",
+            {
+                "width": 1000,
+                "height": 700,
+                "tiles": [{"width": 512, "scaleFactors": [1, 2]}],
+            },
+        )
+        image_paths = [
+            "/iiif/img1/full/!200,200/0/default.jpg",
+            "/iiif/img1/full/500,/0/default.jpg",
+            "/iiif/img2/full/!200,200/0/default.jpg",
+        ]
+        for path in image_paths:
+            http_server.routes[path] = (200, {"Content-Type": "image/jpeg"}, b"x" * 10)
+
+        warmer = CacheWarmer(scale_factors=[2], max_workers=2, rate=1000)
+        summary = warmer.warm(manifest)
+        # 2 thumbnails and 1 tile succeed; image 2 information is missing
+        assert summary.requests == 4
+        assert summary.succeeded == 3
+        assert summary.bytes == 30
+        assert list(summary.failures) == [f"{api_endpoint}/img2/info.json"]
+        assert len(summary.latencies) == 4
+        requested = [path for path, _headers in http_server.requests]
+        assert set(image_paths) <= set(requested)
+
+        # server errors are recorded as failures
+        del http_server.routes[image_paths[0]]
+        summary = CacheWarmer().warm(manifest)
+        assert summary.requests == 2
+        assert summary.failures == {
+            http_server.url(image_paths[0]): "404 Not Found",
+        }